@@ -1,5 +1,6 @@
 import os
-from flask import Flask, send_from_directory
+import tempfile
+from flask import Flask, request, send_from_directory
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
@@ -9,6 +10,8 @@ from sqlalchemy import text
 
 # IMPORT FROM EXTENSIONS
 from extensions import db
+from utils import db_pool, replica, query_stats, metrics, profiling, snapshots, sync
+from utils.json_provider import FastJSONProvider
 from models import User, Property, Unit, Lease, Invoice, Payment
 
 # Load environment variables
@@ -16,6 +19,7 @@ load_dotenv()
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app) # orjson-backed jsonify/get_json (see utils/json_provider.py)
 
     # --- CONFIGURATION ---
     uri = os.getenv('DATABASE_URL', 'sqlite:///homehub.db')
@@ -25,18 +29,129 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = uri
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Connection pool (see utils/db_pool.py)
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 280))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+    app.config['DB_PGBOUNCER'] = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_pool.engine_options(app.config, uri)
+
+    # Optional read replica for GET traffic (see utils/replica.py)
+    replica_uri = os.getenv('DATABASE_REPLICA_URL')
+    if replica_uri and replica_uri.startswith("postgres://"):
+        replica_uri = replica_uri.replace("postgres://", "postgresql://", 1)
+    app.config['DATABASE_REPLICA_URL'] = replica_uri
+    app.config['REPLICA_MAX_LAG'] = float(os.getenv('REPLICA_MAX_LAG', 5))
+    app.config['REPLICA_LAG_CHECK_INTERVAL'] = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 5))
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 10))
+    # Shared by all workers when redis://...; memory:// only holds with a single worker
+    app.config['REPLICA_STICKY_STORAGE_URL'] = os.getenv('REPLICA_STICKY_STORAGE_URL',
+                                                         os.getenv('RATELIMIT_STORAGE_URL', 'memory://'))
+    if replica_uri:
+        app.config['SQLALCHEMY_BINDS'] = {
+            replica.REPLICA_BIND: dict(db_pool.engine_options(app.config, replica_uri), url=replica_uri)
+        }
+
     # Security Keys
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'super-secret-key-change-this')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+    # How long a worker trusts its cached token_version before re-reading it
+    app.config['TOKEN_VERSION_TTL'] = int(os.getenv('TOKEN_VERSION_TTL', 30))
+    # Most users whose token_version a worker keeps cached; least recently used go first
+    app.config['TOKEN_VERSION_CACHE_SIZE'] = int(os.getenv('TOKEN_VERSION_CACHE_SIZE', 10000))
+
+    # Password hashing (see utils/passwords.py). Changing the method upgrades hashes on next login.
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.getenv('PASSWORD_HASH_QUEUE', 32))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
+    # Notifications: read rows older than this move out of the hot table (flask notifications retention)
+    app.config['NOTIFICATION_RETENTION_DAYS'] = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+
+    # SSE streams each hold a gthread thread: keep well under --threads (8) so API calls still get one.
+    # Streams past the cap get 503 + Retry-After and the client falls back to polling until then.
+    app.config['SSE_MAX_STREAMS'] = int(os.getenv('SSE_MAX_STREAMS', 3))
+    app.config['SSE_RETRY_AFTER'] = int(os.getenv('SSE_RETRY_AFTER', 30))
+
+    # Delta sync (see utils/sync.py): ?since= tokens older than the tombstones kept get 410
+    app.config['SYNC_TOMBSTONE_DAYS'] = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+    app.config['SYNC_OVERLAP_SECONDS'] = int(os.getenv('SYNC_OVERLAP_SECONDS', 5))
+
+    # Rate limiting (see utils/ratelimit.py). Use redis://... to share buckets across workers.
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATELIMIT_STORAGE_URL'] = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    app.config['RATELIMIT_TRUSTED_PROXIES'] = int(os.getenv('RATELIMIT_TRUSTED_PROXIES', 0))
+
+    # Prometheus metrics at /metrics (see utils/metrics.py)
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+
+    # On-demand profiling (see utils/profiling.py): admins send X-Profile: 1, or sample a fraction
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'homehub-profiles'))
+    app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', 50))
+
+    # Query instrumentation (see utils/query_stats.py): Server-Timing, N+1 logging, @query_budget
+    app.config['QUERY_INSTRUMENTATION'] = os.getenv('QUERY_INSTRUMENTATION', 'false').lower() == 'true'
+    app.config['QUERY_NPLUSONE_THRESHOLD'] = int(os.getenv('QUERY_NPLUSONE_THRESHOLD', 5))
+    app.config['QUERY_BUDGET_ENFORCE'] = os.getenv('QUERY_BUDGET_ENFORCE', 'false').lower() == 'true'
+
+    # Primary key generation: 4 = random UUIDs, 7 = time-ordered (see utils/ids.py)
+    app.config['UUID_VERSION'] = int(os.getenv('UUID_VERSION', 4))
+
+    # Admin dashboard stats: refresh after writes at most every STATS_TTL s, always after STATS_MAX_AGE s
+    app.config['STATS_TTL'] = int(os.getenv('STATS_TTL', 60))
+    app.config['STATS_MAX_AGE'] = int(os.getenv('STATS_MAX_AGE', 900))
+
+    # Lets /api/admin/force-seed-db-123 run without an admin token (fresh deploys only)
+    app.config['FORCE_SEED_ENABLED'] = os.getenv('FORCE_SEED_ENABLED', 'false').lower() == 'true'
+
+    # Rows removed per transaction when purging a deleted account; purges with no progress for
+    # ACCOUNT_PURGE_STALE_MINUTES (worker restart, deploy) are picked up by flask accounts resume-purges
+    app.config['ACCOUNT_PURGE_CHUNK'] = int(os.getenv('ACCOUNT_PURGE_CHUNK', 500))
+    app.config['ACCOUNT_PURGE_STALE_MINUTES'] = int(os.getenv('ACCOUNT_PURGE_STALE_MINUTES', 15))
 
     # File Uploads
     app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
+    app.config['STORAGE_BACKEND'] = os.getenv('STORAGE_BACKEND', 'cloudinary' if os.getenv('CLOUDINARY_CLOUD_NAME') else 'local')
 
     # --- INITIALIZE EXTENSIONS ---
+    metrics.init_app(app) # First, so its timing wraps every other request hook
     db.init_app(app)
+    with app.app_context():
+        db_pool.instrument(db.engine)
+        query_stats.init_app(app, db.engines.values())
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
 
+    from utils import auth
+    auth.init_app(jwt)
+
+    replica.init_app(app)
+    profiling.init_app(app)
+
+    from utils import ratelimit
+    ratelimit.init_app(app)
+
+    from utils import pubsub
+    pubsub.init_app(app)
+
+    from utils.notification_retention import notifications_cli
+    app.cli.add_command(notifications_cli)
+
+    from utils import platform_stats
+    platform_stats.init_app(app)
+
+    snapshots.init_app(app)
+    sync.init_app(app)
+
+    from utils import account_purge
+    account_purge.init_app(app)
+
     # 🟢 THE FIX IS HERE:
     # We use ONLY this CORS block. 
     # We have DELETED the manual "@app.after_request" block that was causing the conflict.
@@ -47,7 +162,8 @@ def create_app():
             "http://127.0.0.1:5173",
         ],
         "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "Last-Event-ID", "X-Read-Consistency", "X-Profile", "If-None-Match"],
+        "expose_headers": ["X-Next-Cursor", "X-Unread-Count", "X-Profile-Id", "X-Sync-Token", "ETag"],
         "supports_credentials": True
     }})
 
@@ -59,6 +175,7 @@ def create_app():
     from routes.maintenance import maintenance_bp
     from routes.payments import payments_bp
     from routes.admin import admin_bp
+    from routes.notifications import notifications_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(properties_bp, url_prefix='/api/properties')
@@ -67,6 +184,9 @@ def create_app():
     app.register_blueprint(maintenance_bp, url_prefix='/api/maintenance')
     app.register_blueprint(payments_bp, url_prefix='/api/payments')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+    # Legacy path the frontend already polls
+    app.register_blueprint(notifications_bp, url_prefix='/api/users/notifications', name='users_notifications')
 
     # --- ROUTES ---
     @app.route('/uploads/<path:filename>')
@@ -78,29 +198,47 @@ def create_app():
         return "HomeHub Backend is Running! 🚀"
 
     # --- TEMPORARY SEED ROUTE ---
+    # Restores the 'seed' snapshot (milliseconds); ?rebuild=1 (or a schema change) reseeds and re-snapshots.
+    # Wipes the live database (on Postgres it is dropped and recreated), so it needs an admin token,
+    # or FORCE_SEED_ENABLED=true to bootstrap a database that has no admin yet.
     @app.route('/api/admin/force-seed-db-123')
+    @replica.use_primary
     def force_seed():
+        if not app.config['FORCE_SEED_ENABLED']:
+            from flask_jwt_extended import verify_jwt_in_request
+            from utils.auth import current_role
+            try:
+                allowed = verify_jwt_in_request(optional=True) is not None and current_role() == 'admin'
+            except Exception: # Missing, bad or revoked token
+                allowed = False
+            if not allowed:
+                return "❌ Admins only (or set FORCE_SEED_ENABLED=true)", 403
         try:
-            with app.app_context():
-                with db.session.begin():
-                    # Clear all tables cleanly
-                    db.session.execute(text("DROP TABLE IF EXISTS payments CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS invoices CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS rent_invoices CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS maintenance_requests CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS notifications CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS leases CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS units CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS property_images CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS properties CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS users CASCADE;"))
-                    db.session.execute(text("DROP TABLE IF EXISTS alembic_version CASCADE;"))
+            if request.args.get('rebuild') != '1' and snapshots.restore('seed'):
+                return "✅ Database Restored from Seed Snapshot!", 200
+
+            if db.engine.dialect.name == 'postgresql': # CASCADE also clears tables the models no longer define
+                with app.app_context():
+                    with db.session.begin():
+                        # Clear all tables cleanly
+                        db.session.execute(text("DROP TABLE IF EXISTS payments CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS invoices CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS rent_invoices CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS maintenance_requests CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS notifications CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS leases CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS units CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS property_images CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS properties CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS users CASCADE;"))
+                        db.session.execute(text("DROP TABLE IF EXISTS alembic_version CASCADE;"))
 
             db.drop_all()
             db.create_all()
             
             from seed import seed_database
             seed_database()
+            snapshots.save('seed')
             return "✅ Database Wiped, Recreated, and Seeded Successfully!", 200
         except Exception as e:
             return f"❌ Seed Failed: {str(e)}", 500
@@ -0,0 +1,290 @@
+"""Synthetic HomeHub dataset at production-like scale, bulk-loaded (COPY on Postgres, executemany
+elsewhere; never per-row session.add).
+
+    python benchmarks/dataset.py --scale 1       # 100k properties, 200k leases, 200k invoices, 1M notifications
+    DATABASE_URL=postgresql://.../scratch python benchmarks/dataset.py --scale 0.1 --reset
+
+Points at a scratch database: tables are created and filled. Every user's password is BENCH_PASSWORD.
+
+Distributions: property ownership and notification volume are Zipf-like (a few landlords own most
+listings, a few users get most notifications); most tenants hold one lease; activity skews recent
+over two years; ~85% of units are occupied, ~80% of past invoices are paid.
+"""
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PASSWORD = 'bench-password'
+# Accounts a benchmark can log in as: the Zipf head, so the busiest landlord and a tenant with leases
+ACTORS = {
+    'admin': 'admin@bench.homehub.com',
+    'landlord': 'landlord0@bench.homehub.com',
+    'tenant': 'tenant0@bench.homehub.com',
+}
+CHUNK = 10000
+
+# Row counts at --scale 1
+SCALE_1 = {
+    'landlords': 20000,
+    'tenants': 150000,
+    'properties': 100000,
+    'leases': 200000,
+    'invoices': 200000,
+    'maintenance': 60000,
+    'notifications': 1000000,
+}
+OCCUPANCY = 0.85
+CITIES = ['Nairobi'] * 6 + ['Mombasa'] * 2 + ['Kisumu', 'Nakuru', 'Eldoret', 'Thika']
+PROPERTY_STATUSES = (['approved'] * 85) + (['pending'] * 8) + (['Under Review'] * 4) + (['rejected'] * 3)
+PROPERTY_TYPES = ['apartment'] * 6 + ['house'] * 2 + ['studio', 'bedsitter']
+MAINTENANCE_STATUSES = ['pending'] * 3 + ['in_progress'] * 2 + ['resolved'] * 5
+PRIORITIES = ['low'] * 3 + ['medium'] * 5 + ['high'] * 2
+
+
+def counts_for(scale):
+    return {name: max(1, int(n * scale)) for name, n in SCALE_1.items()}
+
+
+class Loader:
+    """Streams dict rows into a table in chunks: COPY ... FROM STDIN on Postgres, executemany otherwise."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.postgres = conn.dialect.name == 'postgresql'
+
+    def load(self, table, rows):
+        total = 0
+        for chunk in iter(lambda: list(itertools.islice(rows, CHUNK)), []):
+            if self.postgres:
+                self._copy(table, chunk)
+            else:
+                self.conn.execute(table.insert(), chunk)
+            total += len(chunk)
+        return total
+
+    def _copy(self, table, chunk):
+        columns = list(chunk[0])
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in chunk:
+            writer.writerow([_csv_value(row[c]) for c in columns])
+        buf.seek(0)
+        raw = self.conn.connection.dbapi_connection # Same connection, so COPY joins the transaction
+        with raw.cursor() as cur:
+            cur.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _csv_value(value):
+    if value is None:
+        return '' # Unquoted empty field is NULL in COPY csv
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+class Zipf:
+    """Pick items with probability ~ 1/rank^s."""
+
+    def __init__(self, items, s, rng):
+        self.items, self.rng = items, rng
+        self.cumulative = list(itertools.accumulate(1 / (rank ** s) for rank in range(1, len(items) + 1)))
+
+    def pick(self):
+        return self.items[bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])]
+
+
+def generate(db, counts, seed=42, progress=print):
+    """Create and fill every table; returns the row counts loaded."""
+    from models import (User, Property, PropertyImage, Unit, Lease, Invoice, Payment,
+                        MaintenanceRequest, Notification)
+    from utils.passwords import hash_password
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    new_id = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def ago(max_days=730):
+        # Recent-skewed: growth means more rows were created lately
+        return now - timedelta(days=max_days * (1 - math.sqrt(rng.random())), seconds=rng.randrange(86400))
+
+    password_hash = hash_password(BENCH_PASSWORD) # Once; every user shares it
+    landlords = [new_id() for _ in range(counts['landlords'])]
+    tenants = [new_id() for _ in range(counts['tenants'])]
+    admin = new_id()
+
+    def users():
+        yield _user(admin, 'admin@bench.homehub.com', 'Bench Admin', 'admin', 'active', password_hash, ago())
+        for i, uid in enumerate(landlords):
+            status = 'active' if i == 0 or rng.random() < 0.95 else 'pending'
+            yield _user(uid, f'landlord{i}@bench.homehub.com', f'Landlord {i}', 'landlord', status, password_hash, ago())
+        for i, uid in enumerate(tenants):
+            yield _user(uid, f'tenant{i}@bench.homehub.com', f'Tenant {i}', 'tenant', 'active', password_hash, ago())
+
+    owners = Zipf(landlords, 1.1, rng)
+    properties = []
+    listed = {} # property id -> created_at, which its units share
+
+    def property_rows():
+        for i in range(counts['properties']):
+            pid, created = new_id(), ago()
+            price = round(rng.lognormvariate(math.log(25000), 0.5), -2)
+            properties.append((pid, price))
+            listed[pid] = created
+            yield {
+                'id': pid, 'landlord_id': owners.pick(), 'name': f'Property {i}',
+                'description': 'Spacious, well-lit, close to amenities.', 'address': f'{rng.randrange(1, 999)} Bench Road',
+                'city': rng.choice(CITIES), 'state': None, 'country': 'Kenya', 'location': None, 'price': price,
+                'bedrooms': rng.choice([0, 1, 1, 2, 2, 3, 4]), 'bathrooms': rng.choice([1, 1, 2, 3]),
+                'square_feet': rng.randrange(300, 3000), 'property_type': rng.choice(PROPERTY_TYPES),
+                'amenities': 'water,parking', 'image_url': f'https://img.bench.homehub.com/{pid}.jpg',
+                'status': rng.choice(PROPERTY_STATUSES), 'created_at': created, 'updated_at': created,
+            }
+
+    def image_rows():
+        for pid, _ in properties:
+            for k in range(rng.choice([0, 1, 2, 3])):
+                yield {'property_id': pid, 'image_url': f'https://img.bench.homehub.com/{pid}-{k}.jpg'}
+
+    # Enough units that `leases` of them are occupied at the target occupancy
+    unit_count = max(counts['leases'], int(counts['leases'] / OCCUPANCY))
+    occupied = []
+
+    def unit_rows():
+        for n in range(unit_count):
+            pid, price = properties[n % len(properties)] if n < len(properties) else rng.choice(properties)
+            uid = new_id()
+            status = 'occupied' if len(occupied) < counts['leases'] and rng.random() < OCCUPANCY * 1.05 else 'vacant'
+            if status == 'occupied':
+                occupied.append((uid, price))
+            yield {'id': uid, 'property_id': pid, 'unit_number': f'U{n}', 'rent_amount': price, 'status': status,
+                   'updated_at': listed[pid]}
+
+    leases = []
+    tenant_picker = Zipf(tenants, 0.3, rng) # Mostly one lease each, some tenants several
+
+    def lease_rows():
+        for unit_id, rent in occupied:
+            lid, tenant, start = new_id(), tenant_picker.pick(), ago(700)
+            leases.append((lid, tenant, unit_id, rent, start))
+            yield {'id': lid, 'unit_id': unit_id, 'tenant_id': tenant, 'start_date': start,
+                   'end_date': start + timedelta(days=365), 'rent_amount': rent, 'status': 'active', 'created_at': start,
+                   'updated_at': start}
+
+    paid = []
+
+    def invoice_rows():
+        for n in range(1, counts['invoices'] + 1):
+            lid, tenant, _, rent, start = leases[rng.randrange(len(leases))]
+            due = start + timedelta(days=30 * rng.randrange(1, 14))
+            status = 'paid' if due < now and rng.random() < 0.8 else 'pending'
+            if status == 'paid':
+                paid.append((n, rent, due))
+            yield {'id': n, 'lease_id': lid, 'tenant_id': tenant, 'amount': rent, 'description': f'Rent {due:%B %Y}',
+                   'due_date': due, 'status': status, 'created_at': due - timedelta(days=7),
+                   'updated_at': due if status == 'paid' else due - timedelta(days=7)}
+
+    def payment_rows():
+        for n, (invoice_id, amount, due) in enumerate(paid):
+            yield {'invoice_id': invoice_id, 'transaction_code': f'BENCH{n:09d}', 'amount': amount,
+                   'phone_number': f'2547{rng.randrange(10 ** 8):08d}', 'payment_date': due - timedelta(days=rng.randrange(5))}
+
+    def maintenance_rows():
+        for _ in range(counts['maintenance']):
+            _, tenant, unit_id, _, start = leases[rng.randrange(len(leases))]
+            created = start + timedelta(days=rng.randrange(1, 360))
+            status = rng.choice(MAINTENANCE_STATUSES)
+            ack = rng.randrange(600, 3 * 86400) if status != 'pending' else None
+            resolution = ack + rng.randrange(3600, 10 * 86400) if status == 'resolved' else None
+            yield {'id': new_id(), 'unit_id': unit_id, 'tenant_id': tenant, 'title': 'Leaking tap',
+                   'description': 'Kitchen tap has been leaking for two days.', 'priority': rng.choice(PRIORITIES),
+                   'status': status, 'created_at': created,
+                   'status_changed_at': created + timedelta(seconds=resolution or ack or 0) if ack else None,
+                   'acknowledged_at': created + timedelta(seconds=ack) if ack else None,
+                   'resolved_at': created + timedelta(seconds=resolution) if resolution else None,
+                   'ack_seconds': ack, 'resolution_seconds': resolution,
+                   'updated_at': created + timedelta(seconds=resolution or ack or 0)}
+
+    recipients = Zipf(landlords + tenants, 0.8, rng)
+
+    def notification_rows():
+        for _ in range(counts['notifications']):
+            created = ago(365)
+            read = rng.random() < (0.95 if (now - created).days > 14 else 0.4)
+            yield {'user_id': recipients.pick(), 'message': 'Your rent invoice is ready.', 'is_read': read,
+                   'created_at': created, 'updated_at': created}
+
+    loaded = {}
+    with db.engine.begin() as conn:
+        loader = Loader(conn)
+        for model, rows in [(User, users()), (Property, property_rows()), (PropertyImage, image_rows()),
+                            (Unit, unit_rows()), (Lease, lease_rows()), (Invoice, invoice_rows()),
+                            (Payment, payment_rows()), (MaintenanceRequest, maintenance_rows()),
+                            (Notification, notification_rows())]:
+            start = time.perf_counter()
+            loaded[model.__tablename__] = loader.load(model.__table__, rows)
+            progress(f"  {model.__tablename__:<22}{loaded[model.__tablename__]:>10} rows  {time.perf_counter() - start:6.1f}s")
+
+        # Bulk inserts skip the ORM events that keep these in step
+        conn.exec_driver_sql(
+            "UPDATE users SET unread_notifications = (SELECT COUNT(*) FROM notifications "
+            "WHERE notifications.user_id = users.id AND notifications.is_read = false)")
+        if loader.postgres:
+            conn.exec_driver_sql("SELECT setval(pg_get_serial_sequence('invoices', 'id'), (SELECT max(id) FROM invoices))")
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('ANALYZE')
+        conn.commit()
+    return loaded
+
+
+def _user(uid, email, name, role, status, password_hash, created):
+    return {'id': uid, 'email': email, 'password_hash': password_hash, 'full_name': name, 'role': role,
+            'phone_number': None, 'status': status, 'created_at': created, 'updated_at': created,
+            'unread_notifications': 0, 'token_version': 0}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=0.1, help='1.0 = 100k properties, 1M notifications')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--snapshot', help='save the result as this snapshot (flask snapshot restore NAME)')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'dataset.db')}")
+    from app import create_app
+    from extensions import db
+    from models import User
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if User.query.first():
+            sys.exit("Database already has users; use --reset on a scratch database.")
+        print(f"Generating scale {args.scale} into {db.engine.url.render_as_string(hide_password=True)}")
+        start = time.perf_counter()
+        loaded = generate(db, counts_for(args.scale), seed=args.seed)
+        print(f"{sum(loaded.values())} rows in {time.perf_counter() - start:.1f}s; password for every user: {BENCH_PASSWORD}")
+        if args.snapshot:
+            from utils import snapshots
+            snapshots.save(args.snapshot)
+            print(f"Saved snapshot {args.snapshot}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Login throughput under concurrency, and what a login burst does to a cheap endpoint's latency.
+
+    python benchmarks/login_throughput.py --concurrency 32 --logins 256 --hash-workers 2
+    python benchmarks/login_throughput.py --method pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000 if values else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=128)
+    parser.add_argument('--hash-workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    from app import create_app
+    from extensions import db
+    from models import User
+
+    app = create_app()
+    app.config.update(PASSWORD_HASH_METHOD=args.method, PASSWORD_HASH_WORKERS=args.hash_workers,
+                      PASSWORD_HASH_QUEUE=args.concurrency, PASSWORD_HASH_TIMEOUT=60,
+                      RATELIMIT_ENABLED=False)
+
+    with app.app_context():
+        db.create_all()
+        users = []
+        for i in range(args.concurrency):
+            u = User(email=f'bench{i}@homehub.com', full_name=f'Bench {i}', role='tenant', status='active')
+            u.set_password('password123')
+            users.append(u)
+        db.session.add_all(users)
+        db.session.commit()
+
+    client = app.test_client()
+    login_times, probe_times, statuses = [], [], {}
+    done = threading.Event()
+
+    def login(i):
+        t = time.perf_counter()
+        r = client.post('/api/auth/login', json={'email': f'bench{i % args.concurrency}@homehub.com', 'password': 'password123'})
+        login_times.append(time.perf_counter() - t)
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    def probe():
+        # A cheap read running alongside the burst, standing in for everyone else's traffic
+        while not done.is_set():
+            t = time.perf_counter()
+            client.get('/api/properties')
+            probe_times.append(time.perf_counter() - t)
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    print(f"method={args.method} hash_workers={args.hash_workers} concurrency={args.concurrency}")
+    print(f"logins: {args.logins} in {elapsed:.2f}s = {args.logins / elapsed:.1f}/s  statuses={statuses}")
+    print(f"login latency ms: p50={pct(login_times, 0.5):.1f} p95={pct(login_times, 0.95):.1f} p99={pct(login_times, 0.99):.1f}")
+    print(f"probe GET /api/properties ms during burst: p50={pct(probe_times, 0.5):.1f} "
+          f"p95={pct(probe_times, 0.95):.1f} max={max(probe_times) * 1000 if probe_times else 0:.1f} (n={len(probe_times)})")
+    if probe_times:
+        print(f"probe mean ms: {statistics.mean(probe_times) * 1000:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Per-request cost of the /metrics request hooks: the same trivial route with metrics on and off.
+
+    python benchmarks/metrics_overhead.py --requests 20000
+    python benchmarks/metrics_overhead.py --multiprocess     # mmap-file store, as under gunicorn
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(client, path, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(path)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--multiprocess', action='store_true')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'metrics.db')}"
+    if args.multiprocess:
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp() # Before prometheus_client is imported
+    from app import create_app
+
+    clients = {}
+    for enabled in (False, True):
+        os.environ['METRICS_ENABLED'] = str(enabled).lower()
+        clients[enabled] = create_app().test_client()
+        timed(clients[enabled], '/', 200) # Warm up
+
+    # Alternate rounds so drift in the process (GC, heap growth) hits both sides equally
+    samples = {False: [], True: []}
+    for _ in range(args.rounds):
+        for enabled, client in clients.items():
+            samples[enabled].append(timed(client, '/', args.requests))
+    results = {enabled: statistics.median(values) for enabled, values in samples.items()}
+
+    off, on = results[False] * 1e6, results[True] * 1e6
+    print(f"store={'multiprocess' if args.multiprocess else 'in-process'} requests={args.requests} x {args.rounds}")
+    print(f"metrics off: {off:.1f} us/request")
+    print(f"metrics on:  {on:.1f} us/request")
+    print(f"overhead:    {on - off:.1f} us/request ({(on - off) / off * 100:.1f}%)")
+
+    started = time.perf_counter()
+    body = clients[True].get('/metrics').get_data()
+    print(f"/metrics scrape: {(time.perf_counter() - started) * 1000:.1f} ms, {len(body)} bytes")
+
+
+if __name__ == '__main__':
+    main()
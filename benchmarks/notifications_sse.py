@@ -0,0 +1,113 @@
+"""Read queries per minute: clients polling GET /api/users/notifications vs holding an SSE stream.
+
+    python benchmarks/notifications_sse.py --clients 50 --poll-interval 5 --new-per-minute 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='seconds between polls')
+    parser.add_argument('--history', type=int, default=200, help='existing notifications per user')
+    parser.add_argument('--new-per-minute', type=int, default=20, help='notifications created per minute (all users)')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from app import create_app
+    from extensions import db
+    from models import User, Notification
+    from utils import pubsub
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    app.config['NOTIFICATION_PUBSUB'] = 'memory'
+    app.config['SSE_KEEPALIVE_SECONDS'] = 0.01
+    pubsub.broker.max_streams = None # One process standing in for as many workers as it takes
+
+    with app.app_context():
+        db.create_all()
+        users = [User(email=f'bench{i}@homehub.com', full_name=f'Bench {i}', role='tenant',
+                      status='active', password_hash='x') for i in range(args.clients)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.execute(Notification.__table__.insert(), [
+            {'user_id': u.id, 'message': f'History {n}', 'is_read': False}
+            for u in users for n in range(args.history)
+        ])
+        db.session.commit()
+        ids = [u.id for u in users]
+        tokens = [create_access_token(identity=uid) for uid in ids]
+
+        counter = {'n': 0}
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count(*_):
+            counter['n'] += 1
+
+    client = app.test_client()
+
+    # --- Polling: every client hits the feed every poll-interval for one minute ---
+    polls = int(60 / args.poll_interval)
+    counter['n'] = 0
+    for _ in range(polls):
+        for tok in tokens:
+            client.get('/api/users/notifications', headers={'Authorization': f'Bearer {tok}'})
+    polling_queries = counter['n']
+
+    # --- SSE: every client connects once (own thread, like a gunicorn gthread worker), then rows are pushed ---
+    counter['n'] = 0
+    connected = threading.Barrier(len(tokens) + 1)
+    inserted = threading.Event()
+    delivered = []
+
+    def listen(tok):
+        res = client.get(f'/api/users/notifications/stream?jwt={tok}', buffered=False)
+        it = iter(res.response)
+        next(it) # retry: header
+        connected.wait()
+        got = 0
+        for chunk in it:
+            if chunk.startswith(b': keep-alive'):
+                if inserted.is_set():
+                    break
+                continue
+            got += 1
+        delivered.append(got)
+        res.close()
+
+    threads = [threading.Thread(target=listen, args=(tok,)) for tok in tokens]
+    for t in threads:
+        t.start()
+    connected.wait()
+    connect_queries = counter['n']
+
+    with app.app_context():
+        for n in range(args.new_per_minute):
+            db.session.add(Notification(user_id=ids[n % len(ids)], message=f'New {n}'))
+            db.session.commit()
+    writes = counter['n'] - connect_queries
+    inserted.set()
+    for t in threads:
+        t.join()
+    sse_queries = counter['n'] - writes
+    delivered = sum(delivered)
+
+    print(f"clients={args.clients} poll_interval={args.poll_interval}s history/user={args.history}")
+    print(f"polling: {polling_queries} read queries/min ({polls} polls per client)")
+    print(f"sse:     {sse_queries} read queries/min (connect={connect_queries}, {delivered} events pushed)")
+    print(f"subscribers left open: {pubsub.broker.subscriber_count()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Query-plan regression check: EXPLAIN every query the read endpoints issue against a large
+synthetic dataset and fail if any of them falls back to a full table scan.
+
+    python benchmarks/query_plans.py                      # temp SQLite database
+    DATABASE_URL=postgresql://.../scratch python benchmarks/query_plans.py --scale 0.1
+
+Points at a scratch database: tables are created and filled with benchmarks/dataset.py's generator.
+Exits 1 when a scan is found.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tables that are meant to be read whole
+ALLOWED_SCANS = {'platform_stats'}
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def capture(engine):
+    statements = []
+
+    def _collect(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH')):
+            statements.append((statement, parameters))
+    return statements, _collect
+
+
+def scans(conn, dialect, statement, parameters, tables):
+    """Tables (of `tables`) the statement reads whole, and its plan.
+
+    Only real tables count: SQLite also reports SCAN for subqueries it materializes (anon_1, ...).
+    """
+    if dialect == 'sqlite':
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        plan = [r[-1] for r in rows]
+        found = [m.group(1) for line in plan for m in [SQLITE_SCAN.match(line)] if m]
+    else:
+        plan = [r[0] for r in conn.exec_driver_sql('EXPLAIN ' + statement, parameters).all()]
+        found = [m.group(1) for line in plan for m in [POSTGRES_SCAN.search(line)] if m]
+    return [t for t in found if t in tables and t not in ALLOWED_SCANS], plan
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=0.05, help='dataset size, see benchmarks/dataset.py')
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not just failures')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}")
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from app import create_app
+    from extensions import db
+    from models import User, Property, Lease, Invoice
+    from utils.auth import token_claims
+    from utils.sync import encode_token
+    from dataset import ACTORS, counts_for, generate
+
+    app = create_app()
+    app.config.update(RATELIMIT_ENABLED=False)
+
+    with app.app_context():
+        db.create_all()
+        print("Loading synthetic dataset...")
+        generate(db, counts_for(args.scale))
+        users = {role: User.query.filter_by(email=email).one() for role, email in ACTORS.items()}
+        landlord_id, tenant_id, admin_id = users['landlord'].id, users['tenant'].id, users['admin'].id
+        property_id = db.session.query(Property.id).filter_by(landlord_id=landlord_id).limit(1).scalar()
+        lease_id = db.session.query(Lease.id).filter_by(tenant_id=tenant_id).limit(1).scalar()
+        invoice_id = db.session.query(Invoice.id).filter_by(tenant_id=tenant_id).limit(1).scalar()
+        tokens = {u.id: create_access_token(identity=u.id, additional_claims=token_claims(u)) for u in users.values()}
+        engine, dialect = db.engine, db.engine.dialect.name
+        since = encode_token(datetime.utcnow() - timedelta(days=1))
+
+    as_ = lambda uid: {'Authorization': f'Bearer {tokens[uid]}'}
+    checks = [
+        ('GET', '/api/properties/', {}),
+        ('GET', f'/api/properties/{property_id}', {}),
+        ('GET', f'/api/properties/{property_id}?expand=landlord,units', {}),
+        ('GET', '/api/properties/my-properties', as_(landlord_id)),
+        ('GET', f'/api/properties/landlord/{landlord_id}', as_(landlord_id)),
+        ('GET', '/api/leases', as_(landlord_id)),
+        ('GET', '/api/leases', as_(tenant_id)),
+        ('GET', '/api/maintenance', as_(landlord_id)),
+        ('GET', '/api/maintenance', as_(tenant_id)),
+        ('GET', '/api/maintenance/stats', as_(landlord_id)),
+        ('GET', '/api/payments/my-invoices', as_(tenant_id)),
+        ('GET', f'/api/leases/{lease_id}', as_(tenant_id)),
+        ('GET', f'/api/payments/invoices/{invoice_id}', as_(tenant_id)),
+        ('GET', '/api/notifications', as_(tenant_id)),
+        ('GET', f'/api/leases?since={since}', as_(landlord_id)),
+        ('GET', f'/api/leases?since={since}', as_(tenant_id)),
+        ('GET', f'/api/maintenance?since={since}', as_(landlord_id)),
+        ('GET', f'/api/maintenance?since={since}', as_(tenant_id)),
+        ('GET', f'/api/payments/my-invoices?since={since}', as_(tenant_id)),
+        ('GET', f'/api/notifications?since={since}', as_(tenant_id)),
+        ('GET', '/api/notifications/unread', as_(tenant_id)),
+        ('GET', '/api/users/profile', as_(tenant_id)),
+        ('GET', '/api/auth/me', as_(tenant_id)),
+        ('GET', '/api/admin/landlords/pending', as_(admin_id)),
+        ('GET', '/api/admin/properties/pending', as_(admin_id)),
+    ]
+
+    client = app.test_client()
+    failures = 0
+    for method, path, headers in checks:
+        statements, listener = capture(engine)
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            status = client.open(path, method=method, headers=headers).status_code
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        seen, bad = set(), []
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                tables, plan = scans(conn, dialect, statement, parameters, db.metadata.tables)
+                if tables or args.verbose:
+                    bad.append((tables, statement, plan))
+        failing = [b for b in bad if b[0]]
+        failures += len(failing)
+        print(f"{'FAIL' if failing else 'ok  '} {method} {path} [{status}] {len(statements)} queries, {len(seen)} distinct")
+        for tables, statement, plan in bad:
+            print(f"    {'scan of ' + ', '.join(tables) if tables else 'plan'}: {' '.join(statement.split())[:200]}")
+            for line in plan:
+                print(f"        {line}")
+
+    print(f"\n{failures} statement(s) with a full table scan" if failures else "\nNo full table scans.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Serializing 10k Property and Lease rows: ORM objects + to_dict() + stdlib JSON (before) against
+row serializers + the orjson provider (after), and the JSON encoders alone on identical data.
+
+    python benchmarks/serialization.py --rows 10000 --rounds 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def best_of(fn, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'serialization.db')}")
+    from flask.json.provider import DefaultJSONProvider
+    from app import create_app
+    from extensions import db
+    from models import Property, Lease, User
+    from utils import json_provider
+    from utils.json_provider import FastJSONProvider
+    from utils.serializers import PROPERTY, LEASE
+    from dataset import counts_for, generate
+
+    app = create_app()
+    stdlib, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+
+    def before_properties():
+        rows = Property.query.limit(args.rows).all()
+        return stdlib.dumps([p.to_dict() for p in rows])
+
+    def before_leases():
+        # What the lease list did: to_dict() walks unit.property, plus a tenant lookup per row
+        out = []
+        for lease in Lease.query.order_by(Lease.created_at.desc()).limit(args.rows).all():
+            data = lease.to_dict()
+            tenant = db.session.get(User, lease.tenant_id)
+            data.update(tenant_name=tenant.full_name, tenant_email=tenant.email, tenant_phone=tenant.phone_number)
+            out.append(data)
+        return stdlib.dumps(out)
+
+    def after_properties():
+        return fast.dumps(PROPERTY.all(PROPERTY.query().limit(args.rows)))
+
+    def after_leases():
+        return fast.dumps(LEASE.all(LEASE.query().order_by(Lease.created_at.desc()).limit(args.rows)))
+
+    with app.app_context():
+        db.create_all()
+        print("Loading synthetic dataset...")
+        generate(db, dict(counts_for(0.05), properties=args.rows, leases=args.rows, notifications=1000),
+                 progress=lambda line: None)
+
+        print(f"orjson: {'yes' if json_provider.orjson else 'no (stdlib fallback)'}; "
+              f"{args.rows} rows, best/median of {args.rounds}\n")
+        print(f"{'':<36}{'before ms':>20}{'after ms':>20}{'speedup':>10}")
+        for name, before, after in [('Property list', before_properties, after_properties),
+                                    ('Lease list', before_leases, after_leases)]:
+            results = []
+            for fn in (before, after):
+                fn() # Warm up
+                db.session.remove() # Each round starts with an empty identity map, as a request does
+                results.append(best_of(lambda: (fn(), db.session.remove()), args.rounds))
+            (b_best, b_median), (a_best, a_median) = results
+            print(f"{name + ' (query + serialize)':<36}{b_best * 1000:>10.1f}/{b_median * 1000:<9.1f}"
+                  f"{a_best * 1000:>10.1f}/{a_median * 1000:<9.1f}{b_best / a_best:>9.1f}x")
+
+        # Encoders alone, same dicts
+        payload = PROPERTY.all(PROPERTY.query().limit(args.rows))
+        b_best, b_median = best_of(lambda: stdlib.dumps(payload), args.rounds)
+        a_best, a_median = best_of(lambda: fast.dumps(payload), args.rounds)
+        print(f"{'Property JSON encode only':<36}{b_best * 1000:>10.1f}/{b_median * 1000:<9.1f}"
+              f"{a_best * 1000:>10.1f}/{a_median * 1000:<9.1f}{b_best / a_best:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""Benchmark suite over the synthetic dataset: throughput and p50/p95/p99 per scenario, saved as JSON and
+compared against an earlier run.
+
+    python benchmarks/suite.py --scale 0.1                          # SQLite in the temp dir, in-process client
+    python benchmarks/suite.py --compare latest --fail-on-regression
+    DATABASE_URL=postgresql://.../scratch python benchmarks/suite.py --base-url http://localhost:8000
+
+With --base-url the server must use the same DATABASE_URL and run with RATELIMIT_ENABLED=false.
+The dataset for a scale is generated once (benchmarks/dataset.py) and saved as snapshot
+bench-<scale>; every later run restores it first, so runs start from identical data.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+METRICS = ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000 if values else 0
+
+
+class InProcess:
+    """Flask test client with the requests-style calls the scenarios use."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path, headers=None):
+        return self.client.get(path, headers=headers).status_code
+
+    def post(self, path, body, headers=None):
+        response = self.client.post(path, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class Remote:
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.local = threading.local() # One keep-alive session per worker thread
+        self.requests = requests
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = self.requests.Session()
+        return self.local.session
+
+    def get(self, path, headers=None):
+        return self._session().get(self.base_url + path, headers=headers).status_code
+
+    def post(self, path, body, headers=None):
+        response = self._session().post(self.base_url + path, json=body, headers=headers)
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+def login(client, email, password):
+    status, body = client.post('/api/auth/login', {'email': email, 'password': password})
+    if status != 200:
+        sys.exit(f"Login as {email} failed ({status}); is rate limiting off on the server?")
+    return {'Authorization': f"Bearer {body['access_token']}"}
+
+
+def callback_payload(amount, receipt):
+    return {'Body': {'stkCallback': {'ResultCode': 0, 'CallbackMetadata': {'Item': [
+        {'Name': 'Amount', 'Value': amount},
+        {'Name': 'MpesaReceiptNumber', 'Value': receipt},
+        {'Name': 'PhoneNumber', 'Value': 254700000000},
+    ]}}}}
+
+
+def scenarios(client, headers, tenant_emails, pending_amounts, password):
+    """name -> function(i) returning the status code of one request."""
+    run = uuid.uuid4().hex[:8].upper() # Receipts must be unique across runs too
+    return {
+        'marketplace': lambda i: client.get('/api/properties/'),
+        'lease_feed': lambda i: client.get('/api/leases', headers['landlord']),
+        'maintenance_feed': lambda i: client.get('/api/maintenance', headers['landlord']),
+        'notifications': lambda i: client.get('/api/notifications', headers['tenant']),
+        'login': lambda i: client.post('/api/auth/login', {
+            'email': tenant_emails[i % len(tenant_emails)], 'password': password})[0],
+        'callback': lambda i: client.post('/api/payments/callback', callback_payload(
+            pending_amounts[i % len(pending_amounts)], f'BN{run}{i:08d}'))[0],
+    }
+
+
+def measure(fn, requests, concurrency, warmup):
+    for i in range(warmup):
+        fn(-1 - i)
+    latencies, statuses = [], {}
+
+    def one(i):
+        start = time.perf_counter()
+        status = fn(i)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': requests,
+        'throughput': round(requests / elapsed, 2),
+        'p50_ms': round(pct(latencies, 0.5), 2),
+        'p95_ms': round(pct(latencies, 0.95), 2),
+        'p99_ms': round(pct(latencies, 0.99), 2),
+        'errors': sum(n for status, n in statuses.items() if status >= 400),
+        'statuses': {str(status): n for status, n in sorted(statuses.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_result(compare, exclude):
+    if compare != 'latest':
+        return compare
+    names = sorted(n for n in os.listdir(RESULTS_DIR) if n.endswith('.json')) if os.path.isdir(RESULTS_DIR) else []
+    names = [n for n in names if os.path.join(RESULTS_DIR, n) != exclude]
+    return os.path.join(RESULTS_DIR, names[-1]) if names else None
+
+
+def compare(current, baseline, threshold):
+    """Print per-scenario deltas; returns the regressions (slower latency or lower throughput beyond threshold)."""
+    if baseline['meta'].get('scale') != current['meta'].get('scale') or \
+            baseline['meta'].get('dialect') != current['meta'].get('dialect'):
+        print(f"warning: baseline is scale {baseline['meta'].get('scale')} on {baseline['meta'].get('dialect')}; "
+              f"numbers are not directly comparable")
+    regressions = []
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('created_at')}), threshold {threshold:.0%}")
+    for name, now in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before:
+            continue
+        cells = []
+        for metric in METRICS:
+            old, new = before[metric], now[metric]
+            change = (new - old) / old if old else 0
+            worse = change < -threshold if metric == 'throughput' else change > threshold
+            if worse:
+                regressions.append(f"{name} {metric} {old} -> {new}")
+            cells.append(f"{metric}={change:+.0%}{'!' if worse else ''}")
+        print(f"  {name:<18}{'  '.join(cells)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=0.1, help='dataset size, see benchmarks/dataset.py')
+    parser.add_argument('--base-url', help='benchmark a running server instead of the in-process app')
+    parser.add_argument('--requests', type=int, default=200, help='per scenario')
+    parser.add_argument('--login-requests', type=int, default=64, help='logins are deliberately slow (password hashing)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', nargs='+', help='run just these scenarios')
+    parser.add_argument('--output', help=f'result file (default: a new file in {RESULTS_DIR})')
+    parser.add_argument('--compare', help="earlier result file, or 'latest'")
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    # Stable path, so the generated dataset and its snapshot survive between runs
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'homehub-bench.db')}")
+    os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+    from app import create_app
+    from extensions import db
+    from models import User, Invoice
+    from utils import snapshots
+    from dataset import ACTORS, BENCH_PASSWORD, counts_for, generate
+
+    app = create_app()
+    with app.app_context():
+        snapshot = f'bench-{args.scale:g}'
+        started = time.perf_counter()
+        if snapshots.restore(snapshot):
+            print(f"Restored snapshot {snapshot} in {time.perf_counter() - started:.2f}s")
+        else:
+            print(f"Generating scale {args.scale} dataset (once; saved as snapshot {snapshot})...")
+            db.drop_all()
+            db.create_all()
+            generate(db, counts_for(args.scale))
+            snapshots.save(snapshot)
+        tenant_emails = [email for (email,) in db.session.query(User.email).filter_by(role='tenant')
+                         .order_by(User.created_at.desc()).limit(args.login_requests)]
+        pending_amounts = [amount for (amount,) in db.session.query(Invoice.amount)
+                           .filter_by(status='pending').limit(1000)] or [1]
+        dialect = db.engine.dialect.name
+
+    client = Remote(args.base_url) if args.base_url else InProcess(app)
+    headers = {role: login(client, email, BENCH_PASSWORD) for role, email in ACTORS.items()}
+    suite = scenarios(client, headers, tenant_emails, pending_amounts, BENCH_PASSWORD)
+    names = args.only or list(suite)
+
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'scale': args.scale,
+            'dialect': dialect,
+            'target': args.base_url or 'in-process',
+            'concurrency': args.concurrency,
+            'python': platform.python_version(),
+        },
+        'scenarios': {},
+    }
+    print(f"{'scenario':<18}{'req':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name in names:
+        requests = args.login_requests if name == 'login' else args.requests
+        stats = measure(suite[name], requests, args.concurrency, args.warmup)
+        result['scenarios'][name] = stats
+        print(f"{name:<18}{requests:>6}{stats['throughput']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['errors']:>8}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}-{result['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        baseline_path = previous_result(args.compare, output)
+        if not baseline_path:
+            print("No earlier result to compare against.")
+            return
+        with open(baseline_path) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
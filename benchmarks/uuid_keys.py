@@ -0,0 +1,107 @@
+"""Index size and join speed: VARCHAR(36) UUID keys vs the native GUID type, with uuid4 and uuid7.
+
+    python benchmarks/uuid_keys.py --parents 50000 --children 4
+    DATABASE_URL=postgresql://.../scratch python benchmarks/uuid_keys.py
+
+Creates and drops its own uuidbench_* tables.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from utils.ids import GUID, uuid7
+
+VARIANTS = [
+    ('varchar36_v4', lambda: sa.String(36), lambda: str(uuid.uuid4())),
+    ('guid_v4', GUID, lambda: str(uuid.uuid4())),
+    ('guid_v7', GUID, lambda: str(uuid7())),
+]
+
+
+def index_bytes(conn, tables):
+    if conn.dialect.name == 'sqlite':
+        placeholders = ', '.join(f"'{t}'" for t in tables)
+        return conn.exec_driver_sql(
+            f"SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name IN "
+            f"(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name IN ({placeholders}))").scalar()
+    return sum(conn.exec_driver_sql(
+        f"SELECT coalesce(sum(pg_relation_size(indexrelid)), 0) FROM pg_index WHERE indrelid = '{t}'::regclass").scalar()
+        for t in tables)
+
+
+def run(engine, name, key_type, make_id, args):
+    metadata = sa.MetaData()
+    parents = sa.Table(f'uuidbench_{name}_parents', metadata,
+                       sa.Column('id', key_type(), primary_key=True),
+                       sa.Column('name', sa.String(50)))
+    children = sa.Table(f'uuidbench_{name}_children', metadata,
+                        sa.Column('id', key_type(), primary_key=True),
+                        sa.Column('parent_id', key_type(), sa.ForeignKey(parents.c.id), nullable=False, index=True),
+                        sa.Column('amount', sa.Float))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    parent_ids = [make_id() for _ in range(args.parents)]
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for i in range(0, len(parent_ids), 2000):
+            conn.execute(parents.insert(), [{'id': p, 'name': 'x'} for p in parent_ids[i:i + 2000]])
+        rows = [{'id': make_id(), 'parent_id': random.choice(parent_ids), 'amount': 1.0}
+                for _ in range(args.parents * args.children)]
+        for i in range(0, len(rows), 2000):
+            conn.execute(children.insert(), rows[i:i + 2000])
+    insert_s = time.perf_counter() - start
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+        size = index_bytes(conn, [parents.name, children.name])
+
+    lookup = sa.select(sa.func.count()).select_from(children.join(parents))\
+        .where(parents.c.id.in_(sa.bindparam('ids', expanding=True)))
+    full = sa.select(sa.func.sum(children.c.amount)).select_from(children.join(parents))
+    probe_times, full_times = [], []
+    with engine.connect() as conn:
+        for _ in range(args.repeat):
+            ids = random.sample(parent_ids, 100)
+            t = time.perf_counter()
+            conn.execute(lookup, {'ids': ids}).scalar()
+            probe_times.append(time.perf_counter() - t)
+        for _ in range(max(1, args.repeat // 20)):
+            t = time.perf_counter()
+            conn.execute(full).scalar()
+            full_times.append(time.perf_counter() - t)
+
+    if not args.keep:
+        metadata.drop_all(engine)
+    return insert_s, size, statistics.median(probe_times), statistics.median(full_times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--parents', type=int, default=20000)
+    parser.add_argument('--children', type=int, default=4, help='child rows per parent')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--keep', action='store_true', help='leave the tables behind for inspection')
+    args = parser.parse_args()
+
+    url = os.getenv('DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'uuid.db')}"
+    engine = sa.create_engine(url)
+    random.seed(7)
+
+    print(f"{engine.dialect.name}: {args.parents} parents, {args.parents * args.children} children")
+    print(f"{'variant':<14}{'insert s':>10}{'index MB':>10}{'100-id join ms':>16}{'full join ms':>14}")
+    for name, key_type, make_id in VARIANTS:
+        insert_s, size, probe, full = run(engine, name, key_type, make_id, args)
+        print(f"{name:<14}{insert_s:>10.2f}{size / 1e6:>10.2f}{probe * 1000:>16.2f}{full * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
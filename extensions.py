@@ -1,5 +1,6 @@
 # backend/extensions.py
 from flask_sqlalchemy import SQLAlchemy
+from utils.replica import RoutingSession
 
 # Initialize db here, without the app
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
\ No newline at end of file
@@ -0,0 +1,19 @@
+# gunicorn loads ./gunicorn.conf.py automatically; Procfile and start.sh flags still apply.
+# SSE streams each hold one of the --threads per worker; SSE_MAX_STREAMS (app.py) caps them below it.
+import os
+import shutil
+
+# Prometheus multiprocess mode (see utils/metrics.py). Must be set before workers import the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/homehub-metrics')
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be summed into this one
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
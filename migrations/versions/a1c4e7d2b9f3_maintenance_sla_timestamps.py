@@ -0,0 +1,34 @@
+"""Maintenance SLA timestamps
+
+Revision ID: a1c4e7d2b9f3
+Revises: c2f6267e55e9
+Create Date: 2026-10-19 09:12:44.318202
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e7d2b9f3'
+down_revision = 'c2f6267e55e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status_changed_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('acknowledged_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('resolved_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('ack_seconds', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('resolution_seconds', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('maintenance_requests', schema=None) as batch_op:
+        batch_op.drop_column('resolution_seconds')
+        batch_op.drop_column('ack_seconds')
+        batch_op.drop_column('resolved_at')
+        batch_op.drop_column('acknowledged_at')
+        batch_op.drop_column('status_changed_at')
@@ -0,0 +1,27 @@
+"""updated_at heartbeat on account deletion jobs, so interrupted purges can be resumed
+
+Revision ID: a3f9c6e1b8d4
+Revises: e7b1c5a9d3f2
+Create Date: 2026-10-19 21:14:52.601733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c6e1b8d4'
+down_revision = 'e7b1c5a9d3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('account_deletion_jobs', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Existing jobs last made progress no later than they finished (or were created)
+    op.execute('UPDATE account_deletion_jobs SET updated_at = COALESCE(finished_at, created_at, CURRENT_TIMESTAMP)')
+
+
+def downgrade():
+    with op.batch_alter_table('account_deletion_jobs', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
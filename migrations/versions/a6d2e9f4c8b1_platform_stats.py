@@ -0,0 +1,29 @@
+"""Platform stats snapshot
+
+Revision ID: a6d2e9f4c8b1
+Revises: f5c1d8e3b7a4
+Create Date: 2026-10-19 16:22:05.773918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2e9f4c8b1'
+down_revision = 'f5c1d8e3b7a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('platform_stats',
+    sa.Column('section', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('section')
+    )
+
+
+def downgrade():
+    op.drop_table('platform_stats')
@@ -0,0 +1,54 @@
+"""SQLite: declare GUID columns BLOB where an earlier c9f4a2d8e6b3 left VARCHAR(36)
+
+Revision ID: b6d2e8f4a1c7
+Revises: a3f9c6e1b8d4
+Create Date: 2026-10-19 21:42:06.118930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2e8f4a1c7'
+down_revision = 'a3f9c6e1b8d4'
+branch_labels = None
+depends_on = None
+
+# Same columns as c9f4a2d8e6b3. Its first version converted the stored values but not the declared
+# types, so `flask db check` saw every one as VARCHAR(36) -> GUID drift. It now does both; this
+# brings databases that already ran the old version in line. Nothing to do on Postgres.
+UUID_COLUMNS = {
+    'users': ['id'],
+    'properties': ['id', 'landlord_id'],
+    'property_images': ['property_id'],
+    'units': ['id', 'property_id'],
+    'leases': ['id', 'unit_id', 'tenant_id'],
+    'notifications': ['user_id'],
+    'notifications_archive': ['user_id'],
+    'maintenance_requests': ['id', 'unit_id', 'tenant_id'],
+    'maintenance_attachments': ['request_id'],
+    'account_deletion_jobs': ['id', 'user_id'],
+    'invoices': ['lease_id', 'tenant_id'],
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table, columns in UUID_COLUMNS.items():
+        if table not in tables:
+            continue
+        declared = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        stale = [c for c in columns if c in declared and not isinstance(declared[c], sa.LargeBinary)]
+        if stale:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                for column in stale:
+                    batch_op.alter_column(column, type_=sa.LargeBinary(16))
+
+
+def downgrade():
+    pass # c9f4a2d8e6b3's downgrade turns the columns back into VARCHAR(36)
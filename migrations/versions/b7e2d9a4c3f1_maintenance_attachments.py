@@ -0,0 +1,35 @@
+"""Maintenance attachments
+
+Revision ID: b7e2d9a4c3f1
+Revises: a1c4e7d2b9f3
+Create Date: 2026-10-19 10:03:17.552940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d9a4c3f1'
+down_revision = 'a1c4e7d2b9f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('maintenance_attachments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('request_id', sa.String(length=36), nullable=False),
+    sa.Column('storage_key', sa.String(length=255), nullable=False),
+    sa.Column('image_url', sa.String(length=255), nullable=False),
+    sa.Column('thumbnail_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['request_id'], ['maintenance_requests.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_maintenance_attachments_request_id', 'maintenance_attachments', ['request_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_maintenance_attachments_request_id', table_name='maintenance_attachments')
+    op.drop_table('maintenance_attachments')
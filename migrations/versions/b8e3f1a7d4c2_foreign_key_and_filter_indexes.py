@@ -0,0 +1,43 @@
+"""Indexes for foreign keys and hot filters
+
+Revision ID: b8e3f1a7d4c2
+Revises: a6d2e9f4c8b1
+Create Date: 2026-10-19 17:04:51.226310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e3f1a7d4c2'
+down_revision = 'a6d2e9f4c8b1'
+branch_labels = None
+depends_on = None
+
+# notifications.user_id is already covered by ix_notifications_user_id_created_at (c3f8a1e6d5b2)
+INDEXES = [
+    ('ix_users_role_status_created_at', 'users', ['role', 'status', 'created_at']),
+    ('ix_properties_landlord_id', 'properties', ['landlord_id']),
+    ('ix_properties_status_created_at', 'properties', ['status', 'created_at']),
+    ('ix_property_images_property_id', 'property_images', ['property_id']),
+    ('ix_units_property_id_status', 'units', ['property_id', 'status']),
+    ('ix_leases_tenant_id_created_at', 'leases', ['tenant_id', 'created_at']),
+    ('ix_leases_unit_id', 'leases', ['unit_id']),
+    ('ix_maintenance_requests_tenant_id_created_at', 'maintenance_requests', ['tenant_id', 'created_at']),
+    ('ix_maintenance_requests_unit_id', 'maintenance_requests', ['unit_id']),
+    ('ix_invoices_tenant_id_created_at', 'invoices', ['tenant_id', 'created_at']),
+    ('ix_invoices_lease_id', 'invoices', ['lease_id']),
+    ('ix_invoices_status_amount', 'invoices', ['status', 'amount']),
+    ('ix_payments_invoice_id', 'payments', ['invoice_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,37 @@
+"""Notification (user_id, created_at) index and unread counter
+
+Revision ID: c3f8a1e6d5b2
+Revises: b7e2d9a4c3f1
+Create Date: 2026-10-19 11:26:08.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1e6d5b2'
+down_revision = 'b7e2d9a4c3f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notifications', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill once; from here on the counter is maintained on insert/read/delete
+    op.execute(
+        "UPDATE users SET unread_notifications = ("
+        "SELECT COUNT(*) FROM notifications "
+        "WHERE notifications.user_id = users.id AND notifications.is_read = false)"
+    )
+
+    op.create_index('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_user_id_created_at', table_name='notifications')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('unread_notifications')
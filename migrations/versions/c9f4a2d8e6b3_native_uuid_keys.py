@@ -0,0 +1,105 @@
+"""Native UUID keys (Postgres uuid / 16-byte BLOB on SQLite)
+
+Revision ID: c9f4a2d8e6b3
+Revises: b8e3f1a7d4c2
+Create Date: 2026-10-19 17:48:30.518244
+
+"""
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f4a2d8e6b3'
+down_revision = 'b8e3f1a7d4c2'
+branch_labels = None
+depends_on = None
+
+# Every VARCHAR(36) id column that becomes a GUID (see utils/ids.py)
+UUID_COLUMNS = {
+    'users': ['id'],
+    'properties': ['id', 'landlord_id'],
+    'property_images': ['property_id'],
+    'units': ['id', 'property_id'],
+    'leases': ['id', 'unit_id', 'tenant_id'],
+    'notifications': ['user_id'],
+    'notifications_archive': ['user_id'],
+    'maintenance_requests': ['id', 'unit_id', 'tenant_id'],
+    'maintenance_attachments': ['request_id'],
+    'account_deletion_jobs': ['id', 'user_id'],
+    'invoices': ['lease_id', 'tenant_id'],
+}
+
+
+def _present(inspector):
+    tables = set(inspector.get_table_names())
+    for table, columns in UUID_COLUMNS.items():
+        if table in tables:
+            existing = {c['name'] for c in inspector.get_columns(table)}
+            yield table, [c for c in columns if c in existing]
+
+
+def _postgres(to_uuid):
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    present = dict(_present(inspector))
+
+    # FKs can't span a type change, so drop every FK touching these columns and put it back after
+    fks = []
+    for table in present:
+        for fk in inspector.get_foreign_keys(table):
+            if fk['referred_table'] in present and fk['name']:
+                fks.append((table, fk))
+                op.drop_constraint(fk['name'], table, type_='foreignkey')
+
+    for table, columns in present.items():
+        for column in columns:
+            if to_uuid:
+                op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid')
+            else:
+                op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar(36) USING {column}::text')
+
+    for table, fk in fks:
+        op.create_foreign_key(fk['name'], table, fk['referred_table'],
+                              fk['constrained_columns'], fk['referred_columns'])
+
+
+def _sqlite(to_bytes):
+    # SQLite stores whatever it's given, so the values are converted in place first. The declared
+    # type then changes too (batch mode rebuilds each table; the copy's CAST leaves the converted
+    # values alone), so autogenerate sees BLOB/VARCHAR(36) matching what the models declare.
+    bind = op.get_bind()
+    convert = (lambda v: uuid.UUID(v).bytes) if to_bytes else (lambda v: str(uuid.UUID(bytes=bytes(v))))
+    wanted = bytes if to_bytes else str
+    present = [(table, columns) for table, columns in _present(sa.inspect(bind)) if columns]
+    for table, columns in present:
+        rows = bind.execute(sa.text(f"SELECT rowid, {', '.join(columns)} FROM {table}")).all()
+        updates = []
+        for row in rows:
+            values = {c: convert(v) for c, v in zip(columns, row[1:]) if v is not None and not isinstance(v, wanted)}
+            if values:
+                updates.append(dict(values, _rowid=row[0]))
+        for params in updates:
+            assignments = ', '.join(f'{c} = :{c}' for c in params if c != '_rowid')
+            bind.execute(sa.text(f'UPDATE {table} SET {assignments} WHERE rowid = :_rowid'), params)
+
+    declared = sa.LargeBinary(16) if to_bytes else sa.String(length=36)
+    for table, columns in present:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, type_=declared)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        _postgres(to_uuid=True)
+    else:
+        _sqlite(to_bytes=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        _postgres(to_uuid=False)
+    else:
+        _sqlite(to_bytes=False)
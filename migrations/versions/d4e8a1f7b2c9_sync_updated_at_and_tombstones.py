@@ -0,0 +1,58 @@
+"""updated_at change tracking and sync tombstones for delta sync
+
+Revision ID: d4e8a1f7b2c9
+Revises: c9f4a2d8e6b3
+Create Date: 2026-10-19 19:12:44.306127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8a1f7b2c9'
+down_revision = 'c9f4a2d8e6b3'
+branch_labels = None
+depends_on = None
+
+# table -> owner column of its (owner, updated_at) index (see utils/sync.py)
+TRACKED = {
+    'leases': 'tenant_id',
+    'invoices': 'tenant_id',
+    'maintenance_requests': 'tenant_id',
+    'notifications': 'user_id',
+}
+
+# What utils.ids.GUID renders as: native uuid on Postgres, 16 bytes elsewhere
+GUID = sa.LargeBinary(16).with_variant(postgresql.UUID(as_uuid=False), 'postgresql')
+
+
+def upgrade():
+    for table, owner in TRACKED.items():
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Existing rows count as last changed when they were created
+        op.execute(f'UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)')
+        op.create_index(f'ix_{table}_{owner}_updated_at', table, [owner, 'updated_at'], unique=False)
+
+    op.create_table('sync_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('object_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', GUID, nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sync_tombstones_user_id_kind_deleted_at', 'sync_tombstones',
+                    ['user_id', 'kind', 'deleted_at'], unique=False)
+    op.create_index('ix_sync_tombstones_deleted_at', 'sync_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sync_tombstones_deleted_at', table_name='sync_tombstones')
+    op.drop_index('ix_sync_tombstones_user_id_kind_deleted_at', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    for table, owner in reversed(list(TRACKED.items())):
+        op.drop_index(f'ix_{table}_{owner}_updated_at', table_name=table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,37 @@
+"""Notifications archive table and created_at index
+
+Revision ID: d9b3c6f1a2e8
+Revises: c3f8a1e6d5b2
+Create Date: 2026-10-19 12:41:52.117630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b3c6f1a2e8'
+down_revision = 'c3f8a1e6d5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notifications_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('message', sa.String(length=255), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_archive_user_id', 'notifications_archive', ['user_id'], unique=False)
+    # Retention scans read rows oldest-first
+    op.create_index('ix_notifications_created_at', 'notifications', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_created_at', table_name='notifications')
+    op.drop_index('ix_notifications_archive_user_id', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
@@ -0,0 +1,26 @@
+"""User token_version for claim-based auth
+
+Revision ID: e4a7b2c9d1f6
+Revises: d9b3c6f1a2e8
+Create Date: 2026-10-19 13:58:21.640335
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7b2c9d1f6'
+down_revision = 'd9b3c6f1a2e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
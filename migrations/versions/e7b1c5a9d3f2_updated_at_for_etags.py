@@ -0,0 +1,36 @@
+"""updated_at on users, properties and units for conditional GET
+
+Revision ID: e7b1c5a9d3f2
+Revises: d4e8a1f7b2c9
+Create Date: 2026-10-19 20:03:17.558910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b1c5a9d3f2'
+down_revision = 'd4e8a1f7b2c9'
+branch_labels = None
+depends_on = None
+
+# table -> column existing rows take their first version from (see utils/conditional.py)
+VERSIONED = {
+    'users': 'created_at',
+    'properties': 'created_at',
+    'units': None,
+}
+
+
+def upgrade():
+    for table, since in VERSIONED.items():
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        start = f'COALESCE({since}, CURRENT_TIMESTAMP)' if since else 'CURRENT_TIMESTAMP'
+        op.execute(f'UPDATE {table} SET updated_at = {start}')
+
+
+def downgrade():
+    for table in reversed(list(VERSIONED)):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,36 @@
+"""Account deletion jobs
+
+Revision ID: f5c1d8e3b7a4
+Revises: e4a7b2c9d1f6
+Create Date: 2026-10-19 15:07:39.281554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c1d8e3b7a4'
+down_revision = 'e4a7b2c9d1f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('account_deletion_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('current_step', sa.String(length=50), nullable=True),
+    sa.Column('rows_deleted', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_account_deletion_jobs_user_id', 'account_deletion_jobs', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_account_deletion_jobs_user_id', table_name='account_deletion_jobs')
+    op.drop_table('account_deletion_jobs')
@@ -1,12 +1,16 @@
-import uuid
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password, needs_rehash
+from utils.ids import GUID, new_id
+from sqlalchemy import event
 from extensions import db
 
 # --- USER MODEL ---
 class User(db.Model):
     __tablename__ = 'users'
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        db.Index('ix_users_role_status_created_at', 'role', 'status', 'created_at'), # Admin landlord queue
+    )
+    id = db.Column(GUID(), primary_key=True, default=new_id)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     full_name = db.Column(db.String(100), nullable=False)
@@ -17,6 +21,12 @@ class User(db.Model):
     kra_pin = db.Column(db.String(50))
     evidence_of_identity = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Badge count, kept in step with notifications so reads never need COUNT(*)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on role/status changes; tokens carrying an older value are refused
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # ETag version of the profile reads (see utils/conditional.py); unread counter updates leave it alone
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     properties = db.relationship('Property', backref='landlord', lazy=True)
@@ -25,10 +35,13 @@ class User(db.Model):
     maintenance_requests = db.relationship('MaintenanceRequest', backref='tenant', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -43,8 +56,12 @@ class User(db.Model):
 # --- PROPERTY MODEL ---
 class Property(db.Model):
     __tablename__ = 'properties'
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    landlord_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    __table_args__ = (
+        db.Index('ix_properties_landlord_id', 'landlord_id'),
+        db.Index('ix_properties_status_created_at', 'status', 'created_at'), # Public listing + admin queue
+    )
+    id = db.Column(GUID(), primary_key=True, default=new_id)
+    landlord_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     address = db.Column(db.String(200))
@@ -61,6 +78,7 @@ class Property(db.Model):
     image_url = db.Column(db.String(255))
     status = db.Column(db.String(20), default='Available')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     images = db.relationship('PropertyImage', backref='property', lazy=True, cascade="all, delete-orphan")
@@ -89,8 +107,11 @@ class Property(db.Model):
 # --- PROPERTY IMAGE MODEL ---
 class PropertyImage(db.Model):
     __tablename__ = 'property_images'
+    __table_args__ = (
+        db.Index('ix_property_images_property_id', 'property_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.String(36), db.ForeignKey('properties.id'), nullable=False)
+    property_id = db.Column(GUID(), db.ForeignKey('properties.id'), nullable=False)
     image_url = db.Column(db.String(255), nullable=False)
 
     def to_dict(self):
@@ -99,11 +120,15 @@ class PropertyImage(db.Model):
 # --- UNIT MODEL ---
 class Unit(db.Model):
     __tablename__ = 'units'
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    property_id = db.Column(db.String(36), db.ForeignKey('properties.id'), nullable=False)
+    __table_args__ = (
+        db.Index('ix_units_property_id_status', 'property_id', 'status'), # Vacant-unit lookup
+    )
+    id = db.Column(GUID(), primary_key=True, default=new_id)
+    property_id = db.Column(GUID(), db.ForeignKey('properties.id'), nullable=False)
     unit_number = db.Column(db.String(50), nullable=False) # Serial Number
     rent_amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='vacant')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     leases = db.relationship('Lease', backref='unit', lazy=True)
     maintenance_requests = db.relationship('MaintenanceRequest', backref='unit', lazy=True)
@@ -119,14 +144,21 @@ class Unit(db.Model):
 # --- LEASE MODEL ---
 class Lease(db.Model):
     __tablename__ = 'leases'
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    unit_id = db.Column(db.String(36), db.ForeignKey('units.id'), nullable=False)
-    tenant_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    __table_args__ = (
+        db.Index('ix_leases_tenant_id_created_at', 'tenant_id', 'created_at'),
+        db.Index('ix_leases_unit_id', 'unit_id'),
+        db.Index('ix_leases_tenant_id_updated_at', 'tenant_id', 'updated_at'), # Delta sync
+    )
+    id = db.Column(GUID(), primary_key=True, default=new_id)
+    unit_id = db.Column(GUID(), db.ForeignKey('units.id'), nullable=False)
+    tenant_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     start_date = db.Column(db.DateTime)
     end_date = db.Column(db.DateTime)
     rent_amount = db.Column(db.Float)
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped by every UPDATE, ORM or set-based; ?since= feeds read it (see utils/sync.py)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     invoices = db.relationship('Invoice', backref='lease', lazy=True)
@@ -147,17 +179,24 @@ class Lease(db.Model):
             'rent_amount': self.rent_amount,
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 # --- NOTIFICATION MODEL ---
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_notifications_created_at', 'created_at'),
+        db.Index('ix_notifications_user_id_updated_at', 'user_id', 'updated_at'), # Delta sync
+    )
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     message = db.Column(db.String(255), nullable=False)
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
         return {
@@ -165,20 +204,86 @@ class Notification(db.Model):
             'user_id': self.user_id,
             'message': self.message,
             'is_read': self.is_read,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+# --- NOTIFICATION ARCHIVE (Read notifications past retention; see utils/notification_retention.py) ---
+class NotificationArchive(db.Model):
+    __tablename__ = 'notifications_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False) # Same id as the live row
+    user_id = db.Column(GUID(), nullable=False, index=True)
+    message = db.Column(db.String(255), nullable=False)
+    is_read = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Unread counter upkeep: runs on the inserting/deleting connection, so it commits or rolls back with the row.
+# users.updated_at is kept as is; it versions the profile, not the counter.
+def _adjust_unread(connection, user_id, delta):
+    users = User.__table__
+    connection.execute(
+        users.update().where(users.c.id == user_id)
+        .values(unread_notifications=users.c.unread_notifications + delta, updated_at=users.c.updated_at)
+    )
+
+@event.listens_for(Notification, 'after_insert')
+def _notification_inserted(mapper, connection, target):
+    if not target.is_read:
+        _adjust_unread(connection, target.user_id, 1)
+
+@event.listens_for(Notification, 'after_delete')
+def _notification_deleted(mapper, connection, target):
+    if not target.is_read:
+        _adjust_unread(connection, target.user_id, -1)
+
 # --- MAINTENANCE REQUEST MODEL ---
 class MaintenanceRequest(db.Model):
     __tablename__ = 'maintenance_requests'
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    unit_id = db.Column(db.String(36), db.ForeignKey('units.id'), nullable=False)
-    tenant_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    __table_args__ = (
+        db.Index('ix_maintenance_requests_tenant_id_created_at', 'tenant_id', 'created_at'),
+        db.Index('ix_maintenance_requests_unit_id', 'unit_id'),
+        db.Index('ix_maintenance_requests_tenant_id_updated_at', 'tenant_id', 'updated_at'), # Delta sync
+    )
+    id = db.Column(GUID(), primary_key=True, default=new_id)
+    unit_id = db.Column(GUID(), db.ForeignKey('units.id'), nullable=False)
+    tenant_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     priority = db.Column(db.String(20), default='medium')
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # SLA tracking (stamped by update_request_status)
+    status_changed_at = db.Column(db.DateTime)
+    acknowledged_at = db.Column(db.DateTime)
+    resolved_at = db.Column(db.DateTime)
+    # Durations in seconds, kept as plain ints so percentiles can be taken in SQL on any backend
+    ack_seconds = db.Column(db.Integer)
+    resolution_seconds = db.Column(db.Integer)
+
+    attachments = db.relationship('MaintenanceAttachment', backref='request', lazy=True, cascade="all, delete-orphan")
+
+    RESOLVED_STATUSES = ('resolved', 'completed', 'closed')
+
+    def set_status(self, new_status):
+        now = datetime.utcnow()
+        if new_status != self.status:
+            self.status_changed_at = now
+        # First move out of 'pending' counts as the landlord acknowledging it
+        if self.acknowledged_at is None and new_status != 'pending':
+            self.acknowledged_at = now
+            self.ack_seconds = int((now - self.created_at).total_seconds())
+        if new_status in self.RESOLVED_STATUSES:
+            if self.resolved_at is None:
+                self.resolved_at = now
+                self.resolution_seconds = int((now - self.created_at).total_seconds())
+        else:
+            # Re-opened: the clock keeps running from creation
+            self.resolved_at = None
+            self.resolution_seconds = None
+        self.status = new_status
 
     def to_dict(self):
         return {
@@ -189,15 +294,86 @@ class MaintenanceRequest(db.Model):
             'description': self.description,
             'priority': self.priority,
             'status': self.status,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'acknowledged_at': self.acknowledged_at.isoformat() if self.acknowledged_at else None,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+# --- MAINTENANCE ATTACHMENT MODEL ---
+class MaintenanceAttachment(db.Model):
+    __tablename__ = 'maintenance_attachments'
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(GUID(), db.ForeignKey('maintenance_requests.id'), nullable=False, index=True)
+    storage_key = db.Column(db.String(255), nullable=False)
+    image_url = db.Column(db.String(255), nullable=False)
+    thumbnail_url = db.Column(db.String(255)) # Filled in by the thumbnail worker
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'image_url': self.image_url,
+            'thumbnail_url': self.thumbnail_url
+        }
+
+# --- ACCOUNT DELETION JOB (Progress of a background purge; outlives the user row) ---
+class AccountDeletionJob(db.Model):
+    __tablename__ = 'account_deletion_jobs'
+    id = db.Column(GUID(), primary_key=True, default=new_id)
+    user_id = db.Column(GUID(), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued') # queued, running, done, failed
+    current_step = db.Column(db.String(50))
+    rows_deleted = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Heartbeat: every progress write bumps it; queued/running jobs gone quiet are resumed (utils/account_purge.py)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'current_step': self.current_step,
+            'rows_deleted': self.rows_deleted,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+# --- PLATFORM STATS SNAPSHOT (One row per dashboard section; see utils/platform_stats.py) ---
+class PlatformStat(db.Model):
+    __tablename__ = 'platform_stats'
+    section = db.Column(db.String(50), primary_key=True)
+    data = db.Column(db.Text, nullable=False) # JSON
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- SYNC TOMBSTONE (A deleted row, once per user whose feed listed it; see utils/sync.py) ---
+class Tombstone(db.Model):
+    __tablename__ = 'sync_tombstones'
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_user_id_kind_deleted_at', 'user_id', 'kind', 'deleted_at'),
+        db.Index('ix_sync_tombstones_deleted_at', 'deleted_at'), # Pruning
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False) # Table name of the deleted row
+    object_id = db.Column(db.String(36), nullable=False)
+    user_id = db.Column(GUID(), nullable=False) # No FK, as in notifications_archive
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # --- INVOICE MODEL (Consolidated & M-Pesa Ready) ---
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        db.Index('ix_invoices_tenant_id_created_at', 'tenant_id', 'created_at'),
+        db.Index('ix_invoices_lease_id', 'lease_id'),
+        db.Index('ix_invoices_status_amount', 'status', 'amount'), # M-Pesa callback match
+        db.Index('ix_invoices_tenant_id_updated_at', 'tenant_id', 'updated_at'), # Delta sync
+    )
     id = db.Column(db.Integer, primary_key=True)
-    lease_id = db.Column(db.String(36), db.ForeignKey('leases.id'), nullable=False)
-    tenant_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    lease_id = db.Column(GUID(), db.ForeignKey('leases.id'), nullable=False)
+    tenant_id = db.Column(GUID(), db.ForeignKey('users.id'), nullable=False)
     
     amount = db.Column(db.Float, nullable=False)
     description = db.Column(db.String(255), nullable=False) # e.g. "Rent - January"
@@ -205,6 +381,7 @@ class Invoice(db.Model):
     status = db.Column(db.String(20), default='pending') # pending, paid
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     payments = db.relationship('Payment', backref='invoice', lazy=True)
@@ -217,12 +394,16 @@ class Invoice(db.Model):
             'description': self.description,
             'due_date': self.due_date.isoformat(),
             'status': self.status,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 # --- PAYMENT MODEL (M-Pesa Ready) ---
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_invoice_id', 'invoice_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
     
@@ -3,4 +3,5 @@ from .properties import properties_bp
 from .leases import leases_bp
 from .users import users_bp
 from .maintenance import maintenance_bp
-from .payments import payments_bp
\ No newline at end of file
+from .payments import payments_bp
+from .notifications import notifications_bp
\ No newline at end of file
@@ -1,29 +1,71 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, send_file
+from flask_jwt_extended import jwt_required
+from sqlalchemy import update
 from extensions import db
-from models import User, Property, Notification
+from models import User, Property
+from utils.notifications import notify, notify_many, fan_out
+from utils.auth import current_role, bump_token_version, forget_token_versions
+from utils.pagination import keyset_page, page_size
+from utils.platform_stats import get_snapshot
+from utils.query_stats import query_budget
+from utils import db_pool, profiling
 
 # 🟢 THIS WAS MISSING
 admin_bp = Blueprint('admin', __name__)
 
-# Helper: Check if current user is Admin
-def verify_admin(user_id):
-    user = User.query.get(user_id)
-    return user and user.role == 'admin'
+PENDING_PROPERTY_STATUSES = ['pending', 'Under Review']
+MAX_BULK_IDS = 100
+
+# action -> (new status, notification)
+LANDLORD_ACTIONS = {
+    'approve': ('active', "Your Landlord account has been verified! You can now list properties."),
+    'reject': ('rejected', "Your Landlord verification failed. Please contact support."),
+}
+PROPERTY_ACTIONS = {
+    'approve': ('approved', "Your property '{name}' has been approved and is now live."),
+    'reject': ('rejected', "Your property '{name}' was rejected. Please check guidelines."),
+}
+PAST_TENSE = {'approve': 'approved', 'reject': 'rejected'}
+
+# Helper: Check if current user is Admin (from the token's role claim, no DB hit)
+def verify_admin():
+    return current_role() == 'admin'
+
+# Helper: Validate a bulk body {"ids": [...], "action": "approve"|"reject"}
+def bulk_request(actions):
+    data = request.get_json(silent=True) or {}
+    ids, action = data.get('ids'), data.get('action')
+    if action not in actions:
+        return None, None, (jsonify({'error': 'Invalid action'}), 400)
+    if not isinstance(ids, list) or not ids or len(ids) > MAX_BULK_IDS:
+        return None, None, (jsonify({'error': f'ids must be a list of 1-{MAX_BULK_IDS} ids'}), 400)
+    return [str(i) for i in ids], action, None
+
+# Helper: Queue response; body is the page, cursor for the next one in X-Next-Cursor
+def page_response(items, next_cursor):
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 # --- 1. LANDLORD VERIFICATION ---
 
 @admin_bp.route('/landlords/pending', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_pending_landlords():
-    current_user_id = get_jwt_identity()
-    if not verify_admin(current_user_id):
+    if not verify_admin():
         return jsonify({'error': 'Unauthorized. Admin access only.'}), 403
 
-    # Fetch landlords who are not yet active
-    landlords = User.query.filter_by(role='landlord', status='pending').all()
-    
-    return jsonify([{
+    # Oldest applications first, one page at a time
+    query = User.query.filter_by(role='landlord', status='pending')
+    try:
+        landlords, next_cursor = keyset_page(query, User.created_at, User.id, request.args.get('cursor'),
+                                             page_size(request.args), newest_first=False)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return page_response([{
         'id': l.id,
         'full_name': l.full_name,
         'email': l.email,
@@ -32,13 +74,12 @@ def get_pending_landlords():
         'kra_pin': l.kra_pin,
         'evidence_of_identity': l.evidence_of_identity, # URL to uploaded ID
         'created_at': l.created_at.isoformat()
-    } for l in landlords]), 200
+    } for l in landlords], next_cursor)
 
 @admin_bp.route('/landlords/<user_id>/verify', methods=['PATCH'])
 @jwt_required()
 def verify_landlord(user_id):
-    current_user_id = get_jwt_identity()
-    if not verify_admin(current_user_id):
+    if not verify_admin():
         return jsonify({'error': 'Unauthorized'}), 403
 
     data = request.get_json()
@@ -47,53 +88,80 @@ def verify_landlord(user_id):
     landlord = User.query.get(user_id)
     if not landlord: return jsonify({'error': 'User not found'}), 404
 
-    if action == 'approve':
-        landlord.status = 'active'
-        msg = "Your Landlord account has been verified! You can now list properties."
-    elif action == 'reject':
-        landlord.status = 'rejected'
-        msg = "Your Landlord verification failed. Please contact support."
-    else:
+    if action not in LANDLORD_ACTIONS:
         return jsonify({'error': 'Invalid action'}), 400
+    landlord.status, msg = LANDLORD_ACTIONS[action]
+    bump_token_version(landlord) # Status is in their token; make them log in again
 
     # Notify Landlord
-    db.session.add(Notification(user_id=landlord.id, message=msg))
+    notify(landlord.id, msg)
     db.session.commit()
 
     return jsonify({'message': f'Landlord {action}d successfully'}), 200
 
+@admin_bp.route('/landlords/verify', methods=['PATCH'])
+@jwt_required()
+def bulk_verify_landlords():
+    if not verify_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    ids, action, error = bulk_request(LANDLORD_ACTIONS)
+    if error: return error
+    status, msg = LANDLORD_ACTIONS[action]
+
+    try:
+        # One UPDATE for the whole batch; only still-pending landlords change
+        updated = db.session.execute(
+            update(User)
+            .where(User.id.in_(ids), User.role == 'landlord', User.status == 'pending')
+            .values(status=status, token_version=User.token_version + 1)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        fan_out(updated, msg)
+        db.session.commit()
+        forget_token_versions(updated)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'message': f'{len(updated)} landlord(s) {PAST_TENSE[action]}', 'updated': updated}), 200
+
 # --- 2. PROPERTY VERIFICATION ---
 
 @admin_bp.route('/properties/pending', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_pending_properties():
-    current_user_id = get_jwt_identity()
-    if not verify_admin(current_user_id):
+    if not verify_admin():
         return jsonify({'error': 'Unauthorized'}), 403
 
-    # Fetch properties that are 'pending' or 'Under Review'
-    properties = Property.query.filter(Property.status.in_(['pending', 'Under Review'])).all()
-    
-    results = []
-    for p in properties:
-        landlord = User.query.get(p.landlord_id)
-        results.append({
-            'id': p.id,
-            'name': p.name,
-            'location': f"{p.city}, {p.address}",
-            'price': p.price,
-            'landlord_name': landlord.full_name if landlord else "Unknown",
-            'image_url': p.image_url,
-            'status': p.status
-        })
-
-    return jsonify(results), 200
+    # Properties awaiting review with their landlord's name, in one joined query
+    query = db.session.query(
+        Property.id, Property.name, Property.city, Property.address, Property.price,
+        Property.image_url, Property.status, Property.created_at, User.full_name.label('landlord_name')
+    ).outerjoin(User, User.id == Property.landlord_id)\
+        .filter(Property.status.in_(PENDING_PROPERTY_STATUSES))
+    try:
+        properties, next_cursor = keyset_page(query, Property.created_at, Property.id, request.args.get('cursor'),
+                                              page_size(request.args), newest_first=False)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return page_response([{
+        'id': p.id,
+        'name': p.name,
+        'location': f"{p.city}, {p.address}",
+        'price': p.price,
+        'landlord_name': p.landlord_name or "Unknown",
+        'image_url': p.image_url,
+        'status': p.status
+    } for p in properties], next_cursor)
 
 @admin_bp.route('/properties/<property_id>/verify', methods=['PATCH'])
 @jwt_required()
 def verify_property(property_id):
-    current_user_id = get_jwt_identity()
-    if not verify_admin(current_user_id):
+    if not verify_admin():
         return jsonify({'error': 'Unauthorized'}), 403
 
     data = request.get_json()
@@ -102,17 +170,81 @@ def verify_property(property_id):
     prop = Property.query.get(property_id)
     if not prop: return jsonify({'error': 'Property not found'}), 404
 
-    if action == 'approve':
-        prop.status = 'approved' 
-        msg = f"Your property '{prop.name}' has been approved and is now live."
-    elif action == 'reject':
-        prop.status = 'rejected'
-        msg = f"Your property '{prop.name}' was rejected. Please check guidelines."
-    else:
+    if action not in PROPERTY_ACTIONS:
         return jsonify({'error': 'Invalid action'}), 400
+    prop.status, template = PROPERTY_ACTIONS[action]
 
     # Notify Landlord
-    db.session.add(Notification(user_id=prop.landlord_id, message=msg))
+    notify(prop.landlord_id, template.format(name=prop.name))
     db.session.commit()
 
-    return jsonify({'message': f'Property {action}d successfully'}), 200
\ No newline at end of file
+    return jsonify({'message': f'Property {action}d successfully'}), 200
+
+@admin_bp.route('/properties/verify', methods=['PATCH'])
+@jwt_required()
+def bulk_verify_properties():
+    if not verify_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    ids, action, error = bulk_request(PROPERTY_ACTIONS)
+    if error: return error
+    status, template = PROPERTY_ACTIONS[action]
+
+    try:
+        # One UPDATE for the batch, then one multi-row INSERT for every landlord's notification
+        updated = db.session.execute(
+            update(Property)
+            .where(Property.id.in_(ids), Property.status.in_(PENDING_PROPERTY_STATUSES))
+            .values(status=status)
+            .returning(Property.id, Property.landlord_id, Property.name)
+            .execution_options(synchronize_session=False)
+        ).all()
+        notify_many([(p.landlord_id, template.format(name=p.name)) for p in updated])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'message': f'{len(updated)} property(ies) {PAST_TENSE[action]}', 'updated': [p.id for p in updated]}), 200
+
+# --- 3. PLATFORM STATS (Dashboard; served from the platform_stats snapshot) ---
+
+@admin_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_platform_stats():
+    if not verify_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        return jsonify(get_snapshot()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# --- 4. DATABASE POOL (This worker's connection pool: occupancy and checkout waits) ---
+
+@admin_bp.route('/metrics/pool', methods=['GET'])
+@jwt_required()
+def get_pool_metrics():
+    if not verify_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(db_pool.snapshot(db.engine)), 200
+
+# --- 5. PROFILES (Captured with X-Profile: 1 or sampling; open downloads in speedscope.app) ---
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def list_profiles():
+    if not verify_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(profiling.list_profiles()), 200
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def download_profile(profile_id):
+    if not verify_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    path = profiling.profile_path(profile_id)
+    if not path:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/json', as_attachment=True,
+                     download_name=f'{profile_id}.speedscope.json')
@@ -1,12 +1,21 @@
 from flask import Blueprint, request, jsonify
 from extensions import db
 from models import User
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from utils.auth import token_claims, get_current_user as load_current_user
+from utils.passwords import HashingBusy
+from utils.ratelimit import rate_limit
+from utils.query_stats import query_budget
+from utils import conditional
+from flask_jwt_extended import create_access_token, jwt_required
 
 auth_bp = Blueprint('auth', __name__)
 
+# Login attempts are also limited per account, so spreading guesses across IPs doesn't help
+def login_email():
+    return str((request.get_json(silent=True) or {}).get('email', '')).lower()
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit('10/hour', by='ip')
 def register():
     data = request.get_json()
     
@@ -33,7 +42,10 @@ def register():
         national_id=data.get('national_id'), # Optional at start
         kra_pin=data.get('kra_pin')          # Optional at start
     )
-    new_user.set_password(data['password'])
+    try:
+        new_user.set_password(data['password'])
+    except HashingBusy:
+        return jsonify({'error': 'Server busy, please try again'}), 503, {'Retry-After': '2'}
     
     try:
         db.session.add(new_user)
@@ -52,6 +64,8 @@ def register():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('20/minute', by='ip')
+@rate_limit('5/minute', by=login_email)
 def login():
     data = request.get_json()
     
@@ -59,16 +73,30 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
     
     # 2. Validate Password
-    if user and user.check_password(data['password']):
+    try:
+        valid = user is not None and user.check_password(data['password'])
+    except HashingBusy:
+        return jsonify({'error': 'Server busy, please try again'}), 503, {'Retry-After': '2'}
+
+    if valid:
+        # Hash made with older KDF settings: upgrade it now that we have the plaintext
+        if user.password_needs_rehash():
+            try:
+                user.set_password(data['password'])
+                db.session.commit()
+            except HashingBusy:
+                pass # Try again on a later login
         
         # 3. 🟢 CRITICAL FIX: Block login if Pending or Rejected
         if user.status == 'pending':
             return jsonify({'error': 'Your account is still under review by an Admin.'}), 403
         if user.status == 'rejected':
             return jsonify({'error': 'Your account verification failed. Contact support.'}), 403
+        if user.status == 'deleting':
+            return jsonify({'error': 'This account is being deleted.'}), 403
 
-        # 4. Generate Token
-        access_token = create_access_token(identity=user.id)
+        # 4. Generate Token (role/status ride along so handlers can skip the user lookup)
+        access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
         return jsonify({
             'message': 'Login successful',
             'access_token': access_token,
@@ -78,10 +106,12 @@ def login():
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @auth_bp.route('/me', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_current_user():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = load_current_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
-    return jsonify(user.to_dict()), 200
\ No newline at end of file
+    # The row is one primary-key read either way; a matching ETag skips serialization and the body
+    etag = conditional.etag_for(user.id, user.updated_at)
+    return conditional.not_modified(etag, private=True) or conditional.respond(user.to_dict(), etag, private=True)
\ No newline at end of file
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models import Lease, Property, User, Notification, Unit
+from models import Lease, Property, User, Unit
+from utils.notifications import notify
+from utils.auth import current_role
+from utils.serializers import LEASE
+from utils import sync, conditional
 from datetime import datetime, timedelta
-from sqlalchemy import cast, String
 
 leases_bp = Blueprint('leases', __name__)
 
@@ -13,38 +16,25 @@ leases_bp = Blueprint('leases', __name__)
 def get_all_leases():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user:
-            return jsonify({'error': 'User session not found'}), 404
 
+        # Property, unit and tenant details come from joins in the same query (see utils/serializers.py);
+        # ?fields= / ?expand= pick which of them are selected
+        try:
+            view = LEASE.view_for(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = view.query(Unit, Property)
         # 🟢 LANDLORD: See all requests for my properties
-        if user.role == 'landlord':
-            leases = db.session.query(Lease).join(Unit).join(Property)\
-                .filter(cast(Property.landlord_id, String) == str(current_user_id))\
-                .order_by(Lease.created_at.desc()).all()
+        if current_role() == 'landlord':
+            query = query.filter(Property.landlord_id == str(current_user_id))
         # 🟢 TENANT: See my applications
         else:
-            leases = Lease.query.filter(cast(Lease.tenant_id, String) == str(current_user_id))\
-                .order_by(Lease.created_at.desc()).all()
-        
-        # 🟢 INJECT TENANT INFO (So Landlord sees names, not just IDs)
-        results = []
-        for lease in leases:
-            data = lease.to_dict()
-            
-            # Fetch Tenant Details
-            tenant = User.query.get(lease.tenant_id)
-            if tenant:
-                data['tenant_name'] = tenant.full_name
-                data['tenant_email'] = tenant.email
-                data['tenant_phone'] = tenant.phone_number
-            else:
-                data['tenant_name'] = "Unknown Tenant"
-                
-            results.append(data)
-
-        return jsonify(results), 200
+            query = query.filter(Lease.tenant_id == str(current_user_id))
+
+        # ?since=<X-Sync-Token>: only what changed or was deleted since (see utils/sync.py)
+        if request.args.get('since'):
+            return sync.delta_response(view, query, Lease, current_user_id, request.args['since'])
+        return sync.with_token(jsonify(view.all(query.order_by(Lease.created_at.desc())))), 200
 
     except Exception as e:
         print(f"Error fetching leases: {e}")
@@ -88,7 +78,7 @@ def create_lease_application():
         )
         
         db.session.add(new_lease)
-        db.session.add(Notification(user_id=property_obj.landlord_id, message=f"New application for {property_obj.name}"))
+        notify(property_obj.landlord_id, f"New application for {property_obj.name}")
         db.session.commit()
         return jsonify({'message': 'Application sent!'}), 201
 
@@ -121,10 +111,41 @@ def update_lease_status(lease_id):
             lease.status = 'rejected'
             unit.status = 'vacant'
         
-        db.session.add(Notification(user_id=lease.tenant_id, message=f"Application {action}."))
+        notify(lease.tenant_id, f"Application {action}.")
         db.session.commit()
         return jsonify({'message': f'Lease marked as {action}'}), 200
 
     except Exception as e:
         db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# --- 4. GET ONE LEASE (Conditional: ETag / 304 Not Modified) ---
+@leases_bp.route('/<lease_id>', methods=['GET'])
+@jwt_required()
+def get_lease(lease_id):
+    try:
+        current_user_id = str(get_jwt_identity())
+        try:
+            view = LEASE.view_for(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Access check and version in one indexed read: updated_at of every row the lease is shown from
+        version = db.session.query(Lease.tenant_id, Property.landlord_id, Lease.updated_at, Unit.updated_at,
+                                   Property.updated_at, User.updated_at)\
+            .join(Unit, Unit.id == Lease.unit_id).join(Property, Property.id == Unit.property_id)\
+            .outerjoin(User, User.id == Lease.tenant_id).filter(Lease.id == lease_id).first()
+        if not version: return jsonify({'error': 'Lease not found'}), 404
+        if current_user_id not in (str(version[0]), str(version[1])):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        etag = conditional.etag_for(lease_id, *version[2:])
+        cached = conditional.not_modified(etag, private=True)
+        if cached: return cached
+        lease = view.first(view.query().filter(Lease.id == lease_id))
+        if not lease: return jsonify({'error': 'Lease not found'}), 404
+        return conditional.respond(lease, etag, private=True)
+
+    except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,47 +1,53 @@
-from flask import Blueprint, request, jsonify
+import math
+from datetime import datetime
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models import MaintenanceRequest, Lease, Property, User, Notification, Unit
-from sqlalchemy import cast, String
+from models import MaintenanceRequest, MaintenanceAttachment, Lease, Property, User, Unit
+from utils.notifications import notify
+from utils.auth import current_role
+from utils.storage import get_storage
+from utils.background import run_in_background
+from utils.serializers import MAINTENANCE_REQUEST
+from utils import sync
+from sqlalchemy import func, or_
 
 maintenance_bp = Blueprint('maintenance', __name__)
 
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+MAX_ATTACHMENTS = 6
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def _build_thumbnail(attachment_id):
+    attachment = MaintenanceAttachment.query.get(attachment_id)
+    if not attachment: return
+    attachment.thumbnail_url = get_storage().make_thumbnail(attachment.storage_key)
+    attachment.request.updated_at = datetime.utcnow() # Attachments ride along in the request's delta sync
+    db.session.commit()
+
 # --- 1. GET REQUESTS (Enriched with Tenant Names) ---
 @maintenance_bp.route('', methods=['GET'])
 @jwt_required()
 def get_requests():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user: return jsonify({'error': 'User not found'}), 404
-
-        # Fetch requests based on role
-        if user.role == 'landlord':
-            requests = db.session.query(MaintenanceRequest).join(Unit).join(Property)\
-                .filter(cast(Property.landlord_id, String) == str(current_user_id))\
-                .order_by(MaintenanceRequest.created_at.desc()).all()
+
+        # 🟢 Tenant name & property details are joined in; attachments come in one extra query
+        try:
+            view = MAINTENANCE_REQUEST.view_for(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = view.query(Unit, Property)
+        if current_role() == 'landlord':
+            query = query.filter(Property.landlord_id == str(current_user_id))
         else:
-            requests = MaintenanceRequest.query.filter(
-                cast(MaintenanceRequest.tenant_id, String) == str(current_user_id)
-            ).order_by(MaintenanceRequest.created_at.desc()).all()
-
-        # 🟢 Add Tenant Name & Property Details
-        result = []
-        for req in requests:
-            r_dict = req.to_dict()
-            
-            unit = Unit.query.get(req.unit_id)
-            prop = Property.query.get(unit.property_id) if unit else None
-            tenant = User.query.get(req.tenant_id)
-            
-            r_dict['property_name'] = prop.name if prop else "Unknown"
-            r_dict['unit_number'] = unit.unit_number if unit else "N/A"
-            r_dict['tenant_name'] = tenant.full_name if tenant else "Unknown"
-            r_dict['tenant_phone'] = tenant.phone_number if tenant else "N/A"
-            
-            result.append(r_dict)
-
-        return jsonify(result), 200
+            query = query.filter(MaintenanceRequest.tenant_id == str(current_user_id))
+
+        if request.args.get('since'):
+            return sync.delta_response(view, query, MaintenanceRequest, current_user_id, request.args['since'])
+        return sync.with_token(jsonify(view.all(query.order_by(MaintenanceRequest.created_at.desc())))), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -51,13 +57,20 @@ def get_requests():
 @maintenance_bp.route('', methods=['POST'])
 @jwt_required()
 def create_request():
+    saved_keys = []
     try:
         current_user_id = get_jwt_identity()
-        data = request.get_json()
+        # JSON, or multipart form when photos are attached
+        data = request.get_json(silent=True) or request.form
+        files = [f for f in request.files.getlist('attachments') if f and f.filename]
+        if len(files) > MAX_ATTACHMENTS:
+            return jsonify({'error': f'At most {MAX_ATTACHMENTS} photos allowed'}), 400
+        if any(not allowed_file(f.filename) for f in files):
+            return jsonify({'error': 'Invalid file type'}), 400
         provided_unit_id = data.get('unit_id')
         
         # 🟢 SMART LOGIC: Auto-select lease if only 1 exists
-        all_leases = Lease.query.filter(cast(Lease.tenant_id, String) == str(current_user_id)).all()
+        all_leases = Lease.query.filter(Lease.tenant_id == str(current_user_id)).all()
         active_leases = [l for l in all_leases if str(l.status).strip().lower() == 'active']
 
         if not active_leases:
@@ -81,17 +94,36 @@ def create_request():
         )
 
         db.session.add(new_request)
+
+        # Store photos now; thumbnails are built by the worker pool after commit
+        storage = get_storage()
+        for f in files:
+            key, url = storage.save(f)
+            saved_keys.append(key)
+            new_request.attachments.append(MaintenanceAttachment(storage_key=key, image_url=url))
         
         # Notify Landlord
         unit = Unit.query.get(target_lease.unit_id)
         prop = Property.query.get(unit.property_id)
-        db.session.add(Notification(user_id=prop.landlord_id, message=f"Maintenance: {data.get('title')}"))
+        notify(prop.landlord_id, f"Maintenance: {data.get('title')}")
 
         db.session.commit()
-        return jsonify({'message': 'Submitted', 'request': new_request.to_dict()}), 201
+        saved_keys.clear() # The rows own them now
+
+        for attachment in new_request.attachments:
+            run_in_background('thumbnails', _build_thumbnail, attachment.id)
+
+        result = new_request.to_dict()
+        result['attachments'] = [a.to_dict() for a in new_request.attachments]
+        return jsonify({'message': 'Submitted', 'request': result}), 201
 
     except Exception as e:
         db.session.rollback()
+        for key in saved_keys: # No row points at them now
+            try:
+                get_storage().delete(key)
+            except Exception:
+                current_app.logger.exception("Could not delete orphaned attachment %s", key)
         return jsonify({'error': str(e)}), 500
 
 
@@ -112,13 +144,139 @@ def update_request_status(request_id):
         prop = Property.query.get(unit.property_id)
         if str(prop.landlord_id) != str(current_user_id): return jsonify({'error': 'Unauthorized'}), 403
 
-        req.status = data.get('status')
+        new_status = data.get('status')
+        if not new_status: return jsonify({'error': 'Status is required'}), 400
+        req.set_status(new_status)
         
         # Notify Tenant
-        db.session.add(Notification(user_id=req.tenant_id, message=f"Maintenance '{req.title}' is now {req.status}."))
+        notify(req.tenant_id, f"Maintenance '{req.title}' is now {req.status}.")
         
         db.session.commit()
         return jsonify({'message': 'Status updated'}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# --- 4. SLA STATS (Landlord work-queue overview) ---
+def _percentiles(column, filters):
+    """Median and p90 of a duration column, computed by the database."""
+    base = db.session.query(column).select_from(MaintenanceRequest).join(Unit).join(Property)\
+        .filter(*filters).filter(column.isnot(None))
+
+    if db.engine.dialect.name == 'postgresql':
+        median, p90 = base.with_entities(
+            func.percentile_cont(0.5).within_group(column),
+            func.percentile_cont(0.9).within_group(column)
+        ).one()
+        return {'median': median, 'p90': p90}
+
+    # Other backends: nearest-rank, one ORDER BY/OFFSET lookup per percentile
+    total = base.with_entities(func.count()).scalar()
+    if not total:
+        return {'median': None, 'p90': None}
+
+    def rank(pct):
+        return base.order_by(column).offset(max(math.ceil(pct * total) - 1, 0)).limit(1).scalar()
+
+    return {'median': rank(0.5), 'p90': rank(0.9)}
+
+
+def _percentiles_by_property(column, filters):
+    """{property_id: (name, {'median', 'p90'})} for every property with a measured request."""
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.query(Property.id, Property.name,
+                                func.percentile_cont(0.5).within_group(column),
+                                func.percentile_cont(0.9).within_group(column))\
+            .select_from(MaintenanceRequest).join(Unit).join(Property)\
+            .filter(*filters).filter(column.isnot(None))\
+            .group_by(Property.id, Property.name).all()
+        return {pid: (name, {'median': median, 'p90': p90}) for pid, name, median, p90 in rows}
+
+    # Nearest rank per property in one pass: number each property's values, keep ranks ceil(n/2) and ceil(9n/10)
+    ranked = db.session.query(
+        Property.id.label('property_id'), Property.name.label('name'), column.label('value'),
+        func.row_number().over(partition_by=Property.id, order_by=column).label('rn'),
+        func.count().over(partition_by=Property.id).label('n')
+    ).select_from(MaintenanceRequest).join(Unit).join(Property)\
+        .filter(*filters).filter(column.isnot(None)).subquery()
+    median_rank, p90_rank = (ranked.c.n + 1) // 2, (9 * ranked.c.n + 9) // 10
+    rows = db.session.query(ranked.c.property_id, ranked.c.name, ranked.c.value,
+                            ranked.c.rn == median_rank, ranked.c.rn == p90_rank)\
+        .filter(or_(ranked.c.rn == median_rank, ranked.c.rn == p90_rank)).all()
+    result = {}
+    for pid, name, value, is_median, is_p90 in rows:
+        stats = result.setdefault(pid, (name, {'median': None, 'p90': None}))[1]
+        if is_median: stats['median'] = value
+        if is_p90: stats['p90'] = value
+    return result
+
+
+@maintenance_bp.route('/stats', methods=['GET'])
+@jwt_required()
+def get_stats():
+    try:
+        current_user_id = get_jwt_identity()
+        role = current_role()
+
+        if role == 'admin':
+            landlord_id = request.args.get('landlord_id')
+        elif role == 'landlord':
+            landlord_id = current_user_id
+        else:
+            return jsonify({'error': 'Unauthorized'}), 403
+        property_id = request.args.get('property_id')
+
+        filters = []
+        if landlord_id: filters.append(Property.landlord_id == landlord_id)
+        if property_id: filters.append(Property.id == property_id)
+
+        # Open counts per property & priority in one grouped query
+        rows = db.session.query(Property.id, Property.name, MaintenanceRequest.priority, func.count(MaintenanceRequest.id))\
+            .select_from(MaintenanceRequest).join(Unit).join(Property)\
+            .filter(*filters)\
+            .filter(MaintenanceRequest.status.notin_(MaintenanceRequest.RESOLVED_STATUSES))\
+            .group_by(Property.id, Property.name, MaintenanceRequest.priority).all()
+
+        open_by_priority = {}
+        per_property = {}
+        for prop_id, prop_name, priority, count in rows:
+            open_by_priority[priority] = open_by_priority.get(priority, 0) + count
+            entry = per_property.setdefault(prop_id, {
+                'property_id': prop_id,
+                'property_name': prop_name,
+                'open_by_priority': {},
+                'open_total': 0
+            })
+            entry['open_by_priority'][priority] = count
+            entry['open_total'] += count
+
+        # SLA percentiles per property; properties with nothing open still report them
+        for key, column in (('ack_seconds', MaintenanceRequest.ack_seconds),
+                            ('resolution_seconds', MaintenanceRequest.resolution_seconds)):
+            for prop_id, (prop_name, stats) in _percentiles_by_property(column, filters).items():
+                per_property.setdefault(prop_id, {
+                    'property_id': prop_id,
+                    'property_name': prop_name,
+                    'open_by_priority': {},
+                    'open_total': 0
+                })[key] = stats
+        for entry in per_property.values():
+            entry.setdefault('ack_seconds', {'median': None, 'p90': None})
+            entry.setdefault('resolution_seconds', {'median': None, 'p90': None})
+
+        properties = sorted(per_property.values(), key=lambda p: p['open_total'], reverse=True)
+
+        return jsonify({
+            'landlord_id': landlord_id,
+            'property_id': property_id,
+            'open_total': sum(open_by_priority.values()),
+            'open_by_priority': open_by_priority,
+            'ack_seconds': _percentiles(MaintenanceRequest.ack_seconds, filters),
+            'resolution_seconds': _percentiles(MaintenanceRequest.resolution_seconds, filters),
+            'properties': properties
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
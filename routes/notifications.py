@@ -1,64 +1,183 @@
-from flask import Blueprint, request, jsonify
+import json
+import queue
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from extensions import db
 from models import Notification, User
+from utils import pubsub, notifications, sync
+from utils.pagination import keyset_page, page_size, MAX_PAGE_SIZE
+from utils.query_stats import query_budget
+from utils.serializers import NOTIFICATION
 
 notifications_bp = Blueprint('notifications', __name__)
 
-# --- 1. GET MY NOTIFICATIONS ---
+def unread_count(user_id):
+    return db.session.query(User.unread_notifications).filter(User.id == user_id).scalar() or 0
+
+# --- 1. GET MY NOTIFICATIONS (Keyset paginated, newest first) ---
+# Body stays a plain list; paging info travels in X-Next-Cursor / X-Unread-Count / X-Sync-Token.
+# ?since=<X-Sync-Token> returns a delta instead (see utils/sync.py)
 @notifications_bp.route('', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def get_notifications():
-    current_user_id = get_jwt_identity()
-    
-    # Fetch notifications where I am the RECIPIENT
-    notifications = Notification.query.filter_by(recipient_user_id=current_user_id)\
-        .order_by(Notification.created_at.desc()).limit(20).all()
-    
-    return jsonify([notif.to_dict() for notif in notifications]), 200
-
-# --- 2. GET UNREAD COUNT ---
+    try:
+        current_user_id = get_jwt_identity()
+        query = NOTIFICATION.query().filter(Notification.user_id == current_user_id)
+        if request.args.get('since'):
+            response, status = sync.delta_response(NOTIFICATION.default, query, Notification, current_user_id,
+                                                   request.args['since'], id_type=int)
+            response.headers['X-Unread-Count'] = str(unread_count(current_user_id))
+            return response, status
+        try:
+            page, next_cursor = keyset_page(query, Notification.created_at, Notification.id,
+                                            request.args.get('cursor'), page_size(request.args), id_type=int)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        response = sync.with_token(jsonify(NOTIFICATION.dump(page)))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['X-Unread-Count'] = str(unread_count(current_user_id))
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# --- 2. GET UNREAD COUNT (Badge: one primary-key read) ---
 @notifications_bp.route('/unread', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_unread_count():
+    return jsonify({'unread_count': unread_count(get_jwt_identity())}), 200
+
+# --- 3. LIVE STREAM (Server-Sent Events) ---
+# EventSource can't send headers, so the token may also come as ?jwt=...
+# Each stream holds a worker thread: past SSE_MAX_STREAMS per worker it's 503 + Retry-After
+@notifications_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_notifications():
     current_user_id = get_jwt_identity()
-    # Count where I am recipient AND it is unread
-    count = Notification.query.filter_by(recipient_user_id=current_user_id, is_read=False).count()
-    return jsonify({'unread_count': count}), 200
+    keepalive = current_app.config.get('SSE_KEEPALIVE_SECONDS', 15)
+
+    # Subscribe before the replay so nothing committed in between is lost
+    q = pubsub.broker.subscribe(current_user_id)
+    if q is None:
+        retry_after = current_app.config.get('SSE_RETRY_AFTER', 30)
+        response = jsonify({'error': 'Too many live streams; poll GET /api/users/notifications meanwhile',
+                            'retry_after': retry_after})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 503
+
+    # Replay anything missed since the client's last event (one indexed query per reconnect)
+    backlog = []
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    try:
+        if last_id is not None:
+            missed = Notification.query.filter(Notification.user_id == current_user_id, Notification.id > last_id)\
+                .order_by(Notification.id).limit(MAX_PAGE_SIZE).all()
+            backlog = [pubsub.notification_payload(n) for n in missed]
+    except Exception:
+        pubsub.broker.unsubscribe(current_user_id, q) # Free the slot; generate() never runs
+        raise
+    db.session.remove() # Don't hold a pooled connection for the life of the stream
+    replayed = backlog[-1]['id'] if backlog else -1
+
+    pubsub.backend.start()
+
+    def event(payload):
+        return f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            for payload in backlog:
+                yield event(payload)
+            while True:
+                try:
+                    payload = q.get(timeout=keepalive)
+                    if payload is pubsub.OVERFLOW:
+                        return # Fell behind: EventSource reconnects and replays from Last-Event-ID
+                    if payload['id'] > replayed: # Already sent by the replay
+                        yield event(payload)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            pubsub.broker.unsubscribe(current_user_id, q)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-# --- 3. MARK AS READ ---
-@notifications_bp.route('/<notification_id>/read', methods=['PATCH'])
+# --- 4. MARK AS READ ---
+@notifications_bp.route('/<int:notification_id>/read', methods=['PATCH'])
 @jwt_required()
 def mark_as_read(notification_id):
-    current_user_id = get_jwt_identity()
-    notification = Notification.query.get(notification_id)
-    
-    if not notification:
-        return jsonify({'error': 'Not found'}), 404
-    
-    # Security check: Am I the recipient?
-    if notification.recipient_user_id != current_user_id:
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    notification.is_read = True
-    db.session.commit()
-    
-    return jsonify({'message': 'Marked as read'}), 200
-
-# --- 4. DELETE NOTIFICATION ---
-@notifications_bp.route('/<notification_id>', methods=['DELETE'])
+    try:
+        current_user_id = get_jwt_identity()
+        if not notifications.mark_read(current_user_id, [notification_id]) and \
+                not Notification.query.filter_by(id=notification_id, user_id=current_user_id).count():
+            return jsonify({'error': 'Notification not found'}), 404
+        db.session.commit()
+        return jsonify({'message': 'Marked as read'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# --- 5. MARK MANY / ALL AS READ (One UPDATE each) ---
+@notifications_bp.route('/read', methods=['PATCH'])
+@jwt_required()
+def mark_many_read():
+    try:
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({'error': 'ids must be a list of notification ids'}), 400
+        if len(ids) > MAX_PAGE_SIZE:
+            return jsonify({'error': f'At most {MAX_PAGE_SIZE} ids per call'}), 400
+
+        current_user_id = get_jwt_identity()
+        changed = notifications.mark_read(current_user_id, ids)
+        db.session.commit()
+        return jsonify({'message': 'Marked as read', 'updated': changed, 'unread_count': unread_count(current_user_id)}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@notifications_bp.route('/read-all', methods=['PATCH'])
+@jwt_required()
+def mark_all_read():
+    try:
+        current_user_id = get_jwt_identity()
+        changed = notifications.mark_all_read(current_user_id)
+        db.session.commit()
+        return jsonify({'message': 'All notifications marked as read', 'updated': changed}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# --- 6. CLEAR ALL ---
+@notifications_bp.route('/clear', methods=['DELETE'])
+@jwt_required()
+def clear_all_notifications():
+    try:
+        notifications.clear_all(get_jwt_identity())
+        db.session.commit()
+        return jsonify({'message': 'All notifications cleared'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# --- 7. DELETE NOTIFICATION ---
+@notifications_bp.route('/<int:notification_id>', methods=['DELETE'])
 @jwt_required()
 def delete_notification(notification_id):
-    current_user_id = get_jwt_identity()
-    notification = Notification.query.get(notification_id)
-    
-    if not notification:
-        return jsonify({'error': 'Not found'}), 404
-    
-    if notification.recipient_user_id != current_user_id:
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    db.session.delete(notification)
-    db.session.commit()
-    
-    return jsonify({'message': 'Deleted'}), 200
\ No newline at end of file
+    try:
+        current_user_id = get_jwt_identity()
+        notification = Notification.query.filter_by(id=notification_id, user_id=current_user_id).first()
+        if not notification:
+            return jsonify({'error': 'Not found'}), 404
+
+        db.session.delete(notification) # after_delete hook keeps the unread counter in step
+        db.session.commit()
+        return jsonify({'message': 'Deleted'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-# 🟢 UPDATED: Added Notification to imports
-from models import Invoice, Payment, Lease, User, Unit, Property, Notification
+from models import Invoice, Payment, Lease, User, Unit, Property
+from utils.notifications import notify
 from utils.mpesa import MpesaHandler
+from utils.ratelimit import rate_limit
+from utils.query_stats import query_budget
+from utils.serializers import INVOICE
+from utils import sync, conditional
 from datetime import datetime
 
 payments_bp = Blueprint('payments', __name__)
@@ -44,15 +48,24 @@ def create_invoice():
 
 # --- 2. TENANT: GET MY INVOICES ---
 @payments_bp.route('/my-invoices', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_my_invoices():
     current_user_id = get_jwt_identity()
-    invoices = Invoice.query.filter_by(tenant_id=current_user_id).order_by(Invoice.created_at.desc()).all()
-    return jsonify([i.to_dict() for i in invoices]), 200
+    try:
+        view = INVOICE.view_for(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = view.query().filter(Invoice.tenant_id == current_user_id)
+    if request.args.get('since'):
+        return sync.delta_response(view, query, Invoice, current_user_id, request.args['since'], id_type=int)
+    return sync.with_token(jsonify(view.all(query.order_by(Invoice.created_at.desc())))), 200
 
 # --- 3. INITIATE MPESA PAYMENT ---
 @payments_bp.route('/pay', methods=['POST'])
 @jwt_required()
+@rate_limit('3/minute', by='user')
+@rate_limit('30/minute', by='ip')
 def pay_invoice():
     try:
         data = request.get_json()
@@ -131,11 +144,7 @@ def mpesa_callback():
                 notification_msg = f"💰 Payment Received: KSh {amount} for {prop.name} (Unit {unit.unit_number}). Ref: {receipt}"
                 
                 # Add notification
-                db.session.add(Notification(
-                    user_id=prop.landlord_id,
-                    message=notification_msg,
-                    is_read=False
-                ))
+                notify(prop.landlord_id, notification_msg)
 
             db.session.commit()
             print(f"✅ Payment {receipt} processed successfully for Invoice #{invoice.id}")
@@ -147,4 +156,31 @@ def mpesa_callback():
 
     except Exception as e:
         print("Callback Error:", str(e))
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+# --- 5. GET ONE INVOICE (Conditional: ETag / 304 Not Modified) ---
+@payments_bp.route('/invoices/<int:invoice_id>', methods=['GET'])
+@jwt_required()
+def get_invoice(invoice_id):
+    current_user_id = str(get_jwt_identity())
+    try:
+        view = INVOICE.view_for(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Tenant or landlord only; the same read gives the versions of everything ?expand can show
+    version = db.session.query(Invoice.tenant_id, Property.landlord_id, Invoice.updated_at, Lease.updated_at,
+                               Unit.updated_at, Property.updated_at)\
+        .join(Lease, Lease.id == Invoice.lease_id).join(Unit, Unit.id == Lease.unit_id)\
+        .join(Property, Property.id == Unit.property_id).filter(Invoice.id == invoice_id).first()
+    if not version: return jsonify({'error': 'Invoice not found'}), 404
+    if current_user_id not in (str(version[0]), str(version[1])):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    etag = conditional.etag_for(invoice_id, *version[2:])
+    cached = conditional.not_modified(etag, private=True)
+    if cached: return cached
+    invoice = view.first(view.query().filter(Invoice.id == invoice_id))
+    if not invoice: return jsonify({'error': 'Invoice not found'}), 404
+    return conditional.respond(invoice, etag, private=True)
\ No newline at end of file
@@ -2,7 +2,12 @@ import os
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models import Property, PropertyImage, User
+from models import Property, PropertyImage, User, Unit
+from utils.auth import current_role, current_status
+from utils.ratelimit import rate_limit
+from utils.serializers import PROPERTY
+from utils import conditional
+from sqlalchemy import func
 
 # 🟢 NEW: Cloudinary Imports
 import cloudinary
@@ -27,15 +32,16 @@ def allowed_file(filename):
 # --- 1. CREATE PROPERTY (Cloudinary + Admin Verification) ---
 @properties_bp.route('/', methods=['POST'], strict_slashes=False)
 @jwt_required()
+@rate_limit('10/hour', by='user')
+@rate_limit('30/hour', by='ip')
 def create_property():
     try:
         current_user_id = get_jwt_identity()
         
-        # 1. Validate Landlord
-        landlord = User.query.get(current_user_id)
-        if landlord.role != 'landlord':
+        # 1. Validate Landlord (token claims; a status change revokes the token)
+        if current_role() != 'landlord':
             return jsonify({'error': 'Only landlords can list properties'}), 403
-        if landlord.status != 'active':
+        if current_status() != 'active':
             return jsonify({'error': 'You must be a verified landlord to list properties'}), 403
 
         # 2. Get Text Data
@@ -93,28 +99,58 @@ def create_property():
         print("Upload Error:", e)
         return jsonify({'error': str(e)}), 500
 
+def property_view():
+    # ?fields=id,name,price&expand=landlord,units; the error is the 400 body
+    try:
+        return PROPERTY.view_for(request.args), None
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+
 # --- 2. GET ALL PROPERTIES (Public Marketplace) ---
 @properties_bp.route('/', methods=['GET'], strict_slashes=False)
 def get_properties():
+    view, error = property_view()
+    if error: return error
     # Only show APPROVED properties
-    properties = Property.query.filter_by(status='approved').all()
-    return jsonify([p.to_dict() for p in properties]), 200
+    return jsonify(view.all(view.query().filter(Property.status == 'approved'))), 200
 
-# --- 3. GET SINGLE PROPERTY ---
+def property_version(property_id, expanded):
+    # updated_at of the property and of whatever is expanded into it; None if there's no such property
+    query = db.session.query(Property.updated_at).filter(Property.id == property_id)
+    if 'landlord' in expanded:
+        query = query.join(User, User.id == Property.landlord_id).add_columns(User.updated_at)
+    version = query.first()
+    if version is None:
+        return None
+    if 'units' in expanded:
+        version = tuple(version) + tuple(db.session.query(func.count(Unit.id), func.max(Unit.updated_at))
+                                         .filter(Unit.property_id == property_id).one())
+    return tuple(version)
+
+# --- 3. GET SINGLE PROPERTY (Conditional: ETag / 304 Not Modified) ---
 @properties_bp.route('/<property_id>', methods=['GET'], strict_slashes=False)
 def get_property(property_id):
-    prop = Property.query.get(property_id)
+    view, error = property_view()
+    if error: return error
+    version = property_version(property_id, view.expanded)
+    if version is None: return jsonify({'error': 'Property not found'}), 404
+
+    etag = conditional.etag_for(property_id, *version)
+    cached = conditional.not_modified(etag)
+    if cached: return cached
+    prop = view.first(view.query().filter(Property.id == property_id))
     if not prop: return jsonify({'error': 'Property not found'}), 404
-    return jsonify(prop.to_dict()), 200
+    return conditional.respond(prop, etag)
 
 # --- 4. LANDLORD: GET MY PROPERTIES ---
 @properties_bp.route('/my-properties', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_my_properties():
     current_user_id = get_jwt_identity()
+    view, error = property_view()
+    if error: return error
     # Landlords see ALL their properties (pending, rejected, approved)
-    properties = Property.query.filter_by(landlord_id=current_user_id).all()
-    return jsonify([p.to_dict() for p in properties]), 200
+    return jsonify(view.all(view.query().filter(Property.landlord_id == current_user_id))), 200
 
 @properties_bp.route('/landlord/<user_id>', methods=['GET'], strict_slashes=False)
 @jwt_required()
@@ -124,5 +160,6 @@ def get_properties_by_landlord(user_id):
     
     # Optional: You could check if current_user_id == user_id here for extra security
     
-    properties = Property.query.filter_by(landlord_id=user_id).all()
-    return jsonify([p.to_dict() for p in properties]), 200
\ No newline at end of file
+    view, error = property_view()
+    if error: return error
+    return jsonify(view.all(view.query().filter(Property.landlord_id == user_id))), 200
\ No newline at end of file
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from extensions import db
 from models import Unit, Property, User
+from utils.auth import current_role
 
 units_bp = Blueprint('units', __name__)
 
@@ -37,14 +38,14 @@ def create_unit():
             rent_amount:
               type: number
     """
-    current_user = User.query.get(get_jwt_identity())
+    current_user_id = get_jwt_identity()
     data = request.get_json()
     
     property = Property.query.get(data.get('property_id'))
     if not property:
         return jsonify({'error': 'Property not found'}), 404
     
-    if property.landlord_id != current_user.id and current_user.role != 'admin':
+    if property.landlord_id != current_user_id and current_role() != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
     required_fields = ['property_id', 'unit_number', 'rent_amount']
@@ -108,14 +109,14 @@ def update_unit(unit_id):
             status:
               type: string
     """
-    current_user = User.query.get(get_jwt_identity())
+    current_user_id = get_jwt_identity()
     unit = Unit.query.get(unit_id)
     
     if not unit:
         return jsonify({'error': 'Unit not found'}), 404
     
     property = unit.property
-    if property.landlord_id != current_user.id and current_user.role != 'admin':
+    if property.landlord_id != current_user_id and current_role() != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
     data = request.get_json()
@@ -1,8 +1,8 @@
-import os
+from urllib.parse import urljoin
 from flask import Blueprint, request, jsonify, send_from_directory, current_app
 from flask_jwt_extended import jwt_required
-from werkzeug.utils import secure_filename
-import uuid
+from utils.storage import get_storage
+from utils.ratelimit import rate_limit
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -14,6 +14,8 @@ def allowed_file(filename):
 # --- 1. UPLOAD ENDPOINT ---
 @upload_bp.route('', methods=['POST'])
 @jwt_required()
+@rate_limit('30/hour', by='user')
+@rate_limit('60/hour', by='ip')
 def upload_file():
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
@@ -24,18 +26,11 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
         
     if file and allowed_file(file.filename):
-        # Create unique filename to prevent overwrites
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4().hex}.{ext}"
-        
-        # Save to the configured upload folder
-        save_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(save_path)
-        
-        # Return the URL for the frontend to store
-        # Assumes backend runs on port 5000
-        file_url = f"http://localhost:5000/uploads/{filename}"
-        
+        # Storage backend picks a unique name (local folder or Cloudinary)
+        _, file_url = get_storage().save(file)
+        # Clients store this URL as is, so local files get an absolute one (Cloudinary's already are)
+        file_url = urljoin(request.host_url, file_url)
+
         return jsonify({'message': 'File uploaded successfully', 'url': file_url}), 201
     
     return jsonify({'error': 'File type not allowed'}), 400
@@ -1,115 +1,80 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, jsonify, url_for, current_app
+from flask_jwt_extended import jwt_required
 from extensions import db
-from models import User, Notification, Lease, MaintenanceRequest, Property, Unit
+from models import AccountDeletionJob
+from utils.auth import get_current_user, bump_token_version
+from utils.background import run_in_background
+from utils.account_purge import purge_account, claim
+from utils.replica import use_primary
+from utils.query_stats import query_budget
+from utils import conditional
 
 users_bp = Blueprint('users', __name__)
 
 # --- 1. GET PROFILE ---
 @users_bp.route('/profile', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 def get_profile():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
-    return jsonify({
+    etag = conditional.etag_for(user.id, user.updated_at)
+    return conditional.not_modified(etag, private=True) or conditional.respond({
         'id': user.id,
         'full_name': user.full_name,
         'email': user.email,
         'role': user.role,
         'phone_number': user.phone_number
-    }), 200
-
-# --- 2. GET NOTIFICATIONS ---
-@users_bp.route('/notifications', methods=['GET'])
-@jwt_required()
-def get_notifications():
-    try:
-        current_user_id = get_jwt_identity()
-        notifications = Notification.query.filter_by(user_id=current_user_id)\
-            .order_by(Notification.created_at.desc()).all()
-        
-        result = [{
-            'id': n.id,
-            'message': n.message,
-            'is_read': n.is_read,
-            'created_at': n.created_at.isoformat()
-        } for n in notifications]
-        
-        return jsonify(result), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    }, etag, private=True)
 
-# --- 3. MARK NOTIFICATION READ ---
-@users_bp.route('/notifications/<int:notification_id>/read', methods=['PATCH'])
-@jwt_required()
-def mark_read(notification_id):
-    try:
-        current_user_id = get_jwt_identity()
-        notification = Notification.query.get(notification_id)
-        if not notification or str(notification.user_id) != str(current_user_id):
-            return jsonify({'error': 'Notification not found'}), 404 
-        notification.is_read = True
-        db.session.commit()
-        return jsonify({'message': 'Marked as read'}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+# Notification endpoints live in routes/notifications.py (also mounted at /api/users/notifications)
 
-# --- 4. CLEAR ALL NOTIFICATIONS ---
-@users_bp.route('/notifications/clear', methods=['DELETE'])
-@jwt_required()
-def clear_all_notifications():
-    try:
-        current_user_id = get_jwt_identity()
-        Notification.query.filter_by(user_id=current_user_id).delete()
-        db.session.commit()
-        return jsonify({'message': 'All notifications cleared'}), 200
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+# --- 2. DELETE ACCOUNT (Disabled now, purged in the background) ---
+def deletion_accepted(message, job):
+    # The purge may already have moved the job on (or finished it, when run inline): re-read it
+    db.session.refresh(job)
+    return jsonify({
+        'message': message,
+        'job': job.to_dict(),
+        'status_url': url_for('users.get_deletion_job', job_id=job.id)
+    }), 202
 
-# --- 5. DELETE ACCOUNT (🟢 NEW & CRITICAL) ---
 @users_bp.route('/profile', methods=['DELETE'])
 @jwt_required()
 def delete_account():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
+        user = get_current_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        # 🟢 MANUAL CLEANUP (Prevent Foreign Key Errors)
-        
-        # 1. Delete Notifications
-        Notification.query.filter_by(user_id=current_user_id).delete()
-
-        # 2. Delete Maintenance Requests (Tenant or Landlord side handled via relationships usually, but explicit is safer)
-        if user.role == 'tenant':
-            MaintenanceRequest.query.filter_by(tenant_id=current_user_id).delete()
-            Lease.query.filter_by(tenant_id=current_user_id).delete()
-        
-        elif user.role == 'landlord':
-            # This is destructive: Deleting a landlord deletes their Properties -> Units -> Leases -> Requests
-            properties = Property.query.filter_by(landlord_id=current_user_id).all()
-            for prop in properties:
-                # Get all units for this property
-                units = Unit.query.filter_by(property_id=prop.id).all()
-                for unit in units:
-                    # Delete requests & leases for unit
-                    MaintenanceRequest.query.filter_by(unit_id=unit.id).delete()
-                    Lease.query.filter_by(unit_id=unit.id).delete()
-                    db.session.delete(unit)
-                db.session.delete(prop)
-
-        # 3. Finally, Delete the User
-        db.session.delete(user)
+        # Lock the account out right away: new logins are refused and existing tokens stop working
+        user.status = 'deleting'
+        bump_token_version(user)
+        job = AccountDeletionJob(user_id=user.id)
+        db.session.add(job)
         db.session.commit()
-        
-        return jsonify({'message': 'Account and all associated data deleted successfully'}), 200
+
+        run_in_background('account_purge', purge_account, user.id, job.id)
+        return deletion_accepted('Account disabled. Your data is being deleted.', job)
 
     except Exception as e:
         db.session.rollback()
-        print(f"Delete Error: {str(e)}") # Print error to terminal for debugging
-        return jsonify({'error': f"Failed to delete account: {str(e)}"}), 500
\ No newline at end of file
+        current_app.logger.exception("Account deletion failed")
+        return jsonify({'error': f"Failed to delete account: {str(e)}"}), 500
+
+# --- 3. DELETION PROGRESS ---
+# No login: the account's tokens were revoked the moment deletion started. The job id is the secret
+# instead, a random UUID handed only to the account owner in the 202 above; the job exposes progress
+# counters, never personal data. Polling also resumes a failed or stalled purge (as does
+# flask accounts resume-purges from cron).
+@users_bp.route('/deletion-jobs/<job_id>', methods=['GET'])
+@use_primary # Polled for progress the background purge just wrote
+def get_deletion_job(job_id):
+    job = AccountDeletionJob.query.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'done' and claim(job.id):
+        run_in_background('account_purge', purge_account, job.user_id, job.id)
+        db.session.refresh(job)
+    return jsonify(job.to_dict()), 200
@@ -3,31 +3,39 @@ from app import create_app
 from extensions import db
 # 🟢 UPDATED: Removed RentInvoice, Added Invoice
 from models import User, Property, Unit, Lease, Notification, MaintenanceRequest, Invoice, Payment, PropertyImage
+from utils import snapshots
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
+import sys
 import uuid
 
 app = create_app()
 
+# Snapshot of the freshly seeded database (see utils/snapshots.py); also used by the force-seed route
+SEED_SNAPSHOT = 'seed'
+
 def seed_database():
     with app.app_context():
         print("🚀 Starting PostgreSQL-Compatible Seed...")
         
         # 1. THE POSTGRESQL CASCADE FIX
         print("🧹 Dropping tables with CASCADE...")
-        db.session.execute(db.text('''
-            DROP TABLE IF EXISTS payments CASCADE;
-            DROP TABLE IF EXISTS invoices CASCADE;  -- 🟢 NEW TABLE
-            DROP TABLE IF EXISTS rent_invoices CASCADE; -- 🟢 OLD TABLE (Cleanup)
-            DROP TABLE IF EXISTS maintenance_requests CASCADE;
-            DROP TABLE IF EXISTS notifications CASCADE;
-            DROP TABLE IF EXISTS leases CASCADE;
-            DROP TABLE IF EXISTS units CASCADE;
-            DROP TABLE IF EXISTS property_images CASCADE;
-            DROP TABLE IF EXISTS properties CASCADE;
-            DROP TABLE IF EXISTS users CASCADE;
-        '''))
-        db.session.commit()
+        if db.engine.dialect.name != 'postgresql':
+            db.drop_all() # SQLite (tests, demos) has no CASCADE
+        else:
+            db.session.execute(db.text('''
+                DROP TABLE IF EXISTS payments CASCADE;
+                DROP TABLE IF EXISTS invoices CASCADE;  -- 🟢 NEW TABLE
+                DROP TABLE IF EXISTS rent_invoices CASCADE; -- 🟢 OLD TABLE (Cleanup)
+                DROP TABLE IF EXISTS maintenance_requests CASCADE;
+                DROP TABLE IF EXISTS notifications CASCADE;
+                DROP TABLE IF EXISTS leases CASCADE;
+                DROP TABLE IF EXISTS units CASCADE;
+                DROP TABLE IF EXISTS property_images CASCADE;
+                DROP TABLE IF EXISTS properties CASCADE;
+                DROP TABLE IF EXISTS users CASCADE;
+            '''))
+            db.session.commit()
 
         print("🏗️ Rebuilding database schema...")
         db.create_all()
@@ -287,5 +295,16 @@ def seed_database():
 
         print("✅ Perfect Seed Complete! Database is ready.")
 
+def reset_database(rebuild=False):
+    """Restore the seed snapshot, or seed from scratch (and snapshot it) when there is none."""
+    with app.app_context():
+        if not rebuild and snapshots.restore(SEED_SNAPSHOT):
+            print("⚡ Restored seed snapshot.")
+            return
+    seed_database()
+    with app.app_context():
+        snapshots.save(SEED_SNAPSHOT)
+        print("📸 Saved seed snapshot; next reset restores it.")
+
 if __name__ == '__main__':
-    seed_database()
\ No newline at end of file
+    reset_database(rebuild='--rebuild' in sys.argv)
\ No newline at end of file
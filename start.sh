@@ -4,5 +4,5 @@ echo "Running database migrations..."
 flask db upgrade
 
 echo "Starting gunicorn..."
-gunicorn wsgi:app
+gunicorn wsgi:app --worker-class gthread --threads 8
 
@@ -0,0 +1,81 @@
+import itertools
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    os.environ.setdefault('METRICS_ENABLED', 'false')
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['RATELIMIT_ENABLED'] = False
+    app.config['BACKGROUND_TASKS_INLINE'] = True # Jobs share the test's connection (see rolled_back)
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000' # Cheap hashes; test_passwords covers the rest
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def rolled_back(app):
+    """Everything the test writes, through the test client included, is rolled back when it ends."""
+    from utils import snapshots
+
+    with app.app_context():
+        with snapshots.rolled_back() as connection:
+            yield connection
+
+
+_emails = itertools.count()
+
+
+@pytest.fixture
+def make_user(rolled_back):
+    """make_user(role, status='active') -> (user id, Authorization headers for that user)."""
+    from flask_jwt_extended import create_access_token
+    from extensions import db
+    from models import User
+    from utils.auth import token_claims
+
+    def make(role='tenant', status='active', **fields):
+        user = User(email=f'{role}{next(_emails)}@homehub.test', full_name=f'Test {role.title()}',
+                    role=role, status=status, password_hash='x', **fields)
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=user.id, additional_claims=token_claims(user))
+        return user.id, {'Authorization': f'Bearer {token}'}
+    return make
+
+
+@pytest.fixture
+def tenancy(make_user):
+    """A landlord's approved property with one unit, let to a tenant on an active lease."""
+    from types import SimpleNamespace
+    from extensions import db
+    from models import Property, Unit, Lease
+
+    landlord_id, landlord = make_user('landlord')
+    tenant_id, tenant = make_user('tenant')
+    prop = Property(landlord_id=landlord_id, name='Test Court', price=25000, status='approved')
+    db.session.add(prop)
+    db.session.flush()
+    unit = Unit(property_id=prop.id, unit_number='A1', rent_amount=25000, status='occupied')
+    db.session.add(unit)
+    db.session.flush()
+    lease = Lease(unit_id=unit.id, tenant_id=tenant_id, rent_amount=25000, status='active')
+    db.session.add(lease)
+    db.session.commit()
+    return SimpleNamespace(landlord_id=landlord_id, landlord=landlord, tenant_id=tenant_id, tenant=tenant,
+                           property_id=prop.id, unit_id=unit.id, lease_id=lease.id)
@@ -0,0 +1,35 @@
+from extensions import db
+from models import AccountDeletionJob, User
+
+
+def _exists(user_id):
+    return db.session.query(User.id).filter_by(id=user_id).first() is not None
+
+def test_delete_account_purges_and_reports_progress(client, tenancy):
+    r = client.delete('/api/users/profile', headers=tenancy.tenant)
+    assert r.status_code == 202
+    body = r.get_json()
+    assert body['job']['status'] == 'done' # Background tasks run inline under test
+    assert not _exists(tenancy.tenant_id)
+
+    r = client.get(body['status_url'])
+    assert r.status_code == 200
+    assert r.get_json()['status'] == 'done'
+    assert client.get('/api/users/profile', headers=tenancy.tenant).status_code == 401
+
+
+def test_polling_resumes_a_failed_purge(client, tenancy):
+    db.session.get(User, tenancy.tenant_id).status = 'deleting'
+    job = AccountDeletionJob(user_id=tenancy.tenant_id, status='failed', error='worker restarted')
+    db.session.add(job)
+    db.session.commit()
+
+    r = client.get(f'/api/users/deletion-jobs/{job.id}')
+    assert r.status_code == 200
+    assert r.get_json()['status'] == 'done'
+    assert r.get_json()['error'] is None
+    assert not _exists(tenancy.tenant_id)
+
+
+def test_unknown_job_is_404(client):
+    assert client.get('/api/users/deletion-jobs/00000000-0000-4000-8000-000000000000').status_code == 404
@@ -0,0 +1,38 @@
+import io
+import os
+from PIL import Image
+from models import MaintenanceRequest
+
+
+def _png():
+    buf = io.BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(buf, 'PNG')
+    buf.seek(0)
+    return buf
+
+
+def test_failed_create_removes_stored_photos(app, client, tenancy, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.config, 'STORAGE_BACKEND', 'local')
+
+    def broken_notify(*args, **kwargs):
+        raise RuntimeError('notification backend down')
+    monkeypatch.setattr('routes.maintenance.notify', broken_notify)
+
+    r = client.post('/api/maintenance', headers=tenancy.tenant, content_type='multipart/form-data',
+                    data={'title': 'Leak', 'description': 'Tap', 'attachments': [(_png(), 'a.png'), (_png(), 'b.png')]})
+    assert r.status_code == 500
+    assert os.listdir(tmp_path) == []
+    assert MaintenanceRequest.query.count() == 0
+
+
+def test_created_request_keeps_its_photos(app, client, tenancy, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.config, 'STORAGE_BACKEND', 'local')
+
+    r = client.post('/api/maintenance', headers=tenancy.tenant, content_type='multipart/form-data',
+                    data={'title': 'Leak', 'description': 'Tap', 'attachments': [(_png(), 'a.png')]})
+    assert r.status_code == 201
+    [attachment] = r.get_json()['request']['attachments']
+    assert attachment['image_url']
+    assert len(os.listdir(tmp_path)) == 2 # The photo and its thumbnail (built inline here)
@@ -0,0 +1,22 @@
+from utils import auth
+
+
+def test_version_cache_is_bounded_lru(app, monkeypatch):
+    monkeypatch.setattr(auth, '_versions', type(auth._versions)())
+    monkeypatch.setitem(app.config, 'TOKEN_VERSION_CACHE_SIZE', 2)
+    with app.app_context():
+        auth._remember_version('a', 1)
+        auth._remember_version('b', 2)
+        assert auth._cached_version('a') == 1 # 'a' is now the most recent
+        auth._remember_version('c', 3)
+    assert list(auth._versions) == ['a', 'c']
+    assert auth._cached_version('b') is None
+
+
+def test_expired_versions_are_dropped_on_read(app, monkeypatch):
+    monkeypatch.setattr(auth, '_versions', type(auth._versions)())
+    monkeypatch.setitem(app.config, 'TOKEN_VERSION_TTL', 0)
+    with app.app_context():
+        auth._remember_version('a', 1)
+    assert auth._cached_version('a') is None
+    assert 'a' not in auth._versions
@@ -0,0 +1,88 @@
+from datetime import datetime
+import pytest
+from extensions import db
+from models import User, Property, Unit, Lease, Invoice
+
+
+def _revalidate(client, path, headers=None, **params):
+    """(ETag of a fresh GET, status of a conditional GET sending it back)."""
+    headers = headers or {}
+    r = client.get(path, headers=headers, query_string=params)
+    assert r.status_code == 200
+    etag = r.headers['ETag']
+    assert etag.startswith('W/')
+    again = client.get(path, headers={**headers, 'If-None-Match': etag}, query_string=params)
+    if again.status_code == 304:
+        assert again.headers['ETag'] == etag
+        assert again.data == b''
+    return etag, again.status_code
+
+
+@pytest.fixture
+def invoice_id(tenancy):
+    invoice = Invoice(lease_id=tenancy.lease_id, tenant_id=tenancy.tenant_id, amount=25000,
+                      description='Rent - October', due_date=datetime.utcnow())
+    db.session.add(invoice)
+    db.session.commit()
+    return invoice.id
+
+
+def test_me_and_profile(client, tenancy):
+    for path in ('/api/auth/me', '/api/users/profile'):
+        etag, status = _revalidate(client, path, tenancy.tenant)
+        assert status == 304
+
+    db.session.get(User, tenancy.tenant_id).full_name = 'Renamed Tenant'
+    db.session.commit()
+    for path in ('/api/auth/me', '/api/users/profile'):
+        r = client.get(path, headers={**tenancy.tenant, 'If-None-Match': etag})
+        assert r.status_code == 200
+        assert r.get_json()['full_name'] == 'Renamed Tenant'
+
+
+def test_lease(client, tenancy):
+    path = f'/api/leases/{tenancy.lease_id}'
+    etag, status = _revalidate(client, path, tenancy.tenant)
+    assert status == 304
+
+    db.session.get(Lease, tenancy.lease_id).status = 'terminated'
+    db.session.commit()
+    newer, status = _revalidate(client, path, tenancy.tenant)
+    assert newer != etag and status == 304
+
+    db.session.get(Property, tenancy.property_id).name = 'Renamed Court' # Shown on the lease too
+    db.session.commit()
+    assert _revalidate(client, path, tenancy.tenant)[0] != newer
+
+
+def test_invoice(client, tenancy, invoice_id):
+    path = f'/api/payments/invoices/{invoice_id}'
+    etag, status = _revalidate(client, path, tenancy.tenant)
+    assert status == 304
+    assert _revalidate(client, path, tenancy.landlord)[0] == etag # Same representation for both parties
+
+    db.session.get(Invoice, invoice_id).status = 'paid'
+    db.session.commit()
+    r = client.get(path, headers={**tenancy.tenant, 'If-None-Match': etag})
+    assert r.status_code == 200
+    assert r.get_json()['status'] == 'paid'
+    assert r.headers['ETag'] != etag
+
+
+def test_property(client, tenancy):
+    path = f'/api/properties/{tenancy.property_id}'
+    etag, status = _revalidate(client, path)
+    assert status == 304
+    expanded, status = _revalidate(client, path, expand='units')
+    assert expanded != etag and status == 304 # ?expand changes the representation
+
+    db.session.get(Unit, tenancy.unit_id).status = 'vacant'
+    db.session.commit()
+    assert _revalidate(client, path)[0] == etag # Units aren't part of the plain representation
+    assert _revalidate(client, path, expand='units')[0] != expanded
+
+    db.session.get(Property, tenancy.property_id).price = 30000
+    db.session.commit()
+    r = client.get(path, headers={'If-None-Match': etag})
+    assert r.status_code == 200
+    assert r.get_json()['price'] == 30000
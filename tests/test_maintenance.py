@@ -0,0 +1,23 @@
+from extensions import db
+from models import MaintenanceRequest
+
+
+def _requests(tenancy, ack_values):
+    for ack in ack_values:
+        db.session.add(MaintenanceRequest(tenant_id=tenancy.tenant_id, unit_id=tenancy.unit_id, title='Leak',
+                                          description='Kitchen tap', status='resolved',
+                                          ack_seconds=ack, resolution_seconds=ack * 10))
+    db.session.commit()
+
+
+def test_stats_report_sla_percentiles_per_property(client, tenancy):
+    _requests(tenancy, [10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
+
+    r = client.get('/api/maintenance/stats', headers=tenancy.landlord)
+    assert r.status_code == 200
+    [entry] = r.get_json()['properties']
+    assert entry['property_id'] == tenancy.property_id
+    assert entry['open_total'] == 0
+    assert entry['ack_seconds'] == {'median': 50, 'p90': 90}
+    assert entry['resolution_seconds'] == {'median': 500, 'p90': 900}
+
@@ -0,0 +1,37 @@
+from utils import pubsub
+
+
+def _payload(user_id, notification_id):
+    return {'id': notification_id, 'user_id': user_id, 'message': f'n{notification_id}', 'is_read': False,
+            'created_at': None}
+
+
+def test_overflowing_subscriber_gets_end_of_stream_marker():
+    broker = pubsub.Broker(max_queue=2)
+    q = broker.subscribe('u1')
+    for i in range(1, 4):
+        broker.dispatch(_payload('u1', i))
+    assert q.get_nowait() is pubsub.OVERFLOW
+    assert q.empty()
+
+
+def test_stream_ends_when_client_falls_behind(client, make_user, monkeypatch):
+    user_id, headers = make_user('tenant')
+    monkeypatch.setattr(pubsub.broker, 'max_queue', 1)
+    r = client.get('/api/notifications/stream', headers=headers, buffered=False)
+    chunks = iter(r.response)
+    assert next(chunks).startswith(b'retry:')
+
+    pubsub.broker.dispatch(_payload(user_id, 1))
+    pubsub.broker.dispatch(_payload(user_id, 2)) # Doesn't fit
+    assert list(chunks) == [] # Stream closed, nothing half-sent; the browser reconnects and replays
+    r.close()
+    assert pubsub.broker.subscriber_count() == 0
+
+
+def test_stream_cap_returns_503_with_retry_after(app, client, make_user, monkeypatch):
+    _, headers = make_user('tenant')
+    monkeypatch.setattr(pubsub.broker, 'max_streams', 0)
+    r = client.get('/api/notifications/stream', headers=headers)
+    assert r.status_code == 503
+    assert r.headers['Retry-After'] == str(app.config['SSE_RETRY_AFTER'])
@@ -0,0 +1,140 @@
+from extensions import db
+from models import User
+from utils import notifications
+
+
+def _notify(user_id, count):
+    payloads = notifications.notify_many([(user_id, f'Message {i}') for i in range(count)])
+    db.session.commit()
+    return [p['id'] for p in payloads]
+
+
+def _counter(user_id):
+    db.session.expire_all()
+    return db.session.get(User, user_id).unread_notifications
+
+
+def _badge(client, headers):
+    return client.get('/api/notifications/unread', headers=headers).get_json()['unread_count']
+
+
+def test_unread_counter_follows_notify_read_delete_and_clear(client, make_user):
+    user_id, headers = make_user('tenant')
+    ids = _notify(user_id, 4)
+    assert _counter(user_id) == 4
+    assert _badge(client, headers) == 4
+
+    assert client.patch(f'/api/notifications/{ids[0]}/read', headers=headers).status_code == 200
+    assert client.patch(f'/api/notifications/{ids[0]}/read', headers=headers).status_code == 200 # No double count
+    assert _badge(client, headers) == 3
+
+    assert client.delete(f'/api/notifications/{ids[1]}', headers=headers).status_code == 200 # Unread one
+    assert _badge(client, headers) == 2
+    assert client.delete(f'/api/notifications/{ids[0]}', headers=headers).status_code == 200 # Already read
+    assert _badge(client, headers) == 2
+
+    assert client.delete('/api/notifications/clear', headers=headers).status_code == 200
+    assert _badge(client, headers) == 0
+    assert _counter(user_id) == 0
+
+
+def test_counter_is_per_recipient(client, make_user):
+    first_id, first = make_user('tenant')
+    second_id, second = make_user('tenant')
+    notifications.notify_many([(first_id, 'a'), (first_id, 'b'), (second_id, 'c')])
+    db.session.commit()
+    assert _badge(client, first) == 2
+    assert _badge(client, second) == 1
+
+
+def test_cursor_pages_cover_every_notification_once(client, make_user):
+    user_id, headers = make_user('tenant')
+    ids = _notify(user_id, 5) # One batch: equal created_at, so the id tie-break carries the order
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        r = client.get('/api/notifications', headers=headers, query_string=params)
+        assert r.status_code == 200
+        assert r.headers['X-Unread-Count'] == '5'
+        seen += [n['id'] for n in r.get_json()]
+        pages += 1
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_bad_cursor_is_400(client, make_user):
+    _, headers = make_user('tenant')
+    for cursor in ('not-a-cursor', 'Zm9vfGJhcg=='): # Garbage, and base64 of "foo|bar"
+        r = client.get('/api/notifications', headers=headers, query_string={'cursor': cursor})
+        assert r.status_code == 400
+        assert r.get_json() == {'error': 'Invalid cursor'}
+
+
+def test_mark_many_read_validates_ids(client, make_user):
+    from utils.pagination import MAX_PAGE_SIZE
+    _, headers = make_user('tenant')
+    for body in ({}, {'ids': 5}, {'ids': '1,2'}, {'ids': [1, '2']}, {'ids': [1.5]},
+                 {'ids': list(range(MAX_PAGE_SIZE + 1))}):
+        r = client.patch('/api/notifications/read', headers=headers, json=body)
+        assert r.status_code == 400, body
+
+
+def test_mark_many_read_only_touches_callers_notifications(client, make_user):
+    user_id, headers = make_user('tenant')
+    other_id, other = make_user('tenant')
+    mine = _notify(user_id, 3)
+    theirs = _notify(other_id, 2)
+
+    r = client.patch('/api/notifications/read', headers=headers, json={'ids': mine[:2] + theirs})
+    assert r.status_code == 200
+    assert r.get_json()['updated'] == 2
+    assert r.get_json()['unread_count'] == 1
+    assert _badge(client, other) == 2
+
+    r = client.patch('/api/notifications/read', headers=headers, json={'ids': mine}) # Two already read
+    assert r.get_json()['updated'] == 1
+    assert r.get_json()['unread_count'] == 0
+
+    r = client.patch('/api/notifications/read', headers=headers, json={'ids': []})
+    assert r.status_code == 200
+    assert r.get_json()['updated'] == 0
+
+
+def test_mark_all_read_reports_updated_and_leaves_others_alone(client, make_user):
+    user_id, headers = make_user('tenant')
+    other_id, other = make_user('tenant')
+    ids = _notify(user_id, 3)
+    _notify(other_id, 2)
+    client.patch(f'/api/notifications/{ids[0]}/read', headers=headers)
+
+    r = client.patch('/api/notifications/read-all', headers=headers)
+    assert r.status_code == 200
+    assert r.get_json()['updated'] == 2
+    assert _badge(client, headers) == 0
+    assert _counter(user_id) == 0
+    assert _badge(client, other) == 2
+
+    assert client.patch('/api/notifications/read-all', headers=headers).get_json()['updated'] == 0
+
+
+def test_archived_notifications_leave_tombstones(app, make_user):
+    from datetime import datetime, timedelta
+    from sqlalchemy import update
+    from models import Notification, NotificationArchive, Tombstone
+    from utils.notification_retention import archive_read_notifications
+
+    user_id, _ = make_user('tenant')
+    old, recent = _notify(user_id, 2)
+    db.session.execute(update(Notification).where(Notification.id == old)
+                       .values(is_read=True, created_at=datetime.utcnow() - timedelta(days=400)))
+    db.session.commit()
+
+    assert archive_read_notifications(days=30) == 1
+    assert db.session.get(NotificationArchive, old) is not None
+    assert db.session.scalars(db.select(Tombstone.object_id).filter_by(user_id=user_id, kind='notifications'))\
+        .all() == [str(old)]
@@ -0,0 +1,26 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from utils import passwords
+
+
+@pytest.mark.parametrize('method', [
+    'scrypt', 'scrypt:32768:8:1', 'scrypt:16384:8:1',
+    'pbkdf2', 'pbkdf2:sha256', 'pbkdf2:sha256:1000',
+])
+def test_hash_made_with_configured_method_is_current(app, method, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', method)
+    with app.app_context():
+        assert not passwords.needs_rehash(passwords.hash_password('secret'))
+
+
+def test_shorthand_matches_its_expanded_form(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'scrypt')
+    with app.app_context():
+        assert not passwords.needs_rehash(generate_password_hash('secret', 'scrypt:32768:8:1'))
+
+
+def test_other_parameters_need_rehash(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    with app.app_context():
+        assert passwords.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:2000'))
+        assert passwords.needs_rehash(generate_password_hash('secret', 'scrypt'))
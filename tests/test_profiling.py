@@ -0,0 +1,29 @@
+import cProfile
+import pstats
+import threading
+from utils.profiling import to_speedscope, MAX_NODES
+
+
+def test_real_request_profile_converts_within_time_limit(client, make_user):
+    _, headers = make_user('admin')
+    profiler = cProfile.Profile()
+    profiler.enable()
+    r = client.get('/api/admin/stats', headers=headers)
+    profiler.disable()
+    assert r.status_code == 200
+    stats = pstats.Stats(profiler)
+
+    # In a thread, so a regression to unbounded unfolding fails instead of hanging the suite
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(to_speedscope(stats, 'GET /api/admin/stats')),
+                              daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive(), 'speedscope conversion took over 10 s'
+
+    profile = result['profiles'][0]
+    assert 0 < len(profile['samples']) == len(profile['weights']) <= MAX_NODES
+    # The profiled time is all still there (approximately: under recursion cProfile's edge totals overlap)
+    total = sum(row[2] for row in stats.stats.values())
+    assert profile['endValue'] == sum(profile['weights'])
+    assert abs(profile['endValue'] - total) < 0.1 * total
@@ -0,0 +1,12 @@
+def test_public_landlord_expansion_has_no_contact_details(client, tenancy):
+    from extensions import db
+    from models import User
+    db.session.get(User, tenancy.landlord_id).phone_number = '0711111111'
+    db.session.commit()
+
+    for path in (f'/api/properties/{tenancy.property_id}', '/api/properties/'):
+        r = client.get(path, query_string={'expand': 'landlord'})
+        assert r.status_code == 200
+        body = r.get_json()
+        listing = body if isinstance(body, dict) else next(p for p in body if p['id'] == tenancy.property_id)
+        assert listing['landlord'] == {'id': tenancy.landlord_id, 'full_name': 'Test Landlord'}
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from utils.query_stats import QueryBudgetExceeded
+
+
+@pytest.fixture(scope='module')
+def instrumented(tmp_path_factory):
+    """An app with QUERY_INSTRUMENTATION and QUERY_BUDGET_ENFORCE on, over its own throwaway database.
+
+    Not the shared rolled-back one: its savepoints would count against every budget.
+    """
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from models import User, Property, Unit, Lease, Invoice
+    from utils import notifications
+    from utils.auth import token_claims
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('DATABASE_URL', f"sqlite:///{tmp_path_factory.mktemp('budgets') / 'budgets.db'}")
+        mp.setenv('QUERY_INSTRUMENTATION', 'true')
+        mp.setenv('QUERY_BUDGET_ENFORCE', 'true')
+        app = create_app()
+    app.config.update(TESTING=True, RATELIMIT_ENABLED=False)
+
+    with app.app_context():
+        db.create_all()
+        users = {role: User(email=f'{role}@budgets.test', full_name=f'Budget {role.title()}', role=role,
+                            status='active' if role != 'landlord' else 'pending', password_hash='x')
+                 for role in ('admin', 'landlord', 'tenant')}
+        db.session.add_all(users.values())
+        db.session.flush()
+        prop = Property(landlord_id=users['landlord'].id, name='Budget Court', price=20000, status='pending')
+        db.session.add(prop)
+        db.session.flush()
+        unit = Unit(property_id=prop.id, unit_number='B1', rent_amount=20000, status='occupied')
+        db.session.add(unit)
+        db.session.flush()
+        lease = Lease(unit_id=unit.id, tenant_id=users['tenant'].id, rent_amount=20000, status='active')
+        db.session.add(lease)
+        db.session.flush()
+        for month in range(3):
+            db.session.add(Invoice(lease_id=lease.id, tenant_id=users['tenant'].id, amount=20000,
+                                   description=f'Rent {month}', due_date=datetime.utcnow() - timedelta(days=30 * month)))
+        notifications.notify_many([(users['tenant'].id, f'Message {i}') for i in range(5)])
+        db.session.commit()
+        headers = {role: {'Authorization': f"Bearer {create_access_token(identity=u.id, additional_claims=token_claims(u))}"}
+                       for role, u in users.items()}
+    return SimpleNamespace(app=app, headers=headers)
+
+
+@pytest.mark.parametrize('role, path', [
+    ('tenant', '/api/auth/me'),
+    ('tenant', '/api/users/profile'),
+    ('tenant', '/api/notifications'),
+    ('tenant', '/api/notifications/unread'),
+    ('tenant', '/api/payments/my-invoices'),
+    ('admin', '/api/admin/landlords/pending'),
+    ('admin', '/api/admin/properties/pending'),
+])
+def test_budgeted_endpoints_stay_within_budget(instrumented, role, path):
+    from utils import auth
+    auth.forget_token_versions(None) # Cold cache: the token check's user read counts too
+    r = instrumented.app.test_client().get(path, headers=instrumented.headers[role])
+    assert r.status_code == 200
+    assert 'queries' in r.headers['Server-Timing']
+
+
+def test_going_over_budget_raises(instrumented, monkeypatch):
+    view = instrumented.app.view_functions['notifications.get_unread_count']
+    monkeypatch.setattr(view, '_query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded):
+        instrumented.app.test_client().get('/api/notifications/unread', headers=instrumented.headers['tenant'])
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_read_endpoints_use_indexes(tmp_path):
+    # Own process and database: the dataset is bulk-loaded outside any test transaction. Below about
+    # this scale SQLite's planner rightly prefers scanning the smallest tables.
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'plans.db'}", METRICS_ENABLED='false')
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'benchmarks', 'query_plans.py'), '--scale', '0.02'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'No full table scans.' in result.stdout
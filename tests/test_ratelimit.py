@@ -0,0 +1,39 @@
+import pytest
+from utils import ratelimit
+
+
+@pytest.fixture
+def limited(app, monkeypatch):
+    """Rate limiting on, with fresh in-memory buckets."""
+    monkeypatch.setitem(app.config, 'RATELIMIT_ENABLED', True)
+    monkeypatch.setattr(ratelimit, '_store', ratelimit.MemoryStore())
+
+
+def _login(client, email, ip):
+    return client.post('/api/auth/login', json={'email': email, 'password': 'wrong'},
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+def test_login_is_limited_per_email_across_ips(app, client, limited):
+    for i in range(5):
+        assert _login(client, 'victim@homehub.test', f'10.0.0.{i}').status_code == 401
+    r = _login(client, 'VICTIM@homehub.test', '10.0.0.99') # New IP, same account (case-folded)
+    assert r.status_code == 429
+    assert 1 <= int(r.headers['Retry-After']) <= 12 # One token refills every 12s at 5/minute
+    assert _login(client, 'someone-else@homehub.test', '10.0.0.99').status_code == 401
+
+
+def test_login_is_limited_per_ip_across_emails(app, client, limited):
+    for i in range(20):
+        assert _login(client, f'guess{i}@homehub.test', '10.0.1.1').status_code == 401
+    r = _login(client, 'guess-last@homehub.test', '10.0.1.1')
+    assert r.status_code == 429
+    assert r.get_json() == {'error': 'Too many requests. Please slow down.'}
+    assert int(r.headers['Retry-After']) >= 1
+    assert _login(client, 'guess-last@homehub.test', '10.0.1.2').status_code == 401
+
+
+def test_disabled_limits_let_everything_through(app, client, monkeypatch):
+    monkeypatch.setattr(ratelimit, '_store', ratelimit.MemoryStore())
+    for i in range(7):
+        assert _login(client, 'victim@homehub.test', '10.0.2.1').status_code == 401
@@ -0,0 +1,46 @@
+from extensions import db
+from models import User
+from utils import snapshots
+
+
+def _registered(email):
+    return db.session.query(User.id).filter_by(email=email).first() is not None
+
+
+def test_rolled_back_discards_writes_committed_by_requests(app, client):
+    email = 'rollback@homehub.test'
+    with app.app_context():
+        with snapshots.rolled_back():
+            r = client.post('/api/auth/register', json={'full_name': 'Rollback', 'email': email,
+                                                        'password': 'secret-pass', 'role': 'tenant'})
+            assert r.status_code == 201
+            assert _registered(email) # Committed, and visible to the rest of the test
+        assert not _registered(email)
+
+
+def test_fixture_users_are_visible_to_requests(client, make_user):
+    user_id, headers = make_user('tenant')
+    r = client.get('/api/users/profile', headers=headers)
+    assert r.status_code == 200
+    assert r.get_json()['id'] == user_id
+
+
+def test_restore_returns_to_saved_state(app):
+    with app.app_context():
+        snapshots.save('pytest')
+        try:
+            db.session.add(User(email='after-save@homehub.test', full_name='Later', role='tenant',
+                                status='active', password_hash='x'))
+            db.session.commit()
+            assert snapshots.restore('pytest')
+            assert not _registered('after-save@homehub.test')
+        finally:
+            snapshots.drop('pytest')
+        assert snapshots.info('pytest') is None
+        assert not snapshots.restore('pytest')
+
+
+def test_force_seed_needs_an_admin(client, make_user):
+    assert client.get('/api/admin/force-seed-db-123').status_code == 403
+    _, tenant = make_user('tenant')
+    assert client.get('/api/admin/force-seed-db-123', headers=tenant).status_code == 403
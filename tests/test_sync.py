@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import pytest
+from extensions import db
+from models import Tombstone
+from utils import notifications, sync
+
+
+@pytest.fixture
+def no_overlap(app, monkeypatch):
+    # Tokens end exactly at the request, so a delta holds only what the test changed afterwards
+    monkeypatch.setitem(app.config, 'SYNC_OVERLAP_SECONDS', 0)
+
+
+def _notify(user_id, count):
+    ids = [p['id'] for p in notifications.notify_many([(user_id, f'Message {i}') for i in range(count)])]
+    db.session.commit()
+    return ids
+
+
+def _delta(client, path, headers, token):
+    r = client.get(path, headers=headers, query_string={'since': token})
+    assert r.status_code == 200
+    assert r.headers['X-Sync-Token'] == r.get_json()['sync_token']
+    return r.get_json()
+
+
+def test_since_returns_only_changes(client, make_user, no_overlap):
+    user_id, headers = make_user('tenant')
+    first, second = _notify(user_id, 2)
+    r = client.get('/api/notifications', headers=headers)
+    token = r.headers['X-Sync-Token']
+
+    assert _delta(client, '/api/notifications', headers, token)['changed'] == []
+    third, = _notify(user_id, 1)
+    client.patch(f'/api/notifications/{first}/read', headers=headers)
+
+    body = _delta(client, '/api/notifications', headers, token)
+    assert sorted(n['id'] for n in body['changed']) == sorted([first, third])
+    assert next(n for n in body['changed'] if n['id'] == first)['is_read'] is True
+    assert body['deleted'] == []
+    assert body['has_more'] is False
+    assert _delta(client, '/api/notifications', headers, body['sync_token'])['changed'] == []
+
+
+def test_clear_all_leaves_tombstones(client, make_user, no_overlap):
+    user_id, headers = make_user('tenant')
+    ids = _notify(user_id, 3)
+    token = client.get('/api/notifications', headers=headers).headers['X-Sync-Token']
+
+    client.delete('/api/notifications/clear', headers=headers)
+    body = _delta(client, '/api/notifications', headers, token)
+    assert sorted(body['deleted']) == sorted(ids)
+    assert body['changed'] == []
+
+
+def test_account_purge_tombstones_the_landlords_feed(client, tenancy, no_overlap):
+    token = client.get('/api/leases', headers=tenancy.landlord).headers['X-Sync-Token']
+    assert client.delete('/api/users/profile', headers=tenancy.tenant).status_code == 202
+
+    body = _delta(client, '/api/leases', tenancy.landlord, token)
+    assert body['deleted'] == [tenancy.lease_id]
+    # The purged user's own tombstones go with the account
+    assert not db.session.query(Tombstone).filter_by(user_id=tenancy.tenant_id).count()
+
+
+def test_pruned_tokens_get_410(app, client, make_user):
+    user_id, headers = make_user('tenant')
+    days = app.config['SYNC_TOMBSTONE_DAYS']
+    db.session.add(Tombstone(kind='notifications', object_id='1', user_id=user_id,
+                             deleted_at=datetime.utcnow() - timedelta(days=days + 1)))
+    db.session.commit()
+    stale = sync.encode_token(datetime.utcnow() - timedelta(days=days + 1))
+
+    result = app.test_cli_runner().invoke(args=['sync', 'prune'])
+    assert result.exit_code == 0, result.output
+    assert 'pruned 1 tombstones' in result.output
+    assert not db.session.query(Tombstone).filter_by(user_id=user_id).count()
+
+    r = client.get('/api/notifications', headers=headers, query_string={'since': stale})
+    assert r.status_code == 410
+    r = client.get('/api/notifications', headers=headers, query_string={'since': 'garbage'})
+    assert r.status_code == 400
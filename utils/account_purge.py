@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, delete, update, or_, and_
+from extensions import db
+from models import (User, Property, PropertyImage, Unit, Lease, Invoice, Payment, Notification,
+                    NotificationArchive, MaintenanceRequest, MaintenanceAttachment, AccountDeletionJob, Tombstone)
+from utils.storage import get_storage
+from utils import sync
+
+# Removes a user and everything hanging off them, children before parents, as set-based
+# DELETE ... WHERE id IN (SELECT id ... LIMIT n) chunks. Each chunk is its own short transaction,
+# so a landlord with hundreds of units never holds locks on the hot tables for long.
+#
+# Every step is "delete whatever still matches", so a purge cut short (worker restart, deploy) is
+# finished by running it again. Failed jobs, and queued/running ones with no progress for
+# ACCOUNT_PURGE_STALE_MINUTES, are picked up again by flask accounts resume-purges (run it from cron)
+# and whenever their status URL is polled.
+
+
+def _steps(user_id):
+    properties = select(Property.id).where(Property.landlord_id == user_id)
+    units = select(Unit.id).where(Unit.property_id.in_(properties))
+    leases = select(Lease.id).where(or_(Lease.tenant_id == user_id, Lease.unit_id.in_(units)))
+    invoices = select(Invoice.id).where(or_(Invoice.tenant_id == user_id, Invoice.lease_id.in_(leases)))
+    requests = select(MaintenanceRequest.id).where(
+        or_(MaintenanceRequest.tenant_id == user_id, MaintenanceRequest.unit_id.in_(units)))
+
+    return [
+        ('payments', Payment, Payment.invoice_id.in_(invoices)),
+        ('invoices', Invoice, Invoice.id.in_(invoices)),
+        ('maintenance_attachments', MaintenanceAttachment, MaintenanceAttachment.request_id.in_(requests)),
+        ('maintenance_requests', MaintenanceRequest, MaintenanceRequest.id.in_(requests)),
+        ('leases', Lease, Lease.id.in_(leases)),
+        ('units', Unit, Unit.id.in_(units)),
+        ('property_images', PropertyImage, PropertyImage.property_id.in_(properties)),
+        ('properties', Property, Property.id.in_(properties)),
+        ('notifications', Notification, Notification.user_id == user_id),
+        ('notifications_archive', NotificationArchive, NotificationArchive.user_id == user_id),
+        # Last: the lease/invoice/request steps above also tombstone them for this user's own feeds
+        ('sync_tombstones', Tombstone, Tombstone.user_id == user_id),
+    ]
+
+
+def _progress(job_id, **fields):
+    db.session.execute(update(AccountDeletionJob).where(AccountDeletionJob.id == job_id).values(**fields))
+    db.session.commit()
+
+
+def purge_account(user_id, job_id):
+    chunk = current_app.config.get('ACCOUNT_PURGE_CHUNK', 500)
+    status, total = db.session.execute(select(AccountDeletionJob.status, AccountDeletionJob.rows_deleted)
+                                       .where(AccountDeletionJob.id == job_id)).one()
+    if status == 'done':
+        return
+    total = total or 0 # A resumed job keeps counting from where it stopped
+    try:
+        _progress(job_id, status='running')
+
+        # Units the tenant was living in become available again
+        tenant_units = select(Lease.unit_id).where(Lease.tenant_id == user_id, Lease.status == 'active')
+        db.session.execute(update(Unit).where(Unit.id.in_(tenant_units)).values(status='vacant')
+                           .execution_options(synchronize_session=False))
+        db.session.commit()
+
+        for label, model, condition in _steps(user_id):
+            _progress(job_id, current_step=label)
+            while True:
+                batch = select(model.id).where(condition).limit(chunk)
+                if model is MaintenanceAttachment:
+                    # Need the storage keys before the rows go
+                    rows = db.session.execute(select(model.id, model.storage_key).where(condition).limit(chunk)).all()
+                    if not rows:
+                        break
+                    batch = [r.id for r in rows]
+                    for r in rows:
+                        try:
+                            get_storage().delete(r.storage_key)
+                        except Exception:
+                            current_app.logger.exception("Could not delete attachment %s", r.storage_key)
+                elif model in (Lease, Invoice, MaintenanceRequest):
+                    # Other users' feeds (the landlord's, the tenant's) listed these rows
+                    batch = db.session.scalars(batch).all()
+                    if not batch:
+                        break
+                    sync.record_deletes(db.session, model, model.id.in_(batch))
+
+                deleted = db.session.execute(
+                    delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+                ).rowcount
+                total += deleted
+                db.session.execute(update(AccountDeletionJob).where(AccountDeletionJob.id == job_id)
+                                   .values(rows_deleted=total))
+                db.session.commit()
+                if deleted < chunk:
+                    break
+
+        db.session.execute(delete(User).where(User.id == user_id))
+        _progress(job_id, status='done', current_step=None, rows_deleted=total + 1, finished_at=datetime.utcnow())
+    except Exception as e:
+        db.session.rollback()
+        _progress(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+        raise
+
+
+# --- Resuming interrupted purges ---
+
+def _resumable():
+    stale = datetime.utcnow() - timedelta(minutes=current_app.config.get('ACCOUNT_PURGE_STALE_MINUTES', 15))
+    return or_(AccountDeletionJob.status == 'failed',
+               and_(AccountDeletionJob.status.in_(('queued', 'running')), AccountDeletionJob.updated_at < stale))
+
+
+def claim(job_id):
+    """Take over a failed or stalled job; False if it is done or another worker is still on it.
+
+    The conditional UPDATE bumps the heartbeat, so concurrent sweeps can't both claim it.
+    """
+    claimed = db.session.execute(
+        update(AccountDeletionJob).where(AccountDeletionJob.id == job_id, _resumable())
+        .values(status='queued', error=None, finished_at=None)
+    ).rowcount
+    db.session.commit()
+    return bool(claimed)
+
+
+def resume_purges():
+    """Finish every failed or stalled purge, one after another in this process. Returns their outcomes."""
+    jobs = db.session.execute(select(AccountDeletionJob.id, AccountDeletionJob.user_id).where(_resumable())).all()
+    outcomes = {'resumed': 0, 'failed': 0}
+    for job_id, user_id in jobs:
+        if not claim(job_id):
+            continue
+        try:
+            purge_account(user_id, job_id)
+            outcomes['resumed'] += 1
+        except Exception:
+            current_app.logger.exception("Account purge %s failed again", job_id)
+            outcomes['failed'] += 1
+    return outcomes
+
+
+# --- CLI: flask accounts resume-purges ---
+accounts_cli = AppGroup('accounts', help='Account deletion maintenance.')
+
+
+@accounts_cli.command('resume-purges')
+def resume_purges_command():
+    """Finish account purges interrupted by a restart or a failure. Safe to run from cron."""
+    click.echo(resume_purges())
+
+
+def init_app(app):
+    app.cli.add_command(accounts_cli)
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import g, current_app, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from extensions import db
+from models import User
+
+# Role/status/version ride in the access token (see auth.login), so most handlers never touch `users`.
+# A token is refused once the user's token_version moves past the one it was issued with
+# (demotion, rejection, deletion). Versions are cached per worker for TOKEN_VERSION_TTL seconds,
+# so other workers pick a bump up within that window; this worker sees it immediately. The cache is
+# an LRU capped at TOKEN_VERSION_CACHE_SIZE users, and expired entries are dropped when read.
+
+_versions = OrderedDict()
+_lock = threading.Lock()
+
+
+def token_claims(user):
+    return {'role': user.role, 'status': user.status, 'ver': user.token_version or 0}
+
+
+def _cached_version(user_id):
+    with _lock:
+        hit = _versions.get(user_id)
+        if hit is None:
+            return None
+        if hit[1] <= time.monotonic():
+            del _versions[user_id]
+            return None
+        _versions.move_to_end(user_id)
+        return hit[0]
+
+
+def _remember_version(user_id, version):
+    ttl = current_app.config.get('TOKEN_VERSION_TTL', 30)
+    size = current_app.config.get('TOKEN_VERSION_CACHE_SIZE', 10000)
+    with _lock:
+        _versions[user_id] = (version or 0, time.monotonic() + ttl)
+        _versions.move_to_end(user_id)
+        while len(_versions) > size:
+            _versions.popitem(last=False)
+
+
+def bump_token_version(user):
+    """Invalidate every token issued to `user` so far. Caller commits."""
+    user.token_version = (user.token_version or 0) + 1
+    _remember_version(str(user.id), user.token_version)
+
+
+def forget_token_versions(user_ids):
+    """Drop cached versions after a set-based UPDATE bumped token_version for these users (None: everyone)."""
+    with _lock:
+        if user_ids is None:
+            _versions.clear()
+            return
+        for uid in user_ids:
+            _versions.pop(str(uid), None)
+
+
+def _token_revoked(jwt_header, jwt_data):
+    user_id = str(jwt_data['sub'])
+    version = _cached_version(user_id)
+    if version is None:
+        # Cache miss: load the whole row once and keep it for the handler, so this is still one query
+        user = db.session.get(User, user_id)
+        if not user:
+            return True
+        g._homehub_current_user = user
+        version = user.token_version or 0
+        _remember_version(user_id, version)
+    return jwt_data.get('ver', 0) != version
+
+
+def init_app(jwt):
+    jwt.token_in_blocklist_loader(_token_revoked)
+
+    @jwt.revoked_token_loader
+    def revoked(jwt_header, jwt_data):
+        return jsonify({'error': 'Your session has expired. Please log in again.'}), 401
+
+
+def current_role():
+    role = get_jwt().get('role')
+    if role is None: # Token issued before role claims existed
+        user = get_current_user()
+        role = user.role if user else None
+    return role
+
+
+def current_status():
+    status = get_jwt().get('status')
+    if status is None:
+        user = get_current_user()
+        status = user.status if user else None
+    return status
+
+
+def get_current_user():
+    """Full User row for this request; loaded at most once, and only by handlers that need it."""
+    if not hasattr(g, '_homehub_current_user'):
+        g._homehub_current_user = db.session.get(User, get_jwt_identity())
+    return g._homehub_current_user
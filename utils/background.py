@@ -0,0 +1,40 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from extensions import db
+
+# Named thread pools so one kind of job (e.g. thumbnails) can't starve another
+_pools = {}
+
+
+def get_pool(name, max_workers=None):
+    if name not in _pools:
+        workers = max_workers or int(os.getenv(f'{name.upper()}_WORKERS', 2))
+        _pools[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'homehub-{name}')
+    return _pools[name]
+
+
+def run_in_background(pool, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on a worker thread inside the current app context.
+
+    Set BACKGROUND_TASKS_INLINE=True (tests, scripts) to run the job synchronously instead.
+    """
+    app = current_app._get_current_object()
+
+    def job():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception("Background job %s failed", fn.__name__)
+                raise
+            finally:
+                db.session.remove()
+
+    if app.config.get('BACKGROUND_TASKS_INLINE'):
+        try:
+            return job()
+        except Exception:
+            return None
+    return get_pool(pool).submit(job)
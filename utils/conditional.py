@@ -0,0 +1,39 @@
+import hashlib
+from flask import request, jsonify, current_app
+
+# Conditional GET for single-resource reads.
+#
+# A handler first reads the version of what it is about to return: the updated_at of every row the
+# representation is built from, fetched by primary key, which is much cheaper than the full load
+# (joins, child collections) and serialization. The weak ETag is a hash of those versions plus the
+# query string (?fields/?expand change the representation). If the client's If-None-Match holds it,
+# the handler answers 304 without loading anything else; otherwise it loads, serializes and sends
+# the body with the ETag.
+#
+# Weak, because the same versions always give an equivalent document but not byte-identical JSON
+# across deploys.
+
+
+def etag_for(*versions):
+    return hashlib.sha1(repr((versions, request.query_string)).encode()).hexdigest()[:20]
+
+
+def not_modified(etag, private=False):
+    """304 response if the client already holds `etag`, else None."""
+    if request.if_none_match and request.if_none_match.contains_weak(etag):
+        return _validators(current_app.response_class(status=304), etag, private)
+    return None
+
+
+def respond(payload, etag, private=False):
+    """200 JSON response carrying `etag`."""
+    return _validators(jsonify(payload), etag, private)
+
+
+def _validators(response, etag, private):
+    response.set_etag(etag, weak=True)
+    # Clients may store it but must revalidate; profile data stays out of shared caches
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    if private:
+        response.vary.add('Authorization')
+    return response
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool, NullPool
+
+# Engine/pool settings from config, plus checkout instrumentation. Figures are per worker process.
+#
+#   DB_POOL_SIZE            persistent connections per worker
+#   DB_MAX_OVERFLOW         extra connections allowed under burst
+#   DB_POOL_TIMEOUT         seconds a request waits for a connection before failing
+#   DB_POOL_RECYCLE         seconds before a connection is replaced (below the server/proxy idle cutoff)
+#   DB_POOL_PRE_PING        test connections on checkout, so a server-closed one is replaced, not raised
+#   DB_STATEMENT_TIMEOUT_MS Postgres statement_timeout for app connections (0 = server default)
+#   DB_PGBOUNCER            behind PgBouncer in transaction mode: no app-side pool, no session state
+
+WAIT_SAMPLES = 2048
+
+
+class PoolStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = deque(maxlen=WAIT_SAMPLES) # seconds, most recent checkouts
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds):
+        with self.lock:
+            self.waits.append(seconds)
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def count(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+stats = PoolStats()
+
+
+class _TimedCheckout:
+    # _do_get is where a checkout blocks on an exhausted pool (or opens a connection, for NullPool)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            stats.count('timeouts')
+            raise
+        finally:
+            stats.record_wait(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def engine_options(config, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri` from the DB_* config values."""
+    if uri.startswith('sqlite') and (':memory:' in uri or uri in ('sqlite://', 'sqlite:///')):
+        return {'pool_pre_ping': config['DB_POOL_PRE_PING']} # One shared connection; nothing to size
+
+    connect_args = {}
+    if uri.startswith('postgresql'):
+        if config['DB_PGBOUNCER']:
+            # PgBouncer owns the pooling. Transaction mode hands each transaction to any server
+            # connection, so nothing session-scoped may be relied on: no startup `options` (set
+            # statement_timeout on the role instead) and no server-side prepared statements.
+            # psycopg2 never prepares; psycopg 3 does after 5 executions unless told not to.
+            if uri.startswith('postgresql+psycopg:'):
+                connect_args['prepare_threshold'] = None
+            return {'poolclass': InstrumentedNullPool, 'connect_args': connect_args}
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['options'] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'connect_args': connect_args,
+    }
+
+
+def instrument(engine):
+    if event.contains(engine.pool, 'connect', _on_connect):
+        return
+    event.listen(engine.pool, 'connect', _on_connect)
+    event.listen(engine.pool, 'invalidate', _on_invalidate)
+
+
+def _on_connect(dbapi_connection, connection_record):
+    stats.count('connects')
+
+
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    stats.count('invalidations')
+
+
+def _pct(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000 if values else 0
+
+
+def snapshot(engine):
+    pool = engine.pool
+    with stats.lock:
+        waits = sorted(stats.waits)
+        data = {
+            'checkouts': stats.checkouts,
+            'timeouts': stats.timeouts,
+            'connects': stats.connects,
+            'invalidations': stats.invalidations,
+            'wait_ms': {
+                'mean': stats.wait_total / stats.checkouts * 1000 if stats.checkouts else 0,
+                'p50': _pct(waits, 0.5),
+                'p95': _pct(waits, 0.95),
+                'p99': _pct(waits, 0.99),
+                'max': stats.wait_max * 1000,
+            },
+        }
+    data['pool'] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        data['occupancy'] = {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+        }
+    return data
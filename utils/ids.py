@@ -0,0 +1,63 @@
+import os
+import time
+import uuid
+from flask import current_app, has_app_context
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+# UUID keys stored natively: Postgres `uuid`, a 16-byte BLOB everywhere else (VARCHAR(36) was 36+
+# bytes per key in every PK and FK index). On the Python side ids stay canonical strings, so JSON,
+# JWT identities and URL parameters are unchanged.
+#
+#   UUID_VERSION  4 (random, default) or 7 (time-ordered: new rows land at the right edge of the
+#                 B-tree instead of a random page, which keeps PK indexes dense and inserts cache-hot)
+
+
+class GUID(TypeDecorator):
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    # hex/fromhex rather than uuid.UUID(): these run for every id bound or loaded, and are ~3x faster
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            raw = value.bytes
+        else:
+            try:
+                raw = bytes.fromhex(str(value).replace('-', ''))
+            except ValueError:
+                raw = None
+            if raw is None or len(raw) != 16:
+                # A malformed id can't match any row; binding NULL makes lookups miss (404) instead of erroring
+                return None
+        if dialect.name == 'postgresql':
+            return raw.hex()
+        return raw
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, memoryview)):
+            h = bytes(value).hex()
+            return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}'
+        return str(value)
+
+def uuid7():
+    """RFC 9562 UUIDv7: 48-bit Unix ms timestamp, 12 bits of sub-millisecond time, 62 random bits."""
+    ns = time.time_ns()
+    ms, sub_ms = divmod(ns, 1_000_000)
+    rand = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    value = (ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | (sub_ms * 4096 // 1_000_000) << 64 | 0b10 << 62 | rand
+    return uuid.UUID(int=value)
+
+
+def new_id():
+    """Column default for GUID primary keys."""
+    version = current_app.config.get('UUID_VERSION', 4) if has_app_context() else 4
+    return str(uuid7() if version == 7 else uuid.uuid4())
@@ -0,0 +1,56 @@
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError: # Optional: the stdlib encoder produces the same documents, just slower
+    orjson = None
+
+# app.json: jsonify() and request.get_json() go through orjson when it is installed.
+#
+# Output matches the stdlib provider's (sorted keys, compact unless debug) except that non-ASCII
+# text is sent as UTF-8 rather than \u escapes. Dates and datetimes are written as ISO 8601 by both
+# paths, the same text to_dict() produces, so serializers can hand them over without converting.
+# Anything orjson refuses (ints past 64 bits, mixed key types it can't sort) falls back to stdlib.
+
+
+class FastJSONProvider(DefaultJSONProvider):
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date): # Also datetime; Flask's default would use HTTP date format
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def _options(self, pretty):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj, pretty):
+        """Bytes of `obj` as JSON."""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options(pretty))
+            except TypeError: # orjson.JSONEncodeError
+                pass
+        kwargs = {'indent': 2} if pretty else {'separators': (',', ':')}
+        return super().dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj, False).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._encode(obj, pretty) + b'\n', mimetype=self.mimetype)
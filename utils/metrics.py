@@ -0,0 +1,85 @@
+import os
+import time
+from flask import Response, current_app, g, jsonify, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Request metrics in Prometheus text format at /metrics.
+#
+# Under gunicorn, gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR: each worker then writes its samples
+# to mmap'd files there and /metrics sums every worker's files, so whichever worker answers the
+# scrape reports the whole server. Without it (flask run, tests) the in-process registry is used.
+#
+#   METRICS_ENABLED  record request metrics (default true)
+#   METRICS_TOKEN    if set, /metrics requires `Authorization: Bearer <token>`
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'}
+
+REQUEST_LATENCY = Histogram('homehub_http_request_duration_seconds', 'Request latency by endpoint',
+                            ['blueprint', 'endpoint', 'method'], buckets=BUCKETS)
+REQUESTS = Counter('homehub_http_requests_total', 'Requests by endpoint and status code',
+                   ['blueprint', 'endpoint', 'method', 'status'])
+IN_PROGRESS = Gauge('homehub_http_requests_in_progress', 'Requests currently being served',
+                    ['blueprint'], multiprocess_mode='livesum')
+
+# .labels() hashes and locks on every call; the label sets are few, so keep the children
+_latency, _requests, _in_progress = {}, {}, {}
+
+
+def _labels():
+    endpoint = request.endpoint or 'unmatched' # 404s share one series instead of one per URL
+    method = request.method if request.method in METHODS else 'other'
+    return request.blueprint or '', endpoint, method
+
+
+def _start():
+    blueprint, endpoint, method = key = _labels()
+    gauge = _in_progress.get(blueprint)
+    if gauge is None:
+        gauge = _in_progress[blueprint] = IN_PROGRESS.labels(blueprint)
+    gauge.inc()
+    g._metrics = (time.perf_counter(), key, gauge)
+
+
+def _finish(response):
+    started = g.get('_metrics')
+    if started is None:
+        return response
+    start, key, _ = started
+    histogram = _latency.get(key)
+    if histogram is None:
+        histogram = _latency[key] = REQUEST_LATENCY.labels(*key)
+    histogram.observe(time.perf_counter() - start)
+    counter_key = key + (response.status_code,)
+    counter = _requests.get(counter_key)
+    if counter is None:
+        counter = _requests[counter_key] = REQUESTS.labels(*key, str(response.status_code))
+    counter.inc()
+    return response
+
+
+def _teardown(exc):
+    started = g.pop('_metrics', None)
+    if started is not None:
+        started[2].dec()
+
+
+def metrics_view():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    if app.config['METRICS_ENABLED']:
+        app.before_request(_start)
+        app.after_request(_finish)
+        app.teardown_request(_teardown)
@@ -0,0 +1,227 @@
+import calendar
+import logging
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, insert, delete, text
+from extensions import db
+from models import Notification, NotificationArchive
+from utils import sync
+
+# Keeps the hot `notifications` table small:
+#  - everywhere: read rows older than N days move to notifications_archive in bounded batches
+#  - Postgres (optional): monthly range partitions; whole old months are detached instead of deleted
+# Either way the rows leave the synced feed, so each one gets a tombstone (see utils/sync.py) and
+# clients drop it from their local list on the next delta.
+
+ARCHIVE_COLUMNS = ['id', 'user_id', 'message', 'is_read', 'created_at']
+
+logger = logging.getLogger(__name__)
+
+
+def archive_read_notifications(days=None, batch_size=1000, max_batches=None):
+    """Move read notifications older than `days` into the archive, one committed batch at a time.
+
+    Short transactions keep lock time and WAL bursts bounded however large the backlog is.
+    Returns the number of rows moved.
+    """
+    days = days or current_app.config['NOTIFICATION_RETENTION_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.scalars(
+            select(Notification.id)
+            .where(Notification.is_read == True, Notification.created_at < cutoff)
+            .order_by(Notification.created_at)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        sync.record_deletes(db.session, Notification, Notification.id.in_(ids))
+        cols = [getattr(Notification, c) for c in ARCHIVE_COLUMNS]
+        db.session.execute(
+            insert(NotificationArchive).from_select(ARCHIVE_COLUMNS, select(*cols).where(Notification.id.in_(ids)))
+        )
+        db.session.execute(delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+
+        moved += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return moved
+
+
+# --- Postgres monthly partitioning ---
+
+def is_partitioned():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    kind = db.session.execute(text("SELECT relkind FROM pg_class WHERE relname = 'notifications'")).scalar()
+    return kind == 'p'
+
+
+def _month_start(d):
+    return datetime(d.year, d.month, 1)
+
+
+def _next_month(d):
+    return _month_start(d) + timedelta(days=calendar.monthrange(d.year, d.month)[1])
+
+
+def _partition_name(month):
+    return f"notifications_p{month:%Y%m}"
+
+
+def create_partition(month):
+    """Create the month's partition unless it exists.
+
+    Postgres refuses to create a partition while the default partition holds rows in its range
+    (e.g. clock skew, or a month nobody created in time). Those rows are moved across: the default
+    is detached, the month created, its rows moved, and the default attached again.
+    """
+    start = _month_start(month)
+    name = _partition_name(start)
+    if db.session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar():
+        return False
+
+    bounds = f"created_at >= '{start:%Y-%m-%d}' AND created_at < '{_next_month(start):%Y-%m-%d}'"
+    create = (f"CREATE TABLE {name} PARTITION OF notifications "
+              f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{_next_month(start):%Y-%m-%d}')")
+    stranded = db.session.execute(text(
+        f"SELECT count(*) FROM notifications_default WHERE {bounds}"
+    )).scalar() if db.session.execute(text("SELECT to_regclass('notifications_default')")).scalar() else 0
+    if not stranded:
+        db.session.execute(text(create))
+        return True
+
+    logger.warning("Moving %s rows from notifications_default into new partition %s", stranded, name)
+    for stmt in [
+        "ALTER TABLE notifications DETACH PARTITION notifications_default",
+        create,
+        f"INSERT INTO {name} SELECT * FROM notifications_default WHERE {bounds}",
+        f"DELETE FROM notifications_default WHERE {bounds}",
+        "ALTER TABLE notifications ATTACH PARTITION notifications_default DEFAULT",
+    ]:
+        db.session.execute(text(stmt))
+    return True
+
+
+def partition_notifications(months_ahead=3):
+    """One-off conversion of `notifications` into a monthly range-partitioned table (Postgres 12+).
+
+    The primary key becomes (id, created_at) because Postgres requires the partition key in it;
+    ids still come from the same sequence, so they stay unique.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        raise click.ClickException('Partitioning is only supported on PostgreSQL')
+    if is_partitioned():
+        return False
+
+    db.session.execute(text("UPDATE notifications SET created_at = now() WHERE created_at IS NULL"))
+    oldest = db.session.execute(text("SELECT min(created_at) FROM notifications")).scalar() or datetime.utcnow()
+
+    for stmt in [
+        "ALTER SEQUENCE notifications_id_seq OWNED BY NONE",
+        "ALTER TABLE notifications RENAME TO notifications_unpartitioned",
+        "ALTER TABLE notifications_unpartitioned RENAME CONSTRAINT notifications_pkey TO notifications_unpartitioned_pkey",
+        "ALTER INDEX IF EXISTS ix_notifications_user_id_created_at RENAME TO ix_notifications_unpartitioned_user_created",
+        "ALTER INDEX IF EXISTS ix_notifications_created_at RENAME TO ix_notifications_unpartitioned_created",
+        "ALTER INDEX IF EXISTS ix_notifications_user_id_updated_at RENAME TO ix_notifications_unpartitioned_user_updated",
+        "CREATE TABLE notifications (LIKE notifications_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+        "ALTER TABLE notifications ALTER COLUMN created_at SET NOT NULL",
+        "ALTER TABLE notifications ADD PRIMARY KEY (id, created_at)",
+        "ALTER TABLE notifications ADD FOREIGN KEY (user_id) REFERENCES users (id)",
+        "CREATE INDEX ix_notifications_user_id_created_at ON notifications (user_id, created_at)",
+        "CREATE INDEX ix_notifications_created_at ON notifications (created_at)",
+        "CREATE INDEX ix_notifications_user_id_updated_at ON notifications (user_id, updated_at)",
+        "CREATE TABLE notifications_default PARTITION OF notifications DEFAULT",
+        "ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id",
+    ]:
+        db.session.execute(text(stmt))
+
+    month = _month_start(oldest)
+    horizon = _month_start(datetime.utcnow())
+    for _ in range(months_ahead):
+        horizon = _next_month(horizon)
+    while month <= horizon:
+        create_partition(month)
+        month = _next_month(month)
+
+    db.session.execute(text("INSERT INTO notifications SELECT * FROM notifications_unpartitioned"))
+    db.session.execute(text("DROP TABLE notifications_unpartitioned"))
+    db.session.commit()
+    return True
+
+
+def maintain_partitions(days=None, months_ahead=3):
+    """Create upcoming months and detach months wholly older than the retention window.
+
+    Detached months are kept as standalone notifications_archive_pYYYYMM tables; detaching is a
+    catalog change, so it costs the same whether the month holds a thousand rows or ten million.
+    The tombstones for its rows are one INSERT ... SELECT, and tombstone retention prunes them.
+    """
+    days = days or current_app.config['NOTIFICATION_RETENTION_DAYS']
+    month = _month_start(datetime.utcnow())
+    for _ in range(months_ahead + 1):
+        create_partition(month)
+        month = _next_month(month)
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    partitions = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'notifications' "
+        "AND c.relname LIKE 'notifications\\_p%' ORDER BY c.relname"
+    )).scalars().all()
+
+    detached = []
+    for name in partitions:
+        start = datetime.strptime(name[len('notifications_p'):], '%Y%m')
+        if _next_month(start) > cutoff:
+            continue
+        # Unread rows leave with the partition, so take them off the badge counters first
+        db.session.execute(text(
+            f"UPDATE users SET unread_notifications = GREATEST(users.unread_notifications - u.n, 0) "
+            f"FROM (SELECT user_id, count(*) AS n FROM {name} WHERE is_read = false GROUP BY user_id) u "
+            f"WHERE users.id = u.user_id"
+        ))
+        db.session.execute(text(
+            f"INSERT INTO sync_tombstones (kind, object_id, user_id, deleted_at) "
+            f"SELECT 'notifications', CAST(id AS varchar), user_id, now() AT TIME ZONE 'utc' FROM {name}"
+        ))
+        db.session.execute(text(f"ALTER TABLE notifications DETACH PARTITION {name}"))
+        db.session.execute(text(f"ALTER TABLE {name} RENAME TO notifications_archive_p{start:%Y%m}"))
+        detached.append(name)
+    db.session.commit()
+    return detached
+
+
+def run_retention(days=None, batch_size=1000):
+    if is_partitioned():
+        return {'detached': maintain_partitions(days)}
+    return {'archived': archive_read_notifications(days, batch_size)}
+
+
+# --- CLI: flask notifications retention | partition ---
+notifications_cli = AppGroup('notifications', help='Notification retention and storage maintenance.')
+
+
+@notifications_cli.command('retention')
+@click.option('--days', type=int, default=None, help='Keep this many days in the hot table.')
+@click.option('--batch-size', type=int, default=1000)
+def retention_command(days, batch_size):
+    """Archive (or detach, when partitioned) notifications past retention. Safe to run from cron."""
+    click.echo(run_retention(days, batch_size))
+
+
+@notifications_cli.command('partition')
+@click.option('--months-ahead', type=int, default=3)
+def partition_command(months_ahead):
+    """Convert notifications to monthly range partitions (PostgreSQL only, one-off)."""
+    if partition_notifications(months_ahead):
+        click.echo('notifications is now partitioned by month')
+    else:
+        click.echo('notifications is already partitioned')
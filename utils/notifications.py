@@ -0,0 +1,89 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert, update
+from extensions import db
+from models import Notification, User
+from utils import pubsub, sync
+
+# All notification writes go through here so the unread counter and the live stream stay consistent.
+# Everything joins the caller's transaction; the caller commits.
+
+
+def notify(user_id, message):
+    notify_many([(user_id, message)])
+
+
+def fan_out(user_ids, message):
+    """Same message to many recipients (e.g. every tenant of a property) in one INSERT."""
+    notify_many([(uid, message) for uid in user_ids])
+
+
+def notify_many(items):
+    """Insert (user_id, message) pairs as a single multi-row INSERT ... RETURNING."""
+    if not items:
+        return []
+    now = datetime.utcnow()
+    rows = db.session.execute(
+        insert(Notification).returning(Notification.id, Notification.user_id, Notification.message),
+        [{'user_id': uid, 'message': msg, 'is_read': False, 'created_at': now, 'updated_at': now} for uid, msg in items]
+    ).all()
+
+    # Bulk INSERT skips mapper hooks, so bump counters here: one UPDATE per distinct increment
+    by_count = {}
+    for uid, count in Counter(str(uid) for uid, _ in items).items():
+        by_count.setdefault(count, []).append(uid)
+    for count, user_ids in by_count.items():
+        db.session.execute(
+            update(User).where(User.id.in_(user_ids))
+            # updated_at kept as is: it versions the profile (ETags), which the counter isn't part of
+            .values(unread_notifications=User.unread_notifications + count, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    payloads = [{
+        'id': r.id,
+        'user_id': r.user_id,
+        'message': r.message,
+        'is_read': False,
+        'created_at': now.isoformat(),
+        'updated_at': now.isoformat()
+    } for r in rows]
+    pubsub.backend.on_insert(db.session.connection(), payloads)
+    pubsub.queue_published(db.session(), payloads)
+    return payloads
+
+
+def mark_read(user_id, notification_ids):
+    """Mark the given notifications read in one UPDATE. Returns how many actually flipped."""
+    if not notification_ids:
+        return 0
+    return _mark(user_id, Notification.id.in_(notification_ids))
+
+
+def mark_all_read(user_id):
+    return _mark(user_id)
+
+
+def _mark(user_id, *criteria):
+    changed = db.session.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False, *criteria)
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if changed:
+        db.session.execute(
+            update(User).where(User.id == user_id)
+            .values(unread_notifications=User.unread_notifications - changed, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    return changed
+
+
+def clear_all(user_id):
+    sync.record_deletes(db.session, Notification, Notification.user_id == user_id)
+    Notification.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    db.session.execute(
+        update(User).where(User.id == user_id).values(unread_notifications=0, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
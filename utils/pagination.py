@@ -0,0 +1,49 @@
+import base64
+from datetime import datetime
+from sqlalchemy import tuple_
+
+# Keyset ("seek") pagination on (created_at, id). The cursor is the position of the last row the
+# client has seen, so each page is an index range scan no matter how deep the client pages.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, id_type=str):
+    """Raises ValueError on a malformed cursor."""
+    created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), id_type(row_id)
+
+
+def page_size(args):
+    return max(1, min(args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+
+def keyset_page(query, created_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE, newest_first=True, id_type=str):
+    """Apply cursor + ordering to `query`; returns (rows, next_cursor or None).
+
+    Rows must expose the created_at and id values under the column names of created_col/id_col.
+    """
+    if cursor:
+        position = decode_cursor(cursor, id_type)
+        key = tuple_(created_col, id_col)
+        query = query.filter(key < position if newest_first else key > position)
+
+    if newest_first:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col.asc(), id_col.asc())
+
+    # One extra row tells us whether another page exists
+    rows = query.limit(limit + 1).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return page, next_cursor
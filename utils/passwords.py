@@ -0,0 +1,81 @@
+import os
+import threading
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from utils.background import get_pool
+
+# Password KDF work runs on a small dedicated pool. hashlib's scrypt/pbkdf2 release the GIL, so this
+# caps how many cores a login burst can take, and request threads beyond the cap wait (bounded) or
+# get a 503 instead of piling more KDF work onto the CPU.
+#
+#   PASSWORD_HASH_METHOD   werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+#   PASSWORD_HASH_WORKERS  concurrent KDF computations per process
+#   PASSWORD_HASH_QUEUE    extra callers allowed to wait for a slot
+#   PASSWORD_HASH_TIMEOUT  seconds a caller waits for a slot before giving up
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class HashingBusy(Exception):
+    """Too many password hashes already queued; the caller should retry shortly."""
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def _workers():
+    return int(_config('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+
+
+def _acquire_slot():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(_workers() + int(_config('PASSWORD_HASH_QUEUE', 32)))
+    if not _slots.acquire(timeout=float(_config('PASSWORD_HASH_TIMEOUT', 5))):
+        raise HashingBusy()
+    return _slots
+
+
+def _run(fn, *args):
+    slots = _acquire_slot()
+    try:
+        return get_pool('password_hash', _workers()).submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    method = _config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    return _run(generate_password_hash, password, method)
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with different KDF parameters than currently configured."""
+    return password_hash.split('$', 1)[0] != _method_prefix(_config('PASSWORD_HASH_METHOD', DEFAULT_METHOD))
+
+
+_prefixes = {}
+
+
+def _method_prefix(method):
+    """The prefix werkzeug writes for `method`, defaults filled in ('scrypt' -> 'scrypt:32768:8:1').
+
+    Found by hashing a dummy password once per method and process, so shorthand settings compare
+    equal to the hashes they produce.
+    """
+    prefix = _prefixes.get(method)
+    if prefix is None:
+        prefix = _prefixes[method] = _run(generate_password_hash, '', method).split('$', 1)[0]
+    return prefix
@@ -0,0 +1,162 @@
+import json
+import threading
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from extensions import db
+from models import User, Property, Unit, MaintenanceRequest, Invoice, Payment, PlatformStat
+from utils.background import run_in_background
+
+# Admin dashboard numbers live in platform_stats, one JSON row per section, so a dashboard view is
+# a single read of a tiny table. Sections are recomputed (one grouped query per source table) when
+# this worker has seen writes to their tables and STATS_TTL has passed, or unconditionally once
+# they're older than STATS_MAX_AGE. Refreshes run off the request path.
+
+
+def _users():
+    rows = db.session.query(User.role, User.status, func.count()).group_by(User.role, User.status).all()
+    out = {}
+    for role, status, n in rows:
+        out.setdefault(role, {})[status] = n
+    return {'by_role_status': out, 'total': sum(n for _, _, n in rows)}
+
+
+def _properties():
+    rows = db.session.query(Property.status, func.count()).group_by(Property.status).all()
+    return {'by_status': dict(rows), 'total': sum(n for _, n in rows)}
+
+
+def _occupancy():
+    rows = dict(db.session.query(Unit.status, func.count()).group_by(Unit.status).all())
+    total = sum(rows.values())
+    return {'units_by_status': rows, 'total_units': total,
+            'occupancy_rate': round(rows.get('occupied', 0) / total, 4) if total else 0}
+
+
+def _maintenance():
+    rows = db.session.query(MaintenanceRequest.priority, func.count())\
+        .filter(MaintenanceRequest.status.notin_(MaintenanceRequest.RESOLVED_STATUSES))\
+        .group_by(MaintenanceRequest.priority).all()
+    return {'open_by_priority': dict(rows), 'open_total': sum(n for _, n in rows)}
+
+
+def _billing():
+    start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+    invoices = db.session.query(Invoice.status, func.count(), func.coalesce(func.sum(Invoice.amount), 0))\
+        .filter(Invoice.due_date >= start, Invoice.due_date < end).group_by(Invoice.status).all()
+    collected, payments = db.session.query(func.coalesce(func.sum(Payment.amount), 0), func.count())\
+        .filter(Payment.payment_date >= start, Payment.payment_date < end).one()
+    return {
+        'month': start.strftime('%Y-%m'),
+        'invoiced_amount': float(sum(a for _, _, a in invoices)),
+        'invoices_by_status': {s: {'count': n, 'amount': float(a)} for s, n, a in invoices},
+        'collected_amount': float(collected),
+        'payments': payments
+    }
+
+
+# section -> (builder, tables whose writes make it stale)
+SECTIONS = {
+    'users': (_users, {'users'}),
+    'properties': (_properties, {'properties'}),
+    'occupancy': (_occupancy, {'units'}),
+    'maintenance': (_maintenance, {'maintenance_requests'}),
+    'billing': (_billing, {'invoices', 'payments'}),
+}
+
+_dirty_tables = set(t for _, tables in SECTIONS.values() for t in tables) # Unknown at boot
+_lock = threading.Lock()
+_refreshing = threading.Event()
+
+
+def _mark(tables):
+    with _lock:
+        _dirty_tables.update(tables)
+
+
+def _after_flush(session, flush_context):
+    _mark({obj.__table__.name for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+           if hasattr(obj, '__table__')})
+
+
+def _on_execute(state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        _mark({state.bind_mapper.local_table.name})
+
+
+def refresh(sections=None):
+    """Recompute the given sections (default: all) and store them. Returns the section names written."""
+    sections = sections or list(SECTIONS)
+    now = datetime.utcnow()
+    for name in sections:
+        builder, tables = SECTIONS[name]
+        with _lock:
+            _dirty_tables.difference_update(tables)
+        data = json.dumps(builder())
+        row = db.session.get(PlatformStat, name)
+        if row:
+            row.data, row.refreshed_at = data, now
+        else:
+            db.session.add(PlatformStat(section=name, data=data, refreshed_at=now))
+    db.session.commit()
+    return sections
+
+
+def _stale_sections(rows):
+    now = datetime.utcnow()
+    ttl = timedelta(seconds=current_app.config.get('STATS_TTL', 60))
+    max_age = timedelta(seconds=current_app.config.get('STATS_MAX_AGE', 900))
+    with _lock:
+        dirty = set(_dirty_tables)
+    stale = []
+    for name, (_, tables) in SECTIONS.items():
+        row = rows.get(name)
+        if row is None or now - row.refreshed_at > max_age or (tables & dirty and now - row.refreshed_at > ttl):
+            stale.append(name)
+    return stale
+
+
+def _background_refresh(sections):
+    try:
+        refresh(sections)
+    finally:
+        _refreshing.clear()
+
+
+def get_snapshot():
+    rows = {r.section: r for r in PlatformStat.query.all()}
+    stale = _stale_sections(rows)
+    if stale:
+        if len(rows) < len(SECTIONS):
+            # First view after a deploy: nothing to serve yet, so build it inline once
+            refresh(stale)
+            rows = {r.section: r for r in PlatformStat.query.all()}
+        elif not _refreshing.is_set():
+            _refreshing.set()
+            run_in_background('stats', _background_refresh, stale)
+
+    return {
+        name: dict(json.loads(row.data), refreshed_at=row.refreshed_at.isoformat())
+        for name, row in rows.items()
+    }
+
+
+def init_app(app):
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'do_orm_execute', _on_execute)
+    app.cli.add_command(stats_cli)
+
+
+stats_cli = AppGroup('stats', help='Admin dashboard statistics.')
+
+
+@stats_cli.command('refresh')
+def refresh_command():
+    """Recompute every dashboard section now (e.g. from cron)."""
+    click.echo(f"refreshed: {', '.join(refresh())}")
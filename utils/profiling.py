@@ -0,0 +1,199 @@
+import cProfile
+import heapq
+import itertools
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from flask import current_app, g, request
+from utils.background import run_in_background
+
+# On-demand request profiling with cProfile.
+#
+# A request is profiled when an admin sends `X-Profile: 1`, or at random with probability
+# PROFILE_SAMPLE_RATE (this catches unauthenticated endpoints such as the M-Pesa callback).
+# Profiles are converted to speedscope JSON (https://www.speedscope.app) off the request thread and
+# kept in PROFILE_DIR, a ring buffer of the newest PROFILE_MAX_FILES files shared by all workers.
+# The profiled response carries `X-Profile-Id`; admins list/download under /api/admin/profiles.
+
+PROFILE_HEADER = 'X-Profile'
+MAX_STACK_DEPTH = 200
+MAX_NODES = 20000 # Distinct stacks kept per profile (see to_speedscope)
+# <created_ms>-<id>-<method>-<duration_ms>-<endpoint>.speedscope.json
+_NAME = re.compile(r'^(\d+)-([0-9a-f]{12})-([A-Z]+)-(\d+)-([\w.]+)\.speedscope\.json$')
+_ID = re.compile(r'^[0-9a-f]{12}$')
+
+
+def _requested_by_admin():
+    if request.headers.get(PROFILE_HEADER) != '1':
+        return False
+    from flask_jwt_extended import verify_jwt_in_request
+    from utils.auth import current_role
+    try:
+        verify_jwt_in_request(optional=True)
+        return current_role() == 'admin'
+    except Exception: # Bad/expired token: the view reports it; just don't profile
+        return False
+
+
+def _start():
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    if not (_requested_by_admin() or (rate and random.random() < rate)):
+        return
+    profiler = cProfile.Profile()
+    g._profile = (profiler, time.perf_counter())
+    profiler.enable()
+
+
+def _finish(response):
+    started = g.pop('_profile', None)
+    if started is None:
+        return response
+    profiler, start = started
+    profiler.disable()
+    duration = time.perf_counter() - start
+    profile_id = uuid.uuid4().hex[:12]
+    name = (f"{int(time.time() * 1000)}-{profile_id}-{request.method}-{int(duration * 1000)}-"
+            f"{request.endpoint or 'unmatched'}.speedscope.json")
+    title = f"{request.method} {request.path} ({request.endpoint}) {duration * 1000:.1f}ms"
+    run_in_background('profiles', _save, pstats.Stats(profiler), name, title)
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+
+def to_speedscope(stats, title):
+    """Unfold cProfile's caller graph into weighted stacks (seconds) in speedscope's sampled format.
+
+    cProfile only keeps per-edge totals, so time under a function that has several callers is split
+    between them in proportion to each caller's share of its cumulative time.
+
+    Every caller path is a distinct stack, and their number grows exponentially with the graph, so
+    the tree is unfolded heaviest node first and stops at MAX_NODES stacks. A node left unexpanded
+    (budget spent, MAX_STACK_DEPTH reached) reports its whole cumulative time as its own, so the
+    total stays the profiled time.
+    """
+    frames, frame_index = [], {}
+    samples, weights = [], []
+    children = {}
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+
+    def frame(func):
+        if func not in frame_index:
+            filename, line, name = func
+            frame_index[func] = len(frames)
+            frames.append({'name': name, 'file': filename, 'line': line})
+        return frame_index[func]
+
+    nodes = [] # (func, parent node, depth)
+
+    def path(node):
+        while node is not None:
+            yield nodes[node][0]
+            node = nodes[node][1]
+
+    heap, order = [], itertools.count()
+    for func, row in stats.stats.items():
+        if not row[4]: # Roots: nothing recorded calling them
+            heapq.heappush(heap, (-row[3], next(order), func, None, 1))
+    while heap:
+        cumulative, _, func, parent, depth = heapq.heappop(heap)
+        cumulative = -cumulative
+        tt, ct = stats.stats[func][2], stats.stats[func][3]
+        scale = cumulative / ct if ct else 0
+        node = len(nodes)
+        nodes.append((func, parent, depth))
+
+        calls = children.get(func, [])
+        own = tt * scale
+        if depth >= MAX_STACK_DEPTH or len(nodes) + len(heap) + len(calls) > MAX_NODES:
+            own = cumulative # Everything below folds into this frame
+        else:
+            on_stack = set(path(node))
+            for child, edge_ct in calls:
+                if child not in on_stack and edge_ct * scale > 0: # Recursion is folded into the outermost frame
+                    heapq.heappush(heap, (-edge_ct * scale, next(order), child, node, depth + 1))
+        if own > 0:
+            samples.append([frame(f) for f in reversed(list(path(node)))])
+            weights.append(round(own, 9))
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': title,
+        'exporter': 'homehub',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': title,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+def _save(stats, name, title):
+    folder = current_app.config['PROFILE_DIR']
+    os.makedirs(folder, exist_ok=True)
+    tmp = os.path.join(folder, f'.{name}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(to_speedscope(stats, title), f)
+    os.replace(tmp, os.path.join(folder, name)) # Readers never see a partial file
+
+    # Ring buffer: drop the oldest beyond the cap (names sort by creation time)
+    names = sorted(n for n in os.listdir(folder) if _NAME.match(n))
+    for old in names[:-current_app.config['PROFILE_MAX_FILES']]:
+        try:
+            os.remove(os.path.join(folder, old))
+        except FileNotFoundError: # Another worker got there first
+            pass
+
+
+def list_profiles():
+    folder = current_app.config['PROFILE_DIR']
+    if not os.path.isdir(folder):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(folder), reverse=True):
+        match = _NAME.match(name)
+        if not match:
+            continue
+        created_ms, profile_id, method, duration_ms, endpoint = match.groups()
+        try:
+            size = os.path.getsize(os.path.join(folder, name))
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            'id': profile_id,
+            'endpoint': endpoint,
+            'method': method,
+            'duration_ms': int(duration_ms),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(int(created_ms) / 1000)),
+            'size': size,
+        })
+    return profiles
+
+
+def profile_path(profile_id):
+    """Absolute path of a stored profile, or None."""
+    if not _ID.match(profile_id or ''):
+        return None
+    folder = current_app.config['PROFILE_DIR']
+    if not os.path.isdir(folder):
+        return None
+    for name in os.listdir(folder):
+        match = _NAME.match(name)
+        if match and match.group(2) == profile_id:
+            return os.path.join(folder, name)
+    return None
+
+
+def init_app(app):
+    app.before_request(_start)
+    app.after_request(_finish)
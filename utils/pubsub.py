@@ -0,0 +1,190 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, object_session
+
+CHANNEL = 'homehub_notifications'
+# Queued in place of a payload that didn't fit: the stream ends so the browser reconnects and replays
+OVERFLOW = object()
+
+logger = logging.getLogger(__name__)
+
+
+class Broker:
+    """In-process fan-out of notification payloads to the SSE streams held by this worker.
+
+    Under gthread every open stream holds a worker thread, so at most `max_streams` are open at once;
+    the rest of the thread pool stays free for API requests.
+    """
+
+    def __init__(self, max_queue=100, max_streams=None):
+        self.max_queue = max_queue
+        self.max_streams = max_streams
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """A queue for `user_id`'s payloads, or None when this worker already holds max_streams."""
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_streams is not None and self._count >= self.max_streams:
+                return None
+            self._subscribers.setdefault(str(user_id), set()).add(q)
+            self._count += 1
+        return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            subs = self._subscribers.get(str(user_id))
+            if subs and q in subs:
+                subs.discard(q)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[str(user_id)]
+
+    def dispatch(self, payload):
+        with self._lock:
+            subs = list(self._subscribers.get(str(payload['user_id']), ()))
+        for q in subs:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                # Slow client. Dropping just this payload would lose it for good (later ids move
+                # Last-Event-ID past it), so end the stream: the reconnect replays from the last id sent.
+                self._overflow(q)
+
+    def _overflow(self, q):
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(OVERFLOW)
+        except queue.Full: # Another dispatch refilled it meanwhile; its own overflow will land
+            pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._count
+
+
+class MemoryBackend:
+    """Single-process stand-in (dev, tests): publishes straight to the local broker after commit."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def on_insert(self, connection, payloads):
+        pass
+
+    def publish(self, payloads):
+        for p in payloads:
+            self.broker.dispatch(p)
+
+    def start(self):
+        pass
+
+
+class PostgresBackend:
+    """LISTEN/NOTIFY so every gunicorn worker sees rows inserted by any other worker.
+
+    NOTIFY is issued on the inserting transaction, so Postgres only delivers it on commit.
+    """
+
+    def __init__(self, broker, dsn):
+        self.broker = broker
+        self.dsn = dsn.replace('postgresql+psycopg2://', 'postgresql://', 1)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def on_insert(self, connection, payloads):
+        connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                           [{'channel': CHANNEL, 'payload': json.dumps(p)} for p in payloads])
+
+    def publish(self, payloads):
+        pass # Delivered through the listener, including to this worker
+
+    def start(self):
+        # Started lazily by the first stream so the thread lives in the worker, not the gunicorn master
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='homehub-pg-listen', daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        import psycopg2
+
+        while True:
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                conn.cursor().execute(f"LISTEN {CHANNEL};")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.broker.dispatch(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Notification listener error; reconnecting")
+                time.sleep(2)
+
+
+broker = Broker()
+backend = MemoryBackend(broker)
+
+
+def notification_payload(n):
+    return {
+        'id': n.id,
+        'user_id': n.user_id,
+        'message': n.message,
+        'is_read': bool(n.is_read),
+        'created_at': n.created_at.isoformat() if n.created_at else None
+    }
+
+
+def queue_published(session, payloads):
+    """Hand freshly inserted notifications to the backend; memory delivery waits for commit."""
+    session.info.setdefault('notifications_out', []).extend(payloads)
+
+
+def init_app(app):
+    global backend
+    broker.max_streams = app.config.get('SSE_MAX_STREAMS')
+    mode = app.config.get('NOTIFICATION_PUBSUB')
+    if mode is None:
+        mode = 'postgres' if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql') else 'memory'
+    if mode == 'postgres':
+        backend = PostgresBackend(broker, app.config['SQLALCHEMY_DATABASE_URI'])
+    else:
+        backend = MemoryBackend(broker)
+
+    from models import Notification
+
+    if not event.contains(Notification, 'after_insert', _after_insert):
+        event.listen(Notification, 'after_insert', _after_insert)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+
+def _after_insert(mapper, connection, target):
+    payload = notification_payload(target)
+    backend.on_insert(connection, [payload])
+    queue_published(object_session(target), [payload])
+
+
+def _after_commit(session):
+    payloads = session.info.pop('notifications_out', None)
+    if payloads:
+        backend.publish(payloads)
+
+
+def _after_rollback(session):
+    session.info.pop('notifications_out', None)
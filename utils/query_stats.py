@@ -0,0 +1,95 @@
+import json
+import re
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Opt-in per-request query instrumentation (QUERY_INSTRUMENTATION=true):
+#
+#   - counts statements and DB time per request and adds a Server-Timing header
+#     (`db;dur=..;desc="N queries", app;dur=..`) that browser dev tools display
+#   - logs one JSON line per statement shape repeated QUERY_NPLUSONE_THRESHOLD+ times in a request,
+#     the usual N+1 signature
+#   - checks @query_budget(n) views; over budget is logged, or raised with QUERY_BUDGET_ENFORCE=true
+#     (for tests)
+#
+# Statement "shape" is the SQL text with IN-lists collapsed, so `WHERE id = ?` run per row counts
+# as one shape however the ids differ.
+
+_IN_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the most statements a view may issue per request."""
+    def decorator(view):
+        view._query_budget = max_queries
+        return view
+    return decorator
+
+
+def _shape(statement):
+    return _IN_LIST.sub('(?)', ' '.join(statement.split()))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or not conn.info.get('_query_start'):
+        return
+    elapsed = time.perf_counter() - conn.info['_query_start'].pop()
+    stats = g.get('_query_stats')
+    if stats is None:
+        stats = g._query_stats = {'count': 0, 'seconds': 0.0, 'shapes': {}}
+    stats['count'] += 1
+    stats['seconds'] += elapsed
+    shape = stats['shapes'].setdefault(_shape(statement), [0, 0.0])
+    shape[0] += 1
+    shape[1] += elapsed
+
+
+def _start_request():
+    g._request_start = time.perf_counter()
+
+
+def _log(event_name, **fields):
+    current_app.logger.warning(json.dumps(dict(
+        event=event_name, endpoint=request.endpoint, method=request.method, path=request.path, **fields
+    )))
+
+
+def _finish_request(response):
+    stats = g.get('_query_stats') or {'count': 0, 'seconds': 0.0, 'shapes': {}}
+    total = time.perf_counter() - g.get('_request_start', time.perf_counter())
+    response.headers.add('Server-Timing', f'db;dur={stats["seconds"] * 1000:.2f};desc="{stats["count"]} queries"')
+    response.headers.add('Server-Timing', f'app;dur={total * 1000:.2f}')
+
+    threshold = current_app.config['QUERY_NPLUSONE_THRESHOLD']
+    for shape, (count, seconds) in stats['shapes'].items():
+        if count >= threshold:
+            _log('n_plus_one', statement=shape[:500], count=count, db_ms=round(seconds * 1000, 2))
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, '_query_budget', None)
+    if budget is not None and stats['count'] > budget:
+        _log('query_budget_exceeded', budget=budget, count=stats['count'], db_ms=round(stats['seconds'] * 1000, 2))
+        if current_app.config['QUERY_BUDGET_ENFORCE']:
+            raise QueryBudgetExceeded(f'{request.endpoint} issued {stats["count"]} queries (budget {budget})')
+    return response
+
+
+def init_app(app, engines):
+    if not app.config['QUERY_INSTRUMENTATION']:
+        return
+    for engine in engines:
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,141 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+
+# Token-bucket limits declared per route:
+#
+#   @rate_limit('10/minute', by='ip')
+#   @rate_limit('5/minute', by='user')
+#
+# Each bucket holds `count` tokens and refills at count/period per second, so short bursts up to
+# `count` pass and sustained traffic is held to the rate. Buckets live in a pluggable store:
+# memory (per process, default) or Redis via RATELIMIT_STORAGE_URL=redis://... so all gunicorn
+# workers share one budget.
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit):
+    count, period = limit.split('/')
+    return int(count), PERIODS[period.strip().rstrip('s')]
+
+
+class MemoryStore:
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict() # Least recently used first
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / rate
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Drop buckets idle long enough to have refilled; they'd start full anyway. They are all at
+        # the front, so this stops at the first live one instead of scanning every key.
+        while self._buckets:
+            key, (_, ts) = next(iter(self._buckets.items()))
+            if now - ts <= 3600:
+                break
+            del self._buckets[key]
+
+
+class RedisStore:
+    # Refill + take in one atomic script so concurrent workers can't overspend a bucket
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or capacity
+    local ts = tonumber(b[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, url):
+        import redis # Optional dependency, only needed for shared buckets
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate, cost=1):
+        allowed, retry = self.script(keys=[f'ratelimit:{key}'], args=[capacity, rate, time.time(), cost])
+        return bool(allowed), float(retry)
+
+
+_store = None
+
+
+def init_app(app):
+    global _store
+    url = app.config.get('RATELIMIT_STORAGE_URL', 'memory://')
+    _store = RedisStore(url) if url.startswith(('redis://', 'rediss://')) else MemoryStore()
+
+
+def client_ip():
+    # Behind Render/nginx the socket peer is the proxy; trust that many hops of X-Forwarded-For
+    hops = current_app.config.get('RATELIMIT_TRUSTED_PROXIES', 0)
+    forwarded = [h.strip() for h in request.headers.get('X-Forwarded-For', '').split(',') if h.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.remote_addr or 'unknown'
+
+
+def _key_for(by):
+    if callable(by):
+        return by()
+    if by == 'user':
+        return get_jwt_identity() or client_ip()
+    return client_ip()
+
+
+def rate_limit(limit, by='ip'):
+    """Limit the decorated view to `limit` ('N/second|minute|hour|day') per IP, per user or per key.
+
+    `by='user'` needs the JWT, so put it below @jwt_required(). `by` may also be a callable
+    returning the bucket key (e.g. the email on a login attempt).
+    """
+    count, period = parse_limit(limit)
+    rate = count / period
+
+    def decorator(fn):
+        scope = f"{fn.__module__}.{fn.__name__}:{limit}:{by if isinstance(by, str) else by.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_app.config.get('RATELIMIT_ENABLED', True):
+                allowed, retry_after = _store.take(f"{scope}:{_key_for(by)}", count, rate)
+                if not allowed:
+                    return jsonify({'error': 'Too many requests. Please slow down.'}), 429, \
+                        {'Retry-After': str(max(1, math.ceil(retry_after)))}
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
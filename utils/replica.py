@@ -0,0 +1,182 @@
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+# Read-replica routing. With DATABASE_REPLICA_URL set, GET/HEAD requests read from the replica and
+# everything else (and every flush/DML, whatever the method) goes to the primary.
+#
+# A request stays on the primary when:
+#   - the view is decorated with @use_primary
+#   - the client sends `X-Read-Consistency: strong` (or ?consistency=strong)
+#   - the caller wrote something in the last REPLICA_STICKY_SECONDS (read-your-writes)
+#   - replica lag, checked at most every REPLICA_LAG_CHECK_INTERVAL s, exceeds REPLICA_MAX_LAG s,
+#     or the replica can't be reached
+#
+# Responses carry `X-DB-Route: replica|primary` while a replica is configured.
+#
+# Who wrote recently lives in a store every worker can see: Redis when REPLICA_STICKY_STORAGE_URL
+# is redis://... (defaults to the rate limiter's RATELIMIT_STORAGE_URL), else process memory, which
+# only holds when a single worker serves the API.
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+_lag = {'checked': 0.0, 'seconds': 0.0}
+_lock = threading.Lock()
+
+
+class MemoryWriters:
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._until = {} # identity -> monotonic time until which their reads go to the primary
+        self._lock = threading.Lock()
+
+    def mark(self, identity, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self._until[identity] = now + seconds
+            if len(self._until) > self.max_keys:
+                for key, until in list(self._until.items()):
+                    if until < now:
+                        del self._until[key]
+
+    def wrote_recently(self, identity):
+        until = self._until.get(identity)
+        return until is not None and until >= time.monotonic()
+
+
+class RedisWriters:
+    def __init__(self, url):
+        import redis # Optional dependency, only needed to share stickiness across workers
+
+        self.client = redis.Redis.from_url(url)
+
+    def mark(self, identity, seconds):
+        if seconds > 0:
+            self.client.set(f'replica:wrote:{identity}', 1, px=int(seconds * 1000))
+
+    def wrote_recently(self, identity):
+        return bool(self.client.exists(f'replica:wrote:{identity}'))
+
+
+_writers = MemoryWriters()
+
+
+def use_primary(view):
+    """Mark a read-only view that must see the primary (e.g. it is polled right after a write)."""
+    view._use_primary = True
+    return view
+
+
+def _identity():
+    from flask_jwt_extended import get_jwt_identity
+    try:
+        return get_jwt_identity()
+    except RuntimeError: # No verified token in this request (public route, or not verified yet)
+        return None
+
+
+def replica_lag(engine):
+    """Seconds the replica is behind, cached per worker; inf if it can't be checked."""
+    interval = current_app.config['REPLICA_LAG_CHECK_INTERVAL']
+    now = time.monotonic()
+    with _lock:
+        if now - _lag['checked'] < interval:
+            return _lag['seconds']
+        _lag['checked'] = now # One checker at a time; the rest use the previous value
+
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == 'postgresql':
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar()
+            else:
+                conn.execute(text("SELECT 1")) # No replication to measure; just check it's up
+                lag = 0
+        lag = float(lag or 0)
+    except Exception as e:
+        current_app.logger.warning("Replica lag check failed, reading from primary: %s", e)
+        lag = float('inf')
+    _lag['seconds'] = lag
+    return lag
+
+
+def _route_request():
+    """before_request: decide whether this request's reads may use the replica."""
+    g.db_replica = False
+    if not current_app.config.get('DATABASE_REPLICA_URL') or request.method not in READ_METHODS:
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, '_use_primary', False):
+        return
+    consistency = request.headers.get('X-Read-Consistency') or request.args.get('consistency')
+    if consistency == 'strong':
+        return
+    from extensions import db
+    if replica_lag(db.engines[REPLICA_BIND]) > current_app.config['REPLICA_MAX_LAG']:
+        return
+    g.db_replica = True
+
+
+def _reads_from_replica():
+    if not has_request_context() or not g.get('db_replica'):
+        return False
+    if 'db_wrote_recently' not in g: # Asked per query; look the store up once per request
+        identity = _identity()
+        if identity is None:
+            return True
+        try:
+            g.db_wrote_recently = _writers.wrote_recently(identity)
+        except Exception as e:
+            current_app.logger.warning("Read-your-writes lookup failed, reading from primary: %s", e)
+            g.db_wrote_recently = True
+    return not g.db_wrote_recently
+
+
+def _after_request(response):
+    if not current_app.config.get('DATABASE_REPLICA_URL'):
+        return response
+    if request.method not in READ_METHODS and response.status_code < 400:
+        identity = _identity()
+        if identity is not None:
+            try:
+                _writers.mark(identity, current_app.config['REPLICA_STICKY_SECONDS'])
+            except Exception as e:
+                current_app.logger.warning("Could not record write for read-your-writes: %s", e)
+    response.headers['X-DB-Route'] = 'replica' if g.get('db_replica') and _reads_from_replica() else 'primary'
+    return response
+
+
+class RoutingSession(Session):
+    """db.session: sends plain reads to the replica bind while the request allows it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is not None: # Pinned to one connection (snapshots.rolled_back)
+            return self.bind
+        if bind is None and not self._flushing and _is_read(clause) and _reads_from_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_read(clause):
+    if isinstance(clause, UpdateBase):
+        return False
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(('SELECT', 'WITH'))
+    return True
+
+
+def init_app(app):
+    global _writers
+    url = app.config.get('REPLICA_STICKY_STORAGE_URL', 'memory://')
+    _writers = RedisWriters(url) if url.startswith(('redis://', 'rediss://')) else MemoryWriters()
+    app.before_request(_route_request)
+    app.after_request(_after_request)
@@ -0,0 +1,315 @@
+from sqlalchemy import func
+from extensions import db
+from models import (Property, PropertyImage, Unit, Lease, User, Invoice, MaintenanceRequest,
+                    MaintenanceAttachment, Notification)
+
+# Row serializers for list endpoints.
+#
+# A Serializer names its output keys and the SQL expression behind each, plus the joins those
+# expressions need. A view of it selects exactly the columns for the keys it outputs, joining only
+# what they need, so rows come back as plain tuples (no ORM objects, no lazy loads) and are turned
+# into dicts by a function generated once per view: one dict display per row, no per-field calls.
+# One-to-many children (images, attachments) are fetched for the whole page in a single extra
+# query, and only when they are part of the output.
+#
+# Clients shape list responses with ?fields=id,name,price (a subset of the default keys) and
+# ?expand=landlord,units (related objects left out by default); see Serializer.view_for().
+#
+# Datetimes are passed through as-is; the JSON provider (utils/json_provider.py) writes them in
+# the same ISO 8601 form to_dict() uses, so output is unchanged.
+
+IN_CHUNK = 1000 # Parent ids per children query; keeps long lists under bind-parameter limits
+MAX_VIEWS = 256 # Compiled fields/expand combinations kept per serializer
+
+
+def _display(layout):
+    return '{' + ', '.join(f'{key!r}: ' + (f'r[{at}]' if isinstance(at, int) else _display(at))
+                           for key, at in layout) + '}'
+
+
+def _compile(layout):
+    """layout: [(key, column index or nested layout)] -> function(rows) -> [dict]."""
+    namespace = {}
+    exec(f'def dump(rows):\n    return [{_display(layout)} for r in rows]', namespace)
+    return namespace['dump']
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()] if value else []
+
+
+class Child:
+    """A one-to-many collection, e.g. a property's images."""
+
+    def __init__(self, serializer, foreign_key):
+        self.serializer = serializer
+        self.foreign_key = foreign_key
+
+    def load(self, parents):
+        """{parent id: [child dicts]} for the parent ids `parents` selects (a list or a subquery)."""
+        view = self.serializer.default
+        # The foreign key rides along as an extra last column and is dropped from the output
+        rows = view.query().add_columns(self.foreign_key).filter(self.foreign_key.in_(parents))\
+            .order_by(self.serializer.model.id).all()
+        grouped = {}
+        for row, item in zip(rows, view.dump(rows)):
+            grouped.setdefault(row[-1], []).append(item)
+        return grouped
+
+
+class Nested:
+    """A many-to-one object made of joined columns, e.g. a lease's unit."""
+
+    def __init__(self, fields, needs):
+        self.fields = fields
+        self.needs = tuple(needs)
+
+
+class View:
+    """A compiled selection of a serializer's output: its columns, joins and children."""
+
+    def __init__(self, serializer, fields, nested, children):
+        self.model = serializer.model
+        self.children = children
+        self.expanded = {key for key, _ in nested} | {key for key, _ in children if key in serializer.expansions}
+        self._joins = serializer.joins
+        self.columns, layout, self.needs = [], [], set()
+        for key, column, needs in fields:
+            layout.append((key, len(self.columns)))
+            self.columns.append(column.label(key))
+            self.needs.update(needs)
+        for key, expansion in nested:
+            inner = []
+            for subkey, column in expansion.fields:
+                inner.append((subkey, len(self.columns)))
+                self.columns.append(column.label(f'{key}_{subkey}'))
+            layout.append((key, inner))
+            self.needs.update(expansion.needs)
+        if children:
+            # Children are matched on the parent id, whether or not it is in the output
+            self.id_index = len(self.columns)
+            self.columns.append(self.model.id.label('_parent_id'))
+        self._dump = _compile(layout)
+
+    def query(self, *using):
+        """Query for this view's columns; filter/order/paginate it like any other. `using` names
+        joinable models the caller filters on, which are joined even if no output key needs them."""
+        query = db.session.query(*self.columns).select_from(self.model)
+        for target, onclause, outer in self._joins:
+            if target in self.needs or target in using:
+                query = query.outerjoin(target, onclause) if outer else query.join(target, onclause)
+        return query
+
+    def dump(self, rows, query=None):
+        """Dicts for `rows`. Given the query they came from, children are fetched with it as a
+        subquery (an index-driven semi-join) instead of a long list of ids."""
+        items = self._dump(rows)
+        for key, child in self.children:
+            if not items:
+                break
+            if query is not None:
+                grouped = child.load(query.with_entities(self.model.id))
+            else:
+                ids = [row[self.id_index] for row in rows]
+                grouped = {}
+                for start in range(0, len(ids), IN_CHUNK):
+                    grouped.update(child.load(ids[start:start + IN_CHUNK]))
+            for row, item in zip(rows, items):
+                item[key] = grouped.get(row[self.id_index], [])
+        return items
+
+    def all(self, query):
+        return self.dump(query.all(), query)
+
+    def first(self, query):
+        rows = query.limit(1).all()
+        return self.dump(rows)[0] if rows else None
+
+
+class Serializer:
+    def __init__(self, model, fields, joins=(), children=None, expand=None):
+        """fields: [(key, column)] or [(key, column, models it needs joined)], the default output;
+        joins: [(model, onclause, outer)], applied in that order when needed;
+        children: {key: Child}, in the default output; expand: {key: Nested or Child}, on request."""
+        self.model = model
+        self.fields = [(field[0], field[1], tuple(field[2]) if len(field) > 2 else ()) for field in fields]
+        self.joins = list(joins)
+        self.children = children or {}
+        self.expansions = expand or {}
+        self._views = {}
+        self.default = self.view()
+
+    def view(self, fields=None, expand=()):
+        """View of just `fields` (default: every default key) plus the `expand` relations.
+        Raises ValueError naming anything unknown."""
+        cache_key = (None if fields is None else tuple(fields), tuple(expand))
+        view = self._views.get(cache_key)
+        if view is not None:
+            return view
+
+        available = [key for key, _, _ in self.fields] + list(self.children)
+        unknown = sorted(set(fields or ()) - set(available))
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+        unknown = sorted(set(expand) - set(self.expansions))
+        if unknown:
+            raise ValueError(f"Unknown expansion(s): {', '.join(unknown)}. "
+                             f"Available: {', '.join(self.expansions) or 'none'}")
+
+        wanted = set(available if fields is None else fields)
+        expanded = [(key, e) for key, e in self.expansions.items() if key in expand]
+        view = View(self, [field for field in self.fields if field[0] in wanted],
+                    [(key, e) for key, e in expanded if isinstance(e, Nested)],
+                    [(key, c) for key, c in self.children.items() if key in wanted]
+                    + [(key, e) for key, e in expanded if isinstance(e, Child)])
+
+        if len(self._views) >= MAX_VIEWS:
+            self._views.clear()
+        self._views[cache_key] = view
+        return view
+
+    def view_for(self, args):
+        """View for a request's ?fields=a,b&expand=c,d (both optional)."""
+        return self.view(_split(args.get('fields')) or None, _split(args.get('expand')))
+
+    # The default view, for callers that don't take ?fields/?expand
+    def query(self, *using):
+        return self.default.query(*using)
+
+    def dump(self, rows, query=None):
+        return self.default.dump(rows, query)
+
+    def all(self, query):
+        return self.default.all(query)
+
+    def first(self, query):
+        return self.default.first(query)
+
+
+PROPERTY_IMAGE = Serializer(PropertyImage, [
+    ('id', PropertyImage.id),
+    ('image_url', PropertyImage.image_url),
+])
+
+UNIT = Serializer(Unit, [
+    ('id', Unit.id),
+    ('unit_number', Unit.unit_number),
+    ('rent_amount', Unit.rent_amount),
+    ('status', Unit.status),
+])
+
+PROPERTY = Serializer(Property, [
+    ('id', Property.id),
+    ('landlord_id', Property.landlord_id),
+    ('name', Property.name),
+    ('description', Property.description),
+    ('address', Property.address),
+    ('city', Property.city),
+    ('state', Property.state),
+    ('country', Property.country),
+    ('price', Property.price),
+    ('bedrooms', Property.bedrooms),
+    ('bathrooms', Property.bathrooms),
+    ('square_feet', Property.square_feet),
+    ('property_type', Property.property_type),
+    ('image_url', Property.image_url),
+    ('status', Property.status),
+], joins=[
+    (User, User.id == Property.landlord_id, False),
+], children={
+    'images': Child(PROPERTY_IMAGE, PropertyImage.property_id),
+}, expand={
+    # Listings are public: name only, no contact details
+    'landlord': Nested([('id', User.id), ('full_name', User.full_name)], [User]),
+    'units': Child(UNIT, Unit.property_id),
+})
+
+# Lease.to_dict() plus the tenant contact details the lease list adds. Unit and property are inner
+# joins (NOT NULL keys), so a landlord filter can drive the plan
+LEASE = Serializer(Lease, [
+    ('id', Lease.id),
+    ('unit_id', Lease.unit_id),
+    ('tenant_id', Lease.tenant_id),
+    ('property_name', Property.name, [Unit, Property]),
+    ('unit_number', Unit.unit_number, [Unit]),
+    ('status', Lease.status),
+    ('rent_amount', Lease.rent_amount),
+    ('start_date', Lease.start_date),
+    ('end_date', Lease.end_date),
+    ('created_at', Lease.created_at),
+    ('updated_at', Lease.updated_at),
+    ('tenant_name', func.coalesce(User.full_name, 'Unknown Tenant'), [User]),
+    ('tenant_email', User.email, [User]),
+    ('tenant_phone', User.phone_number, [User]),
+], joins=[
+    (Unit, Unit.id == Lease.unit_id, False),
+    (Property, Property.id == Unit.property_id, False),
+    (User, User.id == Lease.tenant_id, True),
+], expand={
+    'unit': Nested([('id', Unit.id), ('unit_number', Unit.unit_number), ('status', Unit.status)], [Unit]),
+    'property': Nested([('id', Property.id), ('name', Property.name), ('address', Property.address),
+                        ('city', Property.city), ('image_url', Property.image_url)], [Unit, Property]),
+})
+
+INVOICE = Serializer(Invoice, [
+    ('id', Invoice.id),
+    ('lease_id', Invoice.lease_id),
+    ('amount', Invoice.amount),
+    ('description', Invoice.description),
+    ('due_date', Invoice.due_date),
+    ('status', Invoice.status),
+    ('created_at', Invoice.created_at),
+    ('updated_at', Invoice.updated_at),
+], joins=[
+    (Lease, Lease.id == Invoice.lease_id, False),
+    (Unit, Unit.id == Lease.unit_id, False),
+    (Property, Property.id == Unit.property_id, False),
+], expand={
+    'lease': Nested([('id', Lease.id), ('status', Lease.status), ('rent_amount', Lease.rent_amount),
+                     ('start_date', Lease.start_date), ('end_date', Lease.end_date)], [Lease]),
+    'property': Nested([('id', Property.id), ('name', Property.name), ('unit_number', Unit.unit_number)],
+                       [Lease, Unit, Property]),
+})
+
+MAINTENANCE_ATTACHMENT = Serializer(MaintenanceAttachment, [
+    ('id', MaintenanceAttachment.id),
+    ('image_url', MaintenanceAttachment.image_url),
+    ('thumbnail_url', MaintenanceAttachment.thumbnail_url),
+])
+
+# MaintenanceRequest.to_dict() plus the property/unit/tenant details the request list adds
+MAINTENANCE_REQUEST = Serializer(MaintenanceRequest, [
+    ('id', MaintenanceRequest.id),
+    ('unit_id', MaintenanceRequest.unit_id),
+    ('tenant_id', MaintenanceRequest.tenant_id),
+    ('title', MaintenanceRequest.title),
+    ('description', MaintenanceRequest.description),
+    ('priority', MaintenanceRequest.priority),
+    ('status', MaintenanceRequest.status),
+    ('created_at', MaintenanceRequest.created_at),
+    ('acknowledged_at', MaintenanceRequest.acknowledged_at),
+    ('resolved_at', MaintenanceRequest.resolved_at),
+    ('updated_at', MaintenanceRequest.updated_at),
+    ('property_name', Property.name, [Unit, Property]),
+    ('unit_number', Unit.unit_number, [Unit]),
+    ('tenant_name', func.coalesce(User.full_name, 'Unknown'), [User]),
+    ('tenant_phone', User.phone_number, [User]),
+], joins=[
+    (Unit, Unit.id == MaintenanceRequest.unit_id, False),
+    (Property, Property.id == Unit.property_id, False),
+    (User, User.id == MaintenanceRequest.tenant_id, True),
+], children={
+    'attachments': Child(MAINTENANCE_ATTACHMENT, MaintenanceAttachment.request_id),
+}, expand={
+    'unit': Nested([('id', Unit.id), ('unit_number', Unit.unit_number)], [Unit]),
+    'property': Nested([('id', Property.id), ('name', Property.name), ('address', Property.address),
+                        ('city', Property.city)], [Unit, Property]),
+})
+
+NOTIFICATION = Serializer(Notification, [
+    ('id', Notification.id),
+    ('message', Notification.message),
+    ('is_read', Notification.is_read),
+    ('created_at', Notification.created_at),
+    ('updated_at', Notification.updated_at),
+])
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+import click
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+from extensions import db
+
+# Database snapshots, so test/demo resets and benchmark runs don't rebuild and reseed row by row.
+#
+#   SQLite (file):  <db file>.<name>.snapshot, written and restored with the online backup API, so
+#                   connections other processes hold stay valid. Metadata sits beside it as .json.
+#   PostgreSQL:     a template database "<db>__<name>"; restore drops the live database and recreates
+#                   it from the template (other sessions on it are terminated; pooled connections
+#                   reconnect through pre-ping). Metadata is the template database's COMMENT.
+#
+# A snapshot records a fingerprint of the schema it was taken with; after a schema change it is
+# treated as missing, so callers fall back to a full rebuild and re-save.
+#
+# rolled_back() is the per-test alternative: everything in the block, commits included, runs in one
+# outer transaction on a single connection and is rolled back at the end.
+
+_NAME = re.compile(r'^[\w.-]{1,30}$')
+
+
+def _check_name(name):
+    if not _NAME.match(name):
+        raise ValueError(f"Invalid snapshot name {name!r}")
+
+
+def schema_fingerprint(engine=None):
+    engine = engine or db.engine
+    ddl = []
+    for table in db.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=engine.dialect)))
+        ddl.extend(sorted(str(CreateIndex(index).compile(dialect=engine.dialect)) for index in table.indexes))
+    return hashlib.sha1('\n'.join(ddl).encode()).hexdigest()[:16]
+
+
+def _sqlite_path(engine):
+    path = engine.url.database
+    if not path or path == ':memory:' or path.startswith('file:'):
+        raise RuntimeError("Snapshots need a file-backed SQLite database or PostgreSQL")
+    return path
+
+
+def _reset_caches():
+    # Restored rows may carry older token versions than the ones this worker cached
+    from utils.auth import forget_token_versions
+    forget_token_versions(None)
+
+
+# --- SQLite ---
+
+def _sqlite_backup(source, target):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def _sqlite_save(engine, name, meta):
+    live = _sqlite_path(engine)
+    snapshot = f'{live}.{name}.snapshot'
+    _sqlite_backup(live, snapshot + '.tmp')
+    os.replace(snapshot + '.tmp', snapshot)
+    meta['size'] = os.path.getsize(snapshot)
+    with open(snapshot + '.json', 'w') as f:
+        json.dump(meta, f)
+
+
+def _sqlite_info(engine, name):
+    snapshot = f'{_sqlite_path(engine)}.{name}.snapshot'
+    try:
+        with open(snapshot + '.json') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if os.path.exists(snapshot) else None
+
+
+def _sqlite_restore(engine, name):
+    live = _sqlite_path(engine)
+    engine.dispose() # Our pooled connections would otherwise hold the old pages
+    _sqlite_backup(f'{live}.{name}.snapshot', live)
+
+
+def _sqlite_drop(engine, name):
+    snapshot = f'{_sqlite_path(engine)}.{name}.snapshot'
+    for path in (snapshot, snapshot + '.json'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# --- PostgreSQL ---
+
+def _template(engine, name):
+    template = f'{engine.url.database}__{name}'
+    if len(template) > 63:
+        raise ValueError(f"Snapshot database name {template!r} is longer than PostgreSQL allows")
+    return template
+
+
+@contextmanager
+def _maintenance_connection(engine):
+    # CREATE/DROP DATABASE can't run inside a transaction or while connected to the target
+    admin = create_engine(engine.url.set(database='postgres'), isolation_level='AUTOCOMMIT', poolclass=NullPool)
+    try:
+        with admin.connect() as conn:
+            yield conn
+    finally:
+        admin.dispose()
+
+
+def _terminate(conn, database):
+    conn.execute(text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                      "WHERE datname = :db AND pid <> pg_backend_pid()"), {'db': database})
+
+
+def _postgres_save(engine, name, meta):
+    live, template = engine.url.database, _template(engine, name)
+    engine.dispose()
+    with _maintenance_connection(engine) as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{template}"'))
+        _terminate(conn, live) # A template copy needs the source to have no other sessions
+        conn.execute(text(f'CREATE DATABASE "{template}" TEMPLATE "{live}"'))
+        conn.execute(text(f'COMMENT ON DATABASE "{template}" IS ' + "'" + json.dumps(meta).replace("'", "''") + "'"))
+
+
+def _postgres_info(engine, name):
+    with _maintenance_connection(engine) as conn:
+        comment = conn.execute(text("SELECT shobj_description(oid, 'pg_database') FROM pg_database "
+                                    "WHERE datname = :name"), {'name': _template(engine, name)}).scalar()
+    try:
+        return json.loads(comment) if comment else None
+    except ValueError:
+        return None
+
+
+def _postgres_restore(engine, name):
+    live, template = engine.url.database, _template(engine, name)
+    engine.dispose()
+    with _maintenance_connection(engine) as conn:
+        _terminate(conn, live)
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{live}"'))
+        conn.execute(text(f'CREATE DATABASE "{live}" TEMPLATE "{template}"'))
+
+
+def _postgres_drop(engine, name):
+    with _maintenance_connection(engine) as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{_template(engine, name)}"'))
+
+
+def _backend(engine):
+    if engine.dialect.name == 'postgresql':
+        return _postgres_save, _postgres_info, _postgres_restore, _postgres_drop
+    if engine.dialect.name == 'sqlite':
+        return _sqlite_save, _sqlite_info, _sqlite_restore, _sqlite_drop
+    raise RuntimeError(f"Snapshots are not supported on {engine.dialect.name}")
+
+
+# --- Public API (inside an app context) ---
+
+def save(name):
+    """Snapshot the current database as `name`, replacing any earlier one. Returns its metadata."""
+    _check_name(name)
+    engine = db.engine
+    db.session.remove()
+    meta = {'name': name, 'schema': schema_fingerprint(engine), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    _backend(engine)[0](engine, name, meta)
+    return meta
+
+
+def info(name):
+    """Metadata of snapshot `name`, or None if there is none or it predates the current schema."""
+    _check_name(name)
+    engine = db.engine
+    meta = _backend(engine)[1](engine, name)
+    if not meta or meta.get('schema') != schema_fingerprint(engine):
+        return None
+    return meta
+
+
+def restore(name):
+    """Replace the database with snapshot `name`. False (nothing changed) if it's missing or stale."""
+    if not info(name):
+        return False
+    engine = db.engine
+    db.session.remove()
+    _backend(engine)[2](engine, name)
+    _reset_caches()
+    return True
+
+
+def drop(name):
+    _check_name(name)
+    _backend(db.engine)[3](db.engine, name)
+
+
+@contextmanager
+def rolled_back():
+    """Run the block against one connection inside a transaction that is rolled back afterwards.
+
+    Sessions created meanwhile (including the ones test-client requests get) use that connection;
+    their commits become savepoints. Single-threaded use only: the connection is shared.
+    """
+    connection = db.engine.connect()
+    raw = connection.connection.driver_connection
+    sqlite = connection.dialect.name == 'sqlite'
+    if sqlite:
+        # pysqlite doesn't BEGIN before a SAVEPOINT, so RELEASE would commit; manage BEGIN by hand
+        isolation, raw.isolation_level = raw.isolation_level, None
+    outer = connection.begin()
+    if sqlite:
+        connection.exec_driver_sql('BEGIN')
+    factory = db.session.session_factory
+    saved = dict(factory.kw)
+    db.session.remove()
+    factory.configure(bind=connection, join_transaction_mode='create_savepoint')
+    try:
+        yield connection
+    finally:
+        db.session.remove()
+        factory.kw.clear()
+        factory.kw.update(saved)
+        outer.rollback()
+        if sqlite:
+            raw.isolation_level = isolation
+        connection.close()
+        _reset_caches()
+
+
+snapshot_cli = AppGroup('snapshot', help='Save and restore whole-database snapshots.')
+
+
+@snapshot_cli.command('save')
+@click.argument('name')
+def save_command(name):
+    """Snapshot the database as NAME."""
+    started = time.perf_counter()
+    save(name)
+    click.echo(f"saved snapshot {name} in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+@snapshot_cli.command('restore')
+@click.argument('name')
+def restore_command(name):
+    """Replace the database with snapshot NAME."""
+    started = time.perf_counter()
+    if not restore(name):
+        raise click.ClickException(f"no snapshot {name} for the current schema")
+    click.echo(f"restored snapshot {name} in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+@snapshot_cli.command('drop')
+@click.argument('name')
+def drop_command(name):
+    """Delete snapshot NAME."""
+    drop(name)
+    click.echo(f"dropped snapshot {name}")
+
+
+def init_app(app):
+    app.cli.add_command(snapshot_cli)
@@ -0,0 +1,61 @@
+import os
+import uuid
+from flask import current_app
+
+import cloudinary
+import cloudinary.uploader
+
+THUMBNAIL_SIZE = (320, 320)
+
+
+class LocalStorage:
+    """Files in UPLOAD_FOLDER, served by the app's /uploads route."""
+
+    def __init__(self, folder, base_url='/uploads'):
+        self.folder = folder
+        self.base_url = base_url.rstrip('/')
+
+    def save(self, file):
+        ext = file.filename.rsplit('.', 1)[1].lower()
+        key = f"{uuid.uuid4().hex}.{ext}"
+        os.makedirs(self.folder, exist_ok=True)
+        file.save(os.path.join(self.folder, key))
+        return key, f"{self.base_url}/{key}"
+
+    def make_thumbnail(self, key):
+        from PIL import Image  # Pillow is only needed by the thumbnail workers
+
+        name, ext = key.rsplit('.', 1)
+        thumb_key = f"{name}_thumb.{ext}"
+        with Image.open(os.path.join(self.folder, key)) as img:
+            img.thumbnail(THUMBNAIL_SIZE)
+            img.save(os.path.join(self.folder, thumb_key))
+        return f"{self.base_url}/{thumb_key}"
+
+    def delete(self, key):
+        for k in (key, '_thumb.'.join(key.rsplit('.', 1))):
+            path = os.path.join(self.folder, k)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class CloudinaryStorage:
+    """Cloudinary uploads; thumbnails are URL transformations, so nothing is re-uploaded."""
+
+    def save(self, file):
+        res = cloudinary.uploader.upload(file)
+        return res['public_id'], res['secure_url']
+
+    def make_thumbnail(self, key):
+        width, height = THUMBNAIL_SIZE
+        return cloudinary.CloudinaryImage(key).build_url(width=width, height=height, crop='fill', secure=True)
+
+    def delete(self, key):
+        cloudinary.uploader.destroy(key)
+
+
+def get_storage():
+    backend = current_app.config.get('STORAGE_BACKEND', 'local')
+    if backend == 'cloudinary':
+        return CloudinaryStorage()
+    return LocalStorage(current_app.config['UPLOAD_FOLDER'])
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta
+import click
+from flask import current_app, jsonify
+from flask.cli import AppGroup
+from sqlalchemy import event, select, insert, delete, tuple_
+from extensions import db
+from models import Lease, Invoice, MaintenanceRequest, Notification, Tombstone, Unit, Property
+from utils.pagination import encode_cursor, decode_cursor
+
+# Delta sync for the lease, invoice, maintenance and notification feeds.
+#
+# Synced rows carry updated_at, stamped on INSERT and on every UPDATE (ORM flushes and set-based
+# UPDATEs alike, through Column.onupdate). Deleting one leaves a tombstone for each user whose feed
+# listed it. A full feed response carries X-Sync-Token; sending it back as ?since=<token> returns
+#
+#   {"changed": [rows], "deleted": [ids], "sync_token": "...", "has_more": false}
+#
+# with only the rows changed since then, read through the (owner, updated_at) indexes. Clients apply
+# "deleted" before "changed": SQLite may hand a deleted integer id to a new row.
+#
+# Tokens are positions in updated_at order:
+#   - The token that ends a delta is "now - SYNC_OVERLAP_SECONDS", so rows stamped just before a
+#     slower concurrent transaction committed are still picked up next time. Clients upsert by id,
+#     so the few rows re-sent from the overlap are harmless.
+#   - A delta larger than SYNC_BATCH rows ends with has_more and the exact (updated_at, id) of its
+#     last row, so batches neither repeat nor skip rows that share a timestamp (set-based UPDATEs
+#     stamp thousands at once).
+# Tombstones are kept SYNC_TOMBSTONE_DAYS (flask sync prune); an older token gets 410 and the client
+# reloads the full list. Notifications moved to the archive by retention leave tombstones too (see
+# utils/notification_retention.py).
+
+SYNC_BATCH = 500
+
+
+class TokenExpired(Exception):
+    pass
+
+
+def encode_token(position, row_id=None):
+    return encode_cursor(position, '' if row_id is None else row_id)
+
+
+def decode_token(token, id_type=str):
+    """(datetime, id or None). Raises ValueError on a malformed token."""
+    position, row_id = decode_cursor(token)
+    return position, (id_type(row_id) if row_id else None)
+
+
+def start_token():
+    """Token for a client that has just loaded a full list."""
+    return encode_token(datetime.utcnow() - timedelta(seconds=current_app.config['SYNC_OVERLAP_SECONDS']))
+
+
+def with_token(response):
+    response.headers['X-Sync-Token'] = start_token()
+    return response
+
+
+# --- Tombstones ---
+
+def _audience(model, criteria):
+    """Statements selecting (row id, user id) for every user whose feed lists the matching rows."""
+    if model is Notification:
+        return [select(Notification.id, Notification.user_id).where(criteria)]
+    owners = [select(model.id, model.tenant_id).where(criteria)]
+    if model in (Lease, MaintenanceRequest): # Also on the landlord's feed
+        owners.append(select(model.id, Property.landlord_id)
+                      .join(Unit, Unit.id == model.unit_id).join(Property, Property.id == Unit.property_id)
+                      .where(criteria))
+    return owners
+
+
+def record_deletes(connection, model, criteria):
+    """Tombstone the `model` rows matching `criteria`; call before deleting them, in the same transaction.
+
+    `connection` is a Connection or the session. Set-based DELETEs must call this themselves; ORM
+    deletes are covered by the before_delete hooks below.
+    """
+    now = datetime.utcnow()
+    rows = [{'kind': model.__tablename__, 'object_id': str(row_id), 'user_id': user_id, 'deleted_at': now}
+            for statement in _audience(model, criteria)
+            for row_id, user_id in connection.execute(statement)]
+    if rows:
+        connection.execute(insert(Tombstone), rows)
+    return len(rows)
+
+
+def _tombstone_on_delete(mapper, connection, target):
+    record_deletes(connection, type(target), type(target).id == target.id)
+
+
+for _model in (Lease, Invoice, MaintenanceRequest, Notification):
+    event.listen(_model, 'before_delete', _tombstone_on_delete)
+
+
+def prune_tombstones(days=None):
+    days = days or current_app.config['SYNC_TOMBSTONE_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    removed = db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff)).rowcount
+    db.session.commit()
+    return removed
+
+
+# --- Feeds ---
+
+def delta(view, query, model, user_id, token, id_type=str):
+    """Body for ?since=<token> over `query`, a view query already narrowed to the user's rows.
+
+    Raises ValueError on a malformed token and TokenExpired when it predates tombstone retention.
+    """
+    started = datetime.utcnow()
+    since, last_id = decode_token(token, id_type)
+    if since < started - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS']):
+        raise TokenExpired()
+
+    if last_id is None:
+        query = query.filter(model.updated_at > since)
+    else:
+        query = query.filter(tuple_(model.updated_at, model.id) > (since, last_id))
+    # One extra row tells us whether the delta goes on; the two trailing columns aren't output
+    rows = query.add_columns(model.id.label('_sync_id'), model.updated_at.label('_sync_at'))\
+        .order_by(model.updated_at, model.id).limit(SYNC_BATCH + 1).all()
+    page = rows[:SYNC_BATCH]
+    has_more = len(rows) > SYNC_BATCH
+
+    deleted = db.session.scalars(
+        select(Tombstone.object_id).distinct()
+        .where(Tombstone.user_id == user_id, Tombstone.kind == model.__tablename__, Tombstone.deleted_at > since)
+    ).all()
+
+    if has_more:
+        next_token = encode_token(page[-1]._sync_at, page[-1]._sync_id)
+    else:
+        next_token = encode_token(started - timedelta(seconds=current_app.config['SYNC_OVERLAP_SECONDS']))
+    return {
+        'changed': view.dump(page),
+        'deleted': [id_type(object_id) for object_id in deleted],
+        'sync_token': next_token,
+        'has_more': has_more,
+    }
+
+
+def delta_response(view, query, model, user_id, token, id_type=str):
+    """delta() as a response: 400 for a malformed token, 410 for an expired one."""
+    try:
+        body = delta(view, query, model, user_id, token, id_type)
+    except TokenExpired:
+        return jsonify({'error': 'Sync token expired; reload the full list'}), 410
+    except ValueError:
+        return jsonify({'error': 'Invalid sync token'}), 400
+    response = jsonify(body)
+    response.headers['X-Sync-Token'] = body['sync_token']
+    return response, 200
+
+
+# --- CLI: flask sync prune ---
+sync_cli = AppGroup('sync', help='Delta sync maintenance.')
+
+
+@sync_cli.command('prune')
+@click.option('--days', type=int, default=None, help='Keep tombstones this many days.')
+def prune_command(days):
+    """Delete tombstones past retention. Safe to run from cron."""
+    click.echo(f"pruned {prune_tombstones(days)} tombstones")
+
+
+def init_app(app):
+    app.cli.add_command(sync_cli)